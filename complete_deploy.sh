@@ -106,19 +106,19 @@ echo "✅ Java application built"
 echo "🐍 Building Python applications..."
 
 echo "  📦 Building python-app1..."
-cd python-apps/app1
-docker build -t python-k8s-app1:latest .
-cd ../..
+cd python-apps
+docker build -t python-k8s-app1:latest -f app1/Dockerfile .
+cd ..
 
 echo "  📦 Building python-app2..."
-cd python-apps/app2
-docker build -t python-k8s-app2:latest .
-cd ../..
+cd python-apps
+docker build -t python-k8s-app2:latest -f app2/Dockerfile .
+cd ..
 
 echo "  📦 Building python-app3..."
-cd python-apps/app3
-docker build -t python-k8s-app3:latest .
-cd ../..
+cd python-apps
+docker build -t python-k8s-app3:latest -f app3/Dockerfile .
+cd ..
 
 echo "✅ All Python applications built"
 
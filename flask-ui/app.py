@@ -1,33 +1,38 @@
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, Response, render_template, jsonify, request
 import requests
 import json
+import os
 from datetime import datetime
 
+from concurrent.futures import ThreadPoolExecutor
+
+from micro_cache import MicroCache
+from stream_relay import StreamRelay
+from upstream import UpstreamSelector, create_session
+
 app = Flask(__name__)
 
 # Configuration
-K8S_MANAGER_URL = "http://k8s-manager-service:8080"
-LOCAL_K8S_URL = "http://localhost:8080"  # Fallback for development
+K8S_MANAGER_URL = os.getenv("K8S_MANAGER_URL", "http://k8s-manager-service:8080")
+LOCAL_K8S_URL = os.getenv("LOCAL_K8S_URL", "http://localhost:8080")  # Fallback for development
+
+# One keep-alive connection pool shared by every proxy route
+http = create_session()
+
+# Upstream choice is cached and re-checked in the background instead of per request
+upstream = UpstreamSelector(
+    [K8S_MANAGER_URL, LOCAL_K8S_URL],
+    http,
+    check_interval=float(os.getenv("UPSTREAM_CHECK_INTERVAL", "10")),
+    ttl=float(os.getenv("UPSTREAM_TTL", "30"))
+)
 
 def get_k8s_api_url():
-    """Determine which API URL to use"""
-    try:
-        # Try cluster service first
-        response = requests.get(f"{K8S_MANAGER_URL}/health", timeout=2)
-        if response.status_code == 200:
-            return K8S_MANAGER_URL
-    except:
-        pass
-    
-    # Fallback to localhost for development
-    try:
-        response = requests.get(f"{LOCAL_K8S_URL}/health", timeout=2)
-        if response.status_code == 200:
-            return LOCAL_K8S_URL
-    except:
-        pass
-    
-    return None
+    """Determine which API URL to use (cluster service first, then localhost)"""
+    return upstream.get_url()
+
+# Single upstream update subscription shared by all browser clients
+stream_relay = StreamRelay(get_k8s_api_url, session=http, on_error=upstream.mark_failed)
 
 @app.route('/')
 def index():
@@ -39,53 +44,147 @@ def cluster_view():
     """Cluster visualization page"""
     return render_template('cluster.html')
 
-@app.route('/api/cluster-data')
-def get_cluster_data():
-    """Fetch cluster data from K8s manager"""
+# Headers copied verbatim between browser and manager so compression and revalidation work end to end
+PASSTHROUGH_REQUEST_HEADERS = ('Accept-Encoding', 'If-None-Match', 'If-Modified-Since')
+PASSTHROUGH_RESPONSE_HEADERS = ('Content-Type', 'Content-Encoding', 'Content-Length', 'ETag',
+                                'Cache-Control', 'Last-Modified', 'Expires', 'Vary', 'Age',
+                                'Retry-After')
+PASSTHROUGH_CHUNK_SIZE = 64 * 1024
+
+def proxy_passthrough(method, path, timeout, error_label):
+    """Proxy a manager endpoint, streaming the upstream bytes through undecoded"""
     api_url = get_k8s_api_url()
     if not api_url:
         return jsonify({"error": "K8s manager API not available"}), 503
     
+    headers = {name: request.headers[name] for name in PASSTHROUGH_REQUEST_HEADERS if name in request.headers}
+    # Don't let requests ask for gzip on the browser's behalf; the body is never decoded here
+    headers.setdefault('Accept-Encoding', 'identity')
+    
     try:
-        response = requests.get(f"{api_url}/api/cluster/info", timeout=10)
-        if response.status_code == 200:
-            return jsonify(response.json())
-        else:
-            return jsonify({"error": f"API returned {response.status_code}"}), response.status_code
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        upstream_response = http.request(method, f"{api_url}{path}", params=request.args,
+                                         headers=headers, stream=True, timeout=timeout)
+    except requests.RequestException as e:
+        upstream.mark_failed(api_url)
+        return jsonify({"error": str(e)}), 502
+    
+    content_type = upstream_response.headers.get('Content-Type', '')
+    if upstream_response.status_code >= 400 and not content_type.startswith('application/json'):
+        upstream_response.close()
+        return jsonify({"error": f"{error_label} returned {upstream_response.status_code}"}), upstream_response.status_code
+    
+    response = Response(
+        upstream_response.raw.stream(PASSTHROUGH_CHUNK_SIZE, decode_content=False),
+        status=upstream_response.status_code,
+        headers={name: upstream_response.headers[name]
+                 for name in PASSTHROUGH_RESPONSE_HEADERS if name in upstream_response.headers}
+    )
+    response.call_on_close(upstream_response.close)
+    return response
+
+@app.route('/api/cluster-data')
+def get_cluster_data():
+    """Fetch cluster data from K8s manager"""
+    return proxy_passthrough('GET', '/api/cluster/info', 10, "API")
+
+@app.route('/api/topology')
+def get_topology():
+    """Fetch the grouped cluster topology for the diagram"""
+    return proxy_passthrough('GET', '/api/cluster/topology', 10, "Topology API")
+
+@app.route('/api/search')
+def search_names():
+    """Typeahead search over pod and deployment names"""
+    return proxy_passthrough('GET', '/api/cluster/search', 5, "Search API")
+
+@app.route('/api/fleet-summary')
+def get_fleet_summary():
+    """Totals across every cluster the manager watches"""
+    return proxy_passthrough('GET', '/api/fleet/summary', 10, "Fleet API")
 
 @app.route('/api/cache-stats')
 def get_cache_stats():
     """Fetch cache statistics"""
-    api_url = get_k8s_api_url()
-    if not api_url:
-        return jsonify({"error": "K8s manager API not available"}), 503
-    
-    try:
-        response = requests.get(f"{api_url}/api/cache/stats", timeout=5)
-        if response.status_code == 200:
-            return jsonify(response.json())
-        else:
-            return jsonify({"error": f"Cache API returned {response.status_code}"}), response.status_code
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    return proxy_passthrough('GET', '/api/cache/stats', 5, "Cache API")
 
 @app.route('/api/refresh-cache', methods=['POST'])
 def refresh_cache():
     """Trigger cache refresh"""
+    return proxy_passthrough('POST', '/api/cache/refresh', 5, "Refresh API")
+
+# Dashboard sections and the manager endpoint each one comes from
+DASHBOARD_SECTIONS = {
+    "cluster": "/api/cluster/info",
+    "summary": "/api/cluster/summary",
+    "cacheStats": "/api/cache/stats"
+}
+# Sections returned when the request doesn't name any
+DEFAULT_DASHBOARD_SECTIONS = ("cluster", "cacheStats")
+
+# Shared by all viewers: identical dashboard data is fetched once per TTL
+dashboard_cache = MicroCache(ttl=float(os.getenv("DASHBOARD_CACHE_TTL", "2")))
+dashboard_pool = ThreadPoolExecutor(max_workers=len(DASHBOARD_SECTIONS))
+
+def fetch_section(api_url, path, cluster=None):
+    """Fetch one manager endpoint as raw JSON bytes; errors become an error object"""
+    try:
+        response = http.get(f"{api_url}{path}", params={'cluster': cluster} if cluster else None,
+                            headers={'Accept-Encoding': 'identity'}, timeout=10)
+    except requests.RequestException as e:
+        upstream.mark_failed(api_url)
+        return json.dumps({"error": str(e)}).encode(), False
+    if response.status_code != 200:
+        return json.dumps({"error": f"API returned {response.status_code}"}).encode(), False
+    return response.content, True
+
+def load_dashboard(sections, cluster=None):
+    """Fetch the requested sections concurrently and splice them into one JSON body"""
     api_url = get_k8s_api_url()
     if not api_url:
-        return jsonify({"error": "K8s manager API not available"}), 503
+        return None
+    
+    futures = {name: dashboard_pool.submit(fetch_section, api_url, DASHBOARD_SECTIONS[name], cluster)
+               for name in sections}
+    results = {name: future.result() for name, future in futures.items()}
+    
+    # Upstream bodies are already JSON; splice them in rather than decode and re-encode
+    body = b'{' + b','.join(json.dumps(name).encode() + b':' + results[name][0] for name in sections) + b'}'
+    return body, all(ok for _, ok in results.values())
+
+@app.route('/api/dashboard')
+def get_dashboard():
+    """Cluster data and cache stats in one response, served from a shared micro-cache"""
+    requested = request.args.get('sections')
+    sections = tuple(name for name in DASHBOARD_SECTIONS
+                     if name in requested.split(',')) if requested else DEFAULT_DASHBOARD_SECTIONS
+    if not sections:
+        return jsonify({"error": f"sections must be among: {', '.join(DASHBOARD_SECTIONS)}"}), 400
+    cluster = request.args.get('cluster')
     
     try:
-        response = requests.post(f"{api_url}/api/cache/refresh", timeout=5)
-        if response.status_code == 200:
-            return jsonify(response.json())
-        else:
-            return jsonify({"error": f"Refresh API returned {response.status_code}"}), response.status_code
+        result, state = dashboard_cache.get_or_load(
+            (sections, cluster), lambda: load_dashboard(sections, cluster),
+            cacheable=lambda result: result is not None and result[1]
+        )
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+    
+    if result is None:
+        return jsonify({"error": "K8s manager API not available"}), 503
+    
+    response = Response(result[0], mimetype='application/json')
+    response.headers['X-Cache'] = state.upper()
+    return response
+
+@app.route('/api/stream')
+def stream_updates():
+    """Relay cluster snapshot versions and diffs to the browser (SSE)"""
+    client = stream_relay.subscribe()
+    return Response(
+        stream_relay.stream(client),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 @app.route('/api/health')
 def health_check():
@@ -95,9 +194,12 @@ def health_check():
         "flask_ui": "healthy",
         "timestamp": datetime.now().isoformat(),
         "k8s_manager_available": api_url is not None,
-        "k8s_manager_url": api_url
+        "k8s_manager_url": api_url,
+        "upstream": upstream.get_stats(),
+        "dashboard_cache": dashboard_cache.get_stats(),
+        "stream": stream_relay.get_stats()
     }
     return jsonify(status)
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    app.run(host='0.0.0.0', port=5000, debug=True, threaded=True)
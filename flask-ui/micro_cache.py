@@ -0,0 +1,78 @@
+"""Short-TTL shared cache with request coalescing for upstream calls"""
+
+import threading
+import time
+
+
+class _Flight:
+    """One in-progress load that other callers can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class MicroCache:
+    """Caches loader results for a few seconds and runs at most one load per key.
+
+    Callers arriving while a key is being loaded wait for that load instead of
+    starting their own, so upstream traffic stays at roughly one call per key
+    per TTL no matter how many clients ask.
+    """
+
+    def __init__(self, ttl=2.0):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._flights = {}
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+
+    def get_or_load(self, key, loader, cacheable=lambda value: True):
+        """Return (value, state) where state is 'hit', 'miss' or 'coalesced'"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] > time.monotonic():
+                self._hits += 1
+                return entry[0], 'hit'
+
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+                self._misses += 1
+            else:
+                self._coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error:
+                raise flight.error
+            return flight.value, 'coalesced'
+
+        try:
+            flight.value = loader()
+            if cacheable(flight.value):
+                with self._lock:
+                    self._entries[key] = (flight.value, time.monotonic() + self.ttl)
+            return flight.value, 'miss'
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "ttlSeconds": self.ttl,
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "coalesced": self._coalesced
+            }
@@ -43,6 +43,10 @@ class K8sAPI {
         return this.get('/api/cluster-data');
     }
     
+    async getDashboard(sections = null) {
+        return this.get(sections ? `/api/dashboard?sections=${sections.join(',')}` : '/api/dashboard');
+    }
+    
     async getCacheStats() {
         return this.get('/api/cache-stats');
     }
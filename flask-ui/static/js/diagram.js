@@ -28,43 +28,85 @@ function renderClusterDiagram(data) {
     }
 }
 
-function processClusterData(data) {
-    const namespaces = {};
-    const deployments = {};
+function processClusterData(topology) {
+    // Flatten the manager's topology tree into namespaces with drawable pods.
+    // Collapsed groups and truncated pod lists become aggregate pseudo-pods.
+    const root = topology.root || { children: [] };
     
-    // Group pods by namespace
-    (data.pods || []).forEach(pod => {
-        if (!namespaces[pod.namespace]) {
-            namespaces[pod.namespace] = {
-                name: pod.namespace,
-                type: 'namespace',
-                pods: [],
-                deployments: {}
-            };
-        }
-        namespaces[pod.namespace].pods.push(pod);
-    });
-    
-    // Group deployments by namespace
-    (data.deployments || []).forEach(deployment => {
-        if (!namespaces[deployment.namespace]) {
-            namespaces[deployment.namespace] = {
-                name: deployment.namespace,
-                type: 'namespace',
-                pods: [],
-                deployments: {}
-            };
+    const namespaces = root.children.map(ns => {
+        const namespace = {
+            name: ns.name,
+            type: 'namespace',
+            count: ns.count,
+            deploymentCount: ns.deploymentCount,
+            pods: [],
+            deployments: {}
+        };
+        
+        if (ns.collapsed) {
+            namespace.pods.push(aggregatePod(ns, `${ns.count} pods`, ns.id));
+            return namespace;
         }
-        namespaces[deployment.namespace].deployments[deployment.name] = deployment;
+        
+        ns.children.forEach(child => {
+            if (child.type === 'deployment') {
+                namespace.deployments[child.name] = child;
+                if (child.collapsed) {
+                    namespace.pods.push(aggregatePod(child, child.name, child.id));
+                } else {
+                    child.children.forEach(pod => namespace.pods.push(
+                        pod.type === 'aggregate' ? aggregatePod(pod, pod.name, null) : pod));
+                }
+            } else if (child.type === 'aggregate') {
+                namespace.pods.push(aggregatePod(child, child.name, null));
+            } else {
+                namespace.pods.push(child);
+            }
+        });
+        return namespace;
     });
     
     return {
-        namespaces: Object.values(namespaces),
-        totalPods: data.podCount || 0,
-        totalDeployments: data.deploymentCount || 0
+        namespaces: namespaces,
+        totalPods: topology.totalPods || 0,
+        totalDeployments: topology.totalDeployments || 0
     };
 }
 
+function aggregatePod(node, name, expandId) {
+    return {
+        name: name,
+        namespace: node.namespace || node.name,
+        status: 'Aggregate',
+        aggregate: true,
+        count: node.count,
+        phases: node.phases || {},
+        expandId: expandId
+    };
+}
+
+function formatPhases(phases) {
+    return Object.entries(phases)
+        .map(([phase, count]) => `${phase}: ${count}`)
+        .join('<br/>');
+}
+
+function podTooltip(pod) {
+    if (pod.aggregate) {
+        return `
+            <strong>${pod.name}</strong><br/>
+            ${pod.count} pods${pod.expandId ? ' (click to expand)' : ''}<br/>
+            ${formatPhases(pod.phases)}
+        `;
+    }
+    return `
+        <strong>${pod.name}</strong><br/>
+        Status: ${pod.status}<br/>
+        Namespace: ${pod.namespace}<br/>
+        Created: ${formatTimestamp(pod.creationTimestamp)}
+    `;
+}
+
 function renderHierarchicalLayout(svg, data, width, height, tooltip) {
     const margin = { top: 20, right: 20, bottom: 20, left: 20 };
     const innerWidth = width - margin.left - margin.right;
@@ -100,12 +142,11 @@ function renderHierarchicalLayout(svg, data, width, height, tooltip) {
             .text(`Namespace: ${namespace.name}`);
         
         // Deployment info
-        const deploymentCount = Object.keys(namespace.deployments).length;
         nsGroup.append("text")
             .attr("class", "cluster-text subtitle")
             .attr("x", 20)
             .attr("y", nsY + 35)
-            .text(`Deployments: ${deploymentCount}, Pods: ${namespace.pods.length}`);
+            .text(`Deployments: ${namespace.deploymentCount}, Pods: ${namespace.count}`);
         
         // Draw pods
         const podStartX = 30;
@@ -135,12 +176,7 @@ function renderHierarchicalLayout(svg, data, width, height, tooltip) {
                     tooltip.transition()
                         .duration(200)
                         .style("opacity", .9);
-                    tooltip.html(`
-                        <strong>${pod.name}</strong><br/>
-                        Status: ${pod.status}<br/>
-                        Namespace: ${pod.namespace}<br/>
-                        Created: ${formatTimestamp(pod.creationTimestamp)}
-                    `)
+                    tooltip.html(podTooltip(pod))
                         .style("left", (event.pageX + 10) + "px")
                         .style("top", (event.pageY - 28) + "px");
                 })
@@ -148,6 +184,11 @@ function renderHierarchicalLayout(svg, data, width, height, tooltip) {
                     tooltip.transition()
                         .duration(500)
                         .style("opacity", 0);
+                })
+                .on("click", function() {
+                    if (pod.expandId) {
+                        expandNode(pod.expandId);
+                    }
                 });
             
             // Pod name (truncated)
@@ -165,7 +206,7 @@ function renderHierarchicalLayout(svg, data, width, height, tooltip) {
                 .attr("class", "cluster-text subtitle")
                 .attr("x", podX + podWidth/2)
                 .attr("y", podY + podHeight/2 + 8)
-                .text(pod.status);
+                .text(pod.aggregate ? `${pod.count} pods` : pod.status);
         });
     });
     
@@ -206,7 +247,7 @@ function renderForceLayout(svg, data, width, height, tooltip) {
         
         // Add pod nodes
         namespace.pods.forEach((pod, index) => {
-            const podId = `pod-${pod.name}`;
+            const podId = pod.aggregate ? `agg-${namespace.name}-${index}` : `pod-${pod.name}`;
             nodes.push({
                 id: podId,
                 name: pod.name,
@@ -258,7 +299,9 @@ function renderForceLayout(svg, data, width, height, tooltip) {
                     .style("opacity", .9);
                 
                 let content = `<strong>${d.name}</strong><br/>Type: ${d.type}`;
-                if (d.data.status) {
+                if (d.data.aggregate) {
+                    content = podTooltip(d.data);
+                } else if (d.data.status) {
                     content += `<br/>Status: ${d.data.status}`;
                 }
                 if (d.data.creationTimestamp) {
@@ -274,6 +317,11 @@ function renderForceLayout(svg, data, width, height, tooltip) {
             tooltip.transition()
                 .duration(500)
                 .style("opacity", 0);
+        })
+        .on("click", function(event, d) {
+            if (d.data && d.data.expandId) {
+                expandNode(d.data.expandId);
+            }
         });
     
     // Add labels
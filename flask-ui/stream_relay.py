@@ -0,0 +1,170 @@
+"""Relay the K8s manager update stream to many browser clients"""
+
+import json
+import queue
+import threading
+import time
+
+import requests
+
+HEARTBEAT_FRAME = ": heartbeat\n\n"
+
+
+def format_sse(event, data, event_id=None):
+    """Format a Server-Sent Events frame"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+class RelayClient:
+    """A browser connection with a bounded send queue"""
+
+    def __init__(self, max_queue_size):
+        self.queue = queue.Queue(maxsize=max_queue_size)
+        self.evicted = False
+
+    def offer(self, frame):
+        if self.evicted:
+            return False
+        try:
+            self.queue.put_nowait(frame)
+            return True
+        except queue.Full:
+            self.evicted = True
+            return False
+
+
+class StreamRelay:
+    """Holds one upstream SSE subscription and fans frames out to browsers"""
+
+    def __init__(self, url_provider, max_queue_size=32, heartbeat_seconds=15,
+                 reconnect_seconds=3, session=None, on_error=None):
+        self.url_provider = url_provider
+        self.session = session or requests.Session()
+        self.on_error = on_error
+        self.max_queue_size = max_queue_size
+        self.heartbeat_seconds = heartbeat_seconds
+        self.reconnect_seconds = reconnect_seconds
+        self._lock = threading.Lock()
+        self._clients = []
+        self._thread = None
+        self._upstream_connected = False
+        self._latest_version = None
+        self._frames_relayed = 0
+        self._clients_evicted = 0
+
+    def ensure_started(self):
+        """Start the upstream subscription on first use"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run_upstream, daemon=True)
+            self._thread.start()
+
+    def subscribe(self):
+        self.ensure_started()
+        client = RelayClient(self.max_queue_size)
+        with self._lock:
+            self._clients.append(client)
+        return client
+
+    def unsubscribe(self, client):
+        with self._lock:
+            if client in self._clients:
+                self._clients.remove(client)
+
+    def stream(self, client):
+        """Generate frames for a browser, starting with the latest known version"""
+        try:
+            yield "retry: 3000\n\n"
+            if self._latest_version is not None:
+                yield format_sse("snapshot", {"version": self._latest_version},
+                                 event_id=self._latest_version)
+
+            while not client.evicted:
+                try:
+                    yield client.queue.get(timeout=self.heartbeat_seconds)
+                except queue.Empty:
+                    yield HEARTBEAT_FRAME
+
+            yield format_sse("evicted", {"reason": "client too slow"})
+        finally:
+            self.unsubscribe(client)
+
+    def _broadcast(self, frame):
+        with self._lock:
+            clients = list(self._clients)
+
+        evicted = [client for client in clients if not client.offer(frame)]
+
+        with self._lock:
+            self._frames_relayed += 1
+            for client in evicted:
+                if client in self._clients:
+                    self._clients.remove(client)
+                    self._clients_evicted += 1
+
+    def _run_upstream(self):
+        """Read the manager stream forever, reconnecting on failure"""
+        while True:
+            api_url = self.url_provider()
+            if not api_url:
+                time.sleep(self.reconnect_seconds)
+                continue
+
+            try:
+                with self.session.get(f"{api_url}/api/stream/updates", stream=True,
+                                  timeout=(5, self.heartbeat_seconds * 3)) as response:
+                    response.raise_for_status()
+                    self._upstream_connected = True
+                    self._relay_frames(response)
+            except requests.ConnectionError as e:
+                print(f"Upstream stream error: {e}")
+                if self.on_error:
+                    self.on_error(api_url)
+            except Exception as e:
+                print(f"Upstream stream error: {e}")
+            finally:
+                self._upstream_connected = False
+
+            time.sleep(self.reconnect_seconds)
+
+    def _relay_frames(self, response):
+        """Split the upstream byte stream into SSE frames and relay them verbatim"""
+        frame_lines = []
+        for line in response.iter_lines(decode_unicode=True):
+            if line:
+                frame_lines.append(line)
+                continue
+            if not frame_lines:
+                continue
+
+            frame = "\n".join(frame_lines) + "\n\n"
+            event_id = None
+            for frame_line in frame_lines:
+                if frame_line.startswith("id:"):
+                    event_id = frame_line[3:].strip()
+            frame_lines = []
+
+            # Upstream heartbeats, retry hints and evictions are handled locally
+            if frame.startswith(":") or frame.startswith("retry:"):
+                continue
+            if "event: evicted\n" in frame:
+                continue
+            if event_id is not None:
+                self._latest_version = int(event_id)
+            self._broadcast(frame)
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "clients": len(self._clients),
+                "upstreamConnected": self._upstream_connected,
+                "latestVersion": self._latest_version,
+                "framesRelayed": self._frames_relayed,
+                "clientsEvicted": self._clients_evicted
+            }
@@ -0,0 +1,121 @@
+"""Upstream K8s manager discovery and pooled HTTP connections for the UI proxy"""
+
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def create_session(pool_size=32):
+    """Create a requests session with a shared keep-alive connection pool"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class UpstreamSelector:
+    """Picks the first healthy upstream in priority order and caches the choice.
+
+    A background thread re-probes every check_interval seconds (failing back to
+    a higher-priority upstream when it recovers). Request handlers read the
+    cached choice and only probe inline when it has expired; mark_failed()
+    drops the choice so the next caller fails over.
+    """
+
+    def __init__(self, candidates, session, check_interval=10, ttl=30, probe_timeout=2):
+        self.candidates = list(candidates)
+        self.session = session
+        self.check_interval = check_interval
+        self.ttl = ttl
+        self.probe_timeout = probe_timeout
+        self._lock = threading.Lock()
+        self._probe_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._url = None
+        self._chosen_at = 0
+        self._checked_at = None
+        self._thread = None
+        self._failovers = 0
+
+    def get_url(self):
+        """Return the cached upstream URL, probing only if the cache has expired"""
+        self._ensure_started()
+        with self._lock:
+            now = time.monotonic()
+            if self._url and now - self._chosen_at < self.ttl:
+                return self._url
+            # Nothing healthy on the last probe: don't re-probe on every request
+            if (self._url is None and self._checked_at is not None and not self._wake.is_set()
+                    and now - self._checked_at < self.check_interval):
+                return None
+        return self.refresh()
+
+    def refresh(self, force=False):
+        """Probe candidates and cache the first healthy one"""
+        # Concurrent callers wait for one probe instead of each probing
+        with self._probe_lock:
+            if not force:
+                with self._lock:
+                    # Another caller may have refreshed while we waited
+                    if self._url and time.monotonic() - self._chosen_at < self.ttl:
+                        return self._url
+
+            chosen = None
+            for url in self.candidates:
+                if self._is_healthy(url):
+                    chosen = url
+                    break
+
+            with self._lock:
+                if chosen != self._url and self._url is not None:
+                    self._failovers += 1
+                self._url = chosen
+                self._checked_at = time.monotonic()
+                self._chosen_at = self._checked_at if chosen else 0
+                self._wake.clear()
+            return chosen
+
+    def mark_failed(self, url):
+        """Drop a failing upstream so the next request fails over"""
+        with self._lock:
+            if self._url == url:
+                self._url = None
+                self._chosen_at = 0
+        self._wake.set()
+
+    def _is_healthy(self, url):
+        try:
+            response = self.session.get(f"{url}/health", timeout=self.probe_timeout)
+            return response.status_code == 200
+        except requests.RequestException:
+            return False
+
+    def _ensure_started(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh(force=True)
+            except Exception as e:
+                print(f"Upstream health check error: {e}")
+            # Sleep until the next check, or until a request reports a failure
+            self._wake.wait(self.check_interval)
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "url": self._url,
+                "ageSeconds": round(time.monotonic() - self._chosen_at, 1) if self._url else None,
+                "candidates": self.candidates,
+                "failovers": self._failovers
+            }
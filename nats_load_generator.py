@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""
+NATS Load Generator - simulate many apps on NATS and measure end-to-end latency
+Finds how many app.status publishers / k8s.events subscribers the system handles
+before publish -> receive latency collapses.
+
+Modes:
+  status  N simulated app instances each publish app.status heartbeats (shaped
+          like the python-apps runtime's) at --rate msgs/s; --subscribers
+          manager-style subscribers receive them.
+  events  One manager-style publisher sends k8s.events at --rate msgs/s to N
+          apps, each a real NatsConsumer (python-apps/common) in its own queue
+          group with --replicas replicas, so the handler pool is measured too.
+
+Every message carries the time it was scheduled and the time it was sent.
+Latency is reported from both: "latencyMs" (sent -> received) and
+"latencyFromScheduleMs" (scheduled -> received), which also counts time a
+publisher fell behind its schedule and so doesn't hide overload.
+
+The broker is a stand-in server (nats_standin_server.py, default) or a local
+nats-server binary, each started in its own process on a free port, or an
+existing server given with --server. Runs are seeded (send phases) and the
+report records the full configuration and environment. Publishers and
+subscribers share this process, so on one machine the largest steps measure
+the generator's CPU as much as the broker's; use --server with the generator
+and broker on separate hosts to push further.
+
+Usage:
+  python nats_load_generator.py --mode status --apps 10,100,1000 --rate 1 --output status.json
+  python nats_load_generator.py --mode events --apps 3,30,300 --rate 200 --output events.json
+  python nats_load_generator.py --broker nats-server ...
+  python nats_load_generator.py --server nats://localhost:4222 ...
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import time
+from array import array
+from datetime import datetime, timezone
+
+import nats
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "python-apps"))
+
+from common.consumer import NatsConsumer
+
+STANDIN_SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "nats_standin_server.py")
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def percentiles(values):
+    """Latency summary in ms; None when nothing was measured"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    pick = lambda q: ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered), 3),
+        "p50": round(pick(0.50), 3),
+        "p90": round(pick(0.90), 3),
+        "p99": round(pick(0.99), 3),
+        "p999": round(pick(0.999), 3),
+        "max": round(ordered[-1], 3)
+    }
+
+class LocalBroker:
+    """A broker process started for the run: the stand-in server or a local nats-server"""
+
+    def __init__(self, kind, binary="nats-server"):
+        self.kind = kind
+        self.binary = binary
+        self.process = None
+        self.url = None
+        self.version = None
+
+    async def start(self):
+        port = free_port()
+        if self.kind == "standin":
+            command = [sys.executable, STANDIN_SERVER, "--port", str(port)]
+            self.version = "standin"
+        else:
+            path = shutil.which(self.binary)
+            if not path:
+                raise RuntimeError(f"{self.binary} not found on PATH (use --broker standin or --server)")
+            command = [path, "-a", "127.0.0.1", "-p", str(port)]
+            self.version = subprocess.run([path, "--version"], capture_output=True,
+                                          text=True).stdout.strip()
+        self.process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self.url = f"nats://127.0.0.1:{port}"
+
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                _, writer = await asyncio.open_connection("127.0.0.1", port)
+                writer.close()
+                return self
+            except OSError:
+                if self.process.poll() is not None or time.monotonic() > deadline:
+                    self.stop()
+                    raise RuntimeError(f"{self.kind} broker did not start on port {port}")
+                await asyncio.sleep(0.05)
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+class LatencyRecorder:
+    """Receive-side counters and latencies for messages sent after the warmup"""
+
+    def __init__(self):
+        self.measure_from_ns = None
+        self.received = 0
+        self.latencies = array("d")
+        self.from_schedule = array("d")
+        self.done = asyncio.Event()
+        self.expected = None
+
+    def record(self, data):
+        now = time.time_ns()
+        self.received += 1
+        sent = data.get("sentNs")
+        if sent is not None and self.measure_from_ns is not None and sent >= self.measure_from_ns:
+            self.latencies.append((now - sent) / 1e6)
+            self.from_schedule.append((now - data["scheduledNs"]) / 1e6)
+        if self.expected is not None and self.received >= self.expected:
+            self.done.set()
+
+class NatsLoadGenerator:
+    def __init__(self, nats_url, seed=0, connections=64, drain_seconds=10):
+        self.nats_url = nats_url
+        self.seed = seed
+        self.connections = connections
+        self.drain_seconds = drain_seconds
+        self.errors = {}
+
+    async def connect(self):
+        async def error_cb(e):
+            name = type(e).__name__
+            self.errors[name] = self.errors.get(name, 0) + 1
+        return await nats.connect(servers=[self.nats_url], error_cb=error_cb,
+                                  max_reconnect_attempts=0)
+
+    async def _publish_loop(self, nc, subject, make_message, rate, phase, clock, counters):
+        """Publish on a fixed schedule: phase + k / rate seconds after the start"""
+        loop = asyncio.get_running_loop()
+        start_loop, start_ns, duration = clock
+        k = 0
+        while True:
+            offset = phase + k / rate
+            if offset >= duration:
+                return
+            delay = start_loop + offset - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                # Behind schedule: still let the other publishers and receivers run
+                await asyncio.sleep(0)
+            message = make_message(k)
+            message["scheduledNs"] = start_ns + int(offset * 1e9)
+            message["sentNs"] = time.time_ns()
+            await nc.publish(subject, json.dumps(message).encode())
+            counters["published"] += 1
+            if message["sentNs"] >= counters["measureFromNs"]:
+                counters["measured"] += 1
+            k += 1
+
+    async def _drive(self, publishers, recorder, fanout, duration, warmup):
+        """Run publishers (connection, subject, make_message, rate, phase) and wait for delivery"""
+        counters = {"published": 0, "measured": 0}
+        loop = asyncio.get_running_loop()
+        clock = (loop.time() + 0.1, time.time_ns() + 100_000_000, duration)
+        counters["measureFromNs"] = recorder.measure_from_ns = clock[1] + int(warmup * 1e9)
+
+        started = time.perf_counter()
+        await asyncio.gather(*[self._publish_loop(nc, subject, make_message, rate, phase, clock, counters)
+                               for nc, subject, make_message, rate, phase in publishers])
+        publish_seconds = time.perf_counter() - started
+        for nc in {p[0] for p in publishers}:
+            await nc.flush()
+
+        recorder.expected = counters["published"] * fanout
+        if recorder.received < recorder.expected:
+            try:
+                await asyncio.wait_for(recorder.done.wait(), timeout=self.drain_seconds)
+            except asyncio.TimeoutError:
+                pass
+        return counters, publish_seconds
+
+    def _result(self, scenario, counters, recorder, fanout, duration, warmup, publish_seconds):
+        window = max(duration - warmup, 1e-9)
+        delivered_target = counters["published"] * fanout
+        return dict(scenario, **{
+            "published": counters["published"],
+            "expected": delivered_target,
+            "delivered": recorder.received,
+            "lost": max(delivered_target - recorder.received, 0),
+            "publishSeconds": round(publish_seconds, 3),
+            "publishRate": round(counters["measured"] / window, 1),
+            "deliveryRate": round(len(recorder.latencies) / window, 1),
+            "latencyMs": percentiles(recorder.latencies),
+            "latencyFromScheduleMs": percentiles(recorder.from_schedule),
+            "clientErrors": dict(self.errors)
+        })
+
+    async def run_status(self, apps, rate, subscribers, duration, warmup, payload_bytes):
+        """N app instances heartbeat on app.status; manager-style subscribers receive them"""
+        self.errors = {}
+        rng = random.Random(self.seed)
+        recorder = LatencyRecorder()
+
+        async def receive(msg):
+            recorder.record(json.loads(msg.data))
+
+        receivers = [await self.connect() for _ in range(subscribers)]
+        for nc in receivers:
+            await nc.subscribe("app.status", cb=receive)
+            await nc.flush()
+
+        senders = [await self.connect() for _ in range(min(apps, self.connections))]
+        padding = "x" * payload_bytes
+        publishers = []
+        for i in range(apps):
+            # Status shaped by the python-apps runtime itself; instances named like pods
+            app = NatsConsumer(f"app{i % 3 + 1}", nats_url=self.nats_url, status_interval=3600)
+            app.subscribe("k8s.events", None)
+            app.instance = f"{app.app_name}-loadgen-{i:05d}"
+            app.namespace = "loadgen"
+
+            def make_message(seq, app=app):
+                message = app.status()
+                message["seq"] = seq
+                if padding:
+                    message["padding"] = padding
+                return message
+            publishers.append((senders[i % len(senders)], "app.status", make_message, rate,
+                               rng.random() / rate))
+
+        counters, publish_seconds = await self._drive(publishers, recorder, subscribers, duration, warmup)
+        for nc in senders + receivers:
+            await nc.close()
+
+        scenario = {"mode": "status", "apps": apps, "ratePerApp": rate, "targetRate": apps * rate,
+                    "subscribers": subscribers, "connections": len(senders)}
+        return self._result(scenario, counters, recorder, subscribers, duration, warmup, publish_seconds)
+
+    async def run_events(self, apps, rate, replicas, handlers, duration, warmup, payload_bytes):
+        """A manager-style publisher sends k8s.events to N apps running the shared consumer runtime"""
+        self.errors = {}
+        rng = random.Random(self.seed)
+        recorder = LatencyRecorder()
+
+        async def handle(subject, data):
+            recorder.record(data)
+
+        consumers = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i in range(apps):
+                for _ in range(replicas):
+                    consumer = NatsConsumer(f"loadgen-app{i}", nats_url=self.nats_url,
+                                            concurrency=handlers, status_interval=3600,
+                                            connect=self.connect)
+                    consumer.subscribe("k8s.events", handle)
+                    await consumer.start()
+                    consumers.append(consumer)
+            for consumer in consumers:
+                await consumer.nc.flush()
+
+        publisher = await self.connect()
+        padding = "x" * payload_bytes
+
+        def make_message(seq):
+            message = {
+                "action": "cluster_info_accessed",
+                "source": "nats-load-generator",
+                "cluster": "loadgen",
+                "timestamp": int(time.time() * 1000),
+                "podCount": seq % 500,
+                "fromCache": True,
+                "seq": seq
+            }
+            if padding:
+                message["padding"] = padding
+            return message
+
+        publishers = [(publisher, "k8s.events", make_message, rate, rng.random() / rate)]
+        counters, publish_seconds = await self._drive(publishers, recorder, apps, duration, warmup)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            for consumer in consumers:
+                await consumer.stop()
+        await publisher.close()
+
+        scenario = {"mode": "events", "apps": apps, "replicas": replicas, "handlers": handlers,
+                    "targetRate": rate, "targetDeliveryRate": rate * apps}
+        return self._result(scenario, counters, recorder, apps, duration, warmup, publish_seconds)
+
+def within_slo(result, slo_ms, min_delivery):
+    """A step holds up if nothing was lost, delivery kept pace and p99 stayed under the SLO"""
+    latency = result["latencyFromScheduleMs"]
+    target = result.get("targetDeliveryRate", result["targetRate"] * result.get("subscribers", 1))
+    return (latency is not None and latency["p99"] <= slo_ms and result["lost"] == 0
+            and result["deliveryRate"] >= min_delivery * target)
+
+async def run(args):
+    broker = None
+    if args.server:
+        url, broker_name, broker_version = args.server, "external", None
+    else:
+        broker = await LocalBroker(args.broker, args.nats_server_bin).start()
+        url, broker_name, broker_version = broker.url, args.broker, broker.version
+
+    generator = NatsLoadGenerator(url, seed=args.seed, connections=args.connections,
+                                  drain_seconds=args.drain)
+    steps = []
+    try:
+        for apps in [int(a) for a in args.apps.split(",")]:
+            if args.mode == "status":
+                result = await generator.run_status(apps, args.rate, args.subscribers, args.duration,
+                                                    args.warmup, args.payload_bytes)
+            else:
+                result = await generator.run_events(apps, args.rate, args.replicas, args.handlers,
+                                                    args.duration, args.warmup, args.payload_bytes)
+            result["withinSlo"] = within_slo(result, args.slo_ms, args.min_delivery)
+            steps.append(result)
+            latency = result["latencyFromScheduleMs"] or {}
+            print(f"{args.mode} apps={apps}: delivered {result['delivered']}/{result['expected']} "
+                  f"p50={latency.get('p50')}ms p99={latency.get('p99')}ms lost={result['lost']} "
+                  f"{'ok' if result['withinSlo'] else 'OVER SLO'}", file=sys.stderr)
+    finally:
+        if broker:
+            broker.stop()
+
+    passing = [step["apps"] for step in steps if step["withinSlo"]]
+    failing = [step["apps"] for step in steps if not step["withinSlo"]]
+    return {
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "broker": {"kind": broker_name, "url": url, "version": broker_version},
+        "steps": steps,
+        "maxAppsWithinSlo": max(passing) if passing else None,
+        "firstAppsOverSlo": min(failing) if failing else None,
+        "environment": {
+            "python": sys.version.split()[0],
+            "natsPy": getattr(nats, "__version__", None),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count()
+        },
+        "startedAt": datetime.now(timezone.utc).isoformat()
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="NATS load generator and end-to-end latency benchmark")
+    parser.add_argument("--mode", choices=["status", "events"], default="status")
+    parser.add_argument("--apps", default="10,100,1000", help="comma separated app counts to step through")
+    parser.add_argument("--rate", type=float, default=1.0,
+                        help="msgs/s per app (status) or of the publisher (events)")
+    parser.add_argument("--subscribers", type=int, default=1, help="app.status subscribers (status mode)")
+    parser.add_argument("--replicas", type=int, default=1, help="replicas per app (events mode)")
+    parser.add_argument("--handlers", type=int, default=16, help="handler pool size per replica (events mode)")
+    parser.add_argument("--duration", type=float, default=10, help="seconds of publishing per step")
+    parser.add_argument("--warmup", type=float, default=2, help="seconds excluded from the latency figures")
+    parser.add_argument("--drain", type=float, default=10, help="seconds to wait for delivery after publishing")
+    parser.add_argument("--payload-bytes", type=int, default=0, help="padding added to every message")
+    parser.add_argument("--connections", type=int, default=64, help="publisher connections shared by the apps")
+    parser.add_argument("--slo-ms", type=float, default=100, help="p99 latency a step must stay under")
+    parser.add_argument("--min-delivery", type=float, default=0.95,
+                        help="fraction of the target rate a step must deliver")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--broker", choices=["standin", "nats-server"], default="standin",
+                        help="broker to start locally when --server is not given")
+    parser.add_argument("--nats-server-bin", default="nats-server")
+    parser.add_argument("--server", help="use an existing NATS server instead of starting one")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+if __name__ == "__main__":
+    main()
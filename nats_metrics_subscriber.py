@@ -2,13 +2,36 @@
 """
 NATS Metrics Subscriber - Listen to k8s.metrics messages
 Run this to see real-time metrics published by the Java K8s manager
+
+Without arguments it asks what to subscribe to and prints every message.
+--aggregate runs headless instead: messages on the given (wildcard) subjects
+are counted per subject and source into fixed windows, and each window is
+written to stdout in one batch (rates, lag percentiles and min/max, message
+sizes) and, with --store, appended to an on-disk store that --query reads
+back. Source is the message's "source" (or "app") field and lag is receive
+time minus its epoch "timestamp"; both are pulled from the raw bytes so the
+aggregator does not parse JSON per message.
+
+Usage:
+  python nats_metrics_subscriber.py
+  python nats_metrics_subscriber.py --aggregate --subjects 'k8s.>' 'app.>' --window 10 --store metrics-store
+  python nats_metrics_subscriber.py --query metrics-store --since 3600 --subject 'k8s.*'
 """
 
+import argparse
 import asyncio
+import math
+import mmap
 import nats
 import json
+import os
+import random
+import re
 import signal
+import struct
 import sys
+import time
+from array import array
 from datetime import datetime
 
 class NatsMetricsSubscriber:
@@ -109,9 +132,368 @@ class NatsMetricsSubscriber:
             await self.nc.close()
             print("\nNATS connection closed")
 
-async def main():
+    async def aggregate(self, subjects, aggregator):
+        """Feed every message on subjects into the aggregator, closing a window every window_seconds"""
+        async def on_message(msg):
+            record(msg.subject, msg.data)
+
+        record = aggregator.record
+        for subject in subjects:
+            await self.nc.subscribe(subject, cb=on_message,
+                                    pending_msgs_limit=AGGREGATE_PENDING_MSGS,
+                                    pending_bytes_limit=AGGREGATE_PENDING_BYTES)
+        print(f"Aggregating {', '.join(subjects)} every {aggregator.window_seconds:g}s", file=sys.stderr)
+
+        # Windows line up with wall-clock multiples of the window length
+        while self.running:
+            now = time.time()
+            boundary = (math.floor(now / aggregator.window_seconds) + 1) * aggregator.window_seconds
+            while self.running and time.time() < boundary:
+                await asyncio.sleep(min(0.5, max(boundary - time.time(), 0)))
+            aggregator.flush()
+
+# Read straight from the raw message bytes so the hot path never parses JSON
+SOURCE_FIELD = re.compile(rb'"(?:source|app)"\s*:\s*"([^"]*)"')
+TIMESTAMP_FIELD = re.compile(rb'"timestamp"\s*:\s*(-?\d+(?:\.\d+)?)')
+SIZE_UNSET = 1 << 32
+
+AGGREGATE_PENDING_MSGS = 1024 * 1024
+AGGREGATE_PENDING_BYTES = 256 * 1024 * 1024
+
+def subject_matches(pattern, subject):
+    """NATS subject matching: '*' matches one token, '>' one or more trailing tokens"""
+    pattern_tokens = pattern.split(".")
+    subject_tokens = subject.split(".")
+    for i, token in enumerate(pattern_tokens):
+        if token == ">":
+            return len(subject_tokens) > i
+        if i >= len(subject_tokens) or (token != "*" and token != subject_tokens[i]):
+            return False
+    return len(pattern_tokens) == len(subject_tokens)
+
+def _percentile(ordered, q):
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+class WindowStats:
+    """Counters and a bounded lag sample for one subject/source in one window"""
+
+    __slots__ = ("count", "bytes", "size_min", "size_max", "lags", "lag_seen", "lag_min", "lag_max")
+
+    def __init__(self):
+        self.count = 0
+        self.bytes = 0
+        self.size_min = SIZE_UNSET
+        self.size_max = 0
+        self.lags = array("d")
+        self.lag_seen = 0
+        self.lag_min = math.inf
+        self.lag_max = -math.inf
+
+class MetricsStore:
+    """Append-only store of window rows in fixed-size binary records.
+
+    <dir>/windows.bin  16-byte header (magic, record size) followed by one
+                       record per subject/source per window, in time order, so
+                       readers mmap it and binary search on the window start.
+    <dir>/keys.jsonl   subject/source for each key id, appended as keys appear.
+
+    A record or key line cut short by a crash is cut off when the store is
+    opened, so appends start on a record (and line) boundary again.
+    """
+
+    MAGIC = b"NATSWIN1"
+    HEADER = struct.Struct("<8sII")
+    # start, seconds, key id, count, bytes, rate, lag min/p50/p90/p99/max (ms, NaN if none), size min/max
+    RECORD = struct.Struct("<dfIQQ6dII")
+
+    def __init__(self, path):
+        self.path = path
+        self.windows_path = os.path.join(path, "windows.bin")
+        self.keys_path = os.path.join(path, "keys.jsonl")
+        self.keys = {}
+        self.names = {}
+        self._next_id = 0
+        os.makedirs(path, exist_ok=True)
+        if os.path.exists(self.keys_path):
+            self._load_keys()
+        if not os.path.exists(self.windows_path) or os.path.getsize(self.windows_path) == 0:
+            with open(self.windows_path, "wb") as f:
+                f.write(self.HEADER.pack(self.MAGIC, self.RECORD.size, 0))
+        else:
+            with open(self.windows_path, "r+b") as f:
+                header = f.read(self.HEADER.size)
+                if len(header) < self.HEADER.size:
+                    raise ValueError(f"{self.windows_path} is not a metrics store this version can read")
+                magic, record_size, _ = self.HEADER.unpack(header)
+                if magic != self.MAGIC or record_size != self.RECORD.size:
+                    raise ValueError(f"{self.windows_path} is not a metrics store this version can read")
+                size = f.seek(0, os.SEEK_END)
+                whole = self.HEADER.size + (size - self.HEADER.size) // record_size * record_size
+                if whole != size:
+                    f.truncate(whole)
+
+    def _load_keys(self):
+        """Read key ids, dropping a torn last line so the next append starts a fresh line"""
+        with open(self.keys_path, "r+b") as f:
+            offset = 0
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Cut short by a crash; its records were never written
+                    f.truncate(offset)
+                    break
+                offset += len(line)
+                try:
+                    key = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                self.keys[(key["subject"], key["source"])] = key["id"]
+                self.names[key["id"]] = (key["subject"], key["source"])
+                # Ids after a corrupt line are still taken
+                self._next_id = max(self._next_id, key["id"] + 1)
+
+    def _key_id(self, subject, source, new_keys):
+        key_id = self.keys.get((subject, source))
+        if key_id is None:
+            key_id = self.keys[(subject, source)] = self._next_id
+            self._next_id += 1
+            self.names[key_id] = (subject, source)
+            new_keys.append(json.dumps({"id": key_id, "subject": subject, "source": source}) + "\n")
+        return key_id
+
+    def append(self, start, seconds, rows):
+        """Append one window's rows"""
+        new_keys = []
+        records = []
+        for row in rows:
+            lag = row["lagMs"] or {}
+            records.append(self.RECORD.pack(
+                start, seconds, self._key_id(row["subject"], row["source"], new_keys),
+                row["count"], row["bytes"], row["rate"],
+                *(lag.get(name, math.nan) for name in ("min", "p50", "p90", "p99", "max")),
+                row["sizeMin"], row["sizeMax"]))
+        # Keys first, so every stored record's key id can be resolved
+        if new_keys:
+            with open(self.keys_path, "a") as f:
+                f.writelines(new_keys)
+        with open(self.windows_path, "ab") as f:
+            f.write(b"".join(records))
+
+    def query(self, since=None, until=None, subject=None, source=None):
+        """Rows for windows starting in [since, until), optionally filtered by subject pattern and source"""
+        size = os.path.getsize(self.windows_path)
+        if size <= self.HEADER.size:
+            return []
+        record = self.RECORD
+        rows = []
+        with open(self.windows_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            count = (len(m) - self.HEADER.size) // record.size
+            start_at = lambda i: record.unpack_from(m, self.HEADER.size + i * record.size)[0]
+            low, high = 0, count
+            if since is not None:
+                while low < high:
+                    middle = (low + high) // 2
+                    if start_at(middle) < since:
+                        low = middle + 1
+                    else:
+                        high = middle
+            for i in range(low, count):
+                values = record.unpack_from(m, self.HEADER.size + i * record.size)
+                if until is not None and values[0] >= until:
+                    break
+                key_subject, key_source = self.names.get(values[2], ("?", "?"))
+                if subject and not subject_matches(subject, key_subject):
+                    continue
+                if source is not None and key_source != source:
+                    continue
+                lags = values[6:11]
+                rows.append({
+                    "windowStart": values[0],
+                    "windowSeconds": round(values[1], 3),
+                    "subject": key_subject,
+                    "source": key_source,
+                    "count": values[3],
+                    "bytes": values[4],
+                    "rate": values[5],
+                    "lagMs": None if math.isnan(lags[0]) else dict(zip(("min", "p50", "p90", "p99", "max"), lags)),
+                    "sizeMin": values[11],
+                    "sizeMax": values[12]
+                })
+        return rows
+
+class MetricsAggregator:
+    """Windowed per subject/source statistics with one batched write per window"""
+
+    def __init__(self, window_seconds=10, max_samples=20000, store=None, output_format="text",
+                 top=20, stream=None, seed=0):
+        self.window_seconds = window_seconds
+        self.max_samples = max_samples
+        self.store = store
+        self.output_format = output_format
+        self.top = top
+        self.stream = stream or sys.stdout
+        self.dropped = 0
+        self.windows = 0
+        self._random = random.Random(seed)
+        self._window = {}
+        self._window_start = time.time()
+
+    def record(self, subject, data, now=None):
+        """Count one raw message; O(1), no JSON parsing"""
+        now = time.time() if now is None else now
+        match = SOURCE_FIELD.search(data)
+        key = (subject, match.group(1) if match else b"")
+        stats = self._window.get(key)
+        if stats is None:
+            stats = self._window[key] = WindowStats()
+        size = len(data)
+        stats.count += 1
+        stats.bytes += size
+        if size < stats.size_min:
+            stats.size_min = size
+        if size > stats.size_max:
+            stats.size_max = size
+
+        match = TIMESTAMP_FIELD.search(data)
+        if match:
+            timestamp = float(match.group(1))
+            # Epoch milliseconds, or seconds from senders that use them
+            lag = now * 1000 - (timestamp * 1000 if timestamp < 1e11 else timestamp)
+            if lag < stats.lag_min:
+                stats.lag_min = lag
+            if lag > stats.lag_max:
+                stats.lag_max = lag
+            stats.lag_seen += 1
+            if len(stats.lags) < self.max_samples:
+                stats.lags.append(lag)
+            else:
+                # Reservoir sample keeps percentiles bounded in memory at any rate
+                slot = self._random.randrange(stats.lag_seen)
+                if slot < self.max_samples:
+                    stats.lags[slot] = lag
+
+    def flush(self, now=None):
+        """Close the current window, store and print it; returns (start, seconds, rows)"""
+        now = time.time() if now is None else now
+        window, self._window = self._window, {}
+        start, self._window_start = self._window_start, now
+        seconds = max(now - start, 1e-9)
+
+        rows = []
+        for (subject, source), stats in sorted(window.items()):
+            lag = None
+            if stats.lags:
+                ordered = sorted(stats.lags)
+                lag = {
+                    "min": round(stats.lag_min, 3),
+                    "p50": round(_percentile(ordered, 0.50), 3),
+                    "p90": round(_percentile(ordered, 0.90), 3),
+                    "p99": round(_percentile(ordered, 0.99), 3),
+                    "max": round(stats.lag_max, 3)
+                }
+            rows.append({
+                "subject": subject,
+                "source": source.decode(errors="replace"),
+                "count": stats.count,
+                "bytes": stats.bytes,
+                "rate": round(stats.count / seconds, 2),
+                "lagMs": lag,
+                "sizeMin": stats.size_min,
+                "sizeMax": stats.size_max
+            })
+
+        self.windows += 1
+        if self.store and rows:
+            self.store.append(start, seconds, rows)
+        self.stream.write(self.render(start, seconds, rows))
+        self.stream.flush()
+        return start, seconds, rows
+
+    def render(self, start, seconds, rows):
+        """One window as a single block of text (or one JSON line)"""
+        total = sum(row["count"] for row in rows)
+        if self.output_format == "json":
+            return json.dumps({"windowStart": start, "windowSeconds": round(seconds, 3), "messages": total,
+                               "rate": round(total / seconds, 2), "dropped": self.dropped,
+                               "rows": rows}) + "\n"
+
+        stamp = datetime.fromtimestamp(start).strftime("%Y-%m-%d %H:%M:%S")
+        lines = [f"[{stamp}] {seconds:.1f}s {total} msgs {total / seconds:.1f} msg/s "
+                 f"{len(rows)} subject/source {self.dropped} dropped"]
+        shown = sorted(rows, key=lambda row: row["count"], reverse=True)[:self.top]
+        for row in shown:
+            lag = row["lagMs"]
+            lag_text = (f"lag p50 {lag['p50']:.1f} p99 {lag['p99']:.1f} min {lag['min']:.1f} max {lag['max']:.1f} ms"
+                        if lag else "lag -")
+            lines.append(f"  {row['subject']:<24} {row['source'] or '-':<24} {row['count']:>9} "
+                         f"{row['rate']:>10.1f}/s  {lag_text}  size {row['sizeMin']}-{row['sizeMax']}B")
+        if len(rows) > len(shown):
+            lines.append(f"  (+{len(rows) - len(shown)} more)")
+        return "\n".join(lines) + "\n"
+
+def parse_time(value):
+    """Seconds ago (e.g. 3600) or an ISO timestamp"""
+    if value is None:
+        return None
+    try:
+        return time.time() - float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+def query_store(args):
+    store = MetricsStore(args.query)
+    rows = store.query(parse_time(args.since), parse_time(args.until), args.subject, args.source)
+    summary = {}
+    for row in rows:
+        key = f"{row['subject']} {row['source']}"
+        item = summary.setdefault(key, {"subject": row["subject"], "source": row["source"], "windows": 0,
+                                        "count": 0, "bytes": 0, "maxRate": 0, "lagP99MaxMs": None,
+                                        "lagMaxMs": None})
+        item["windows"] += 1
+        item["count"] += row["count"]
+        item["bytes"] += row["bytes"]
+        item["maxRate"] = max(item["maxRate"], row["rate"])
+        if row["lagMs"]:
+            item["lagP99MaxMs"] = max(item["lagP99MaxMs"] or -math.inf, row["lagMs"]["p99"])
+            item["lagMaxMs"] = max(item["lagMaxMs"] or -math.inf, row["lagMs"]["max"])
+    result = {"windows": len({row["windowStart"] for row in rows}), "summary": list(summary.values())}
+    if not args.summary_only:
+        result["rows"] = rows
+    print(json.dumps(result, indent=2))
+
+async def run_aggregator(args):
+    subscriber = NatsMetricsSubscriber(args.nats_url)
+    aggregator = MetricsAggregator(args.window, args.max_samples,
+                                   MetricsStore(args.store) if args.store else None,
+                                   args.format, args.top)
+
+    def signal_handler():
+        subscriber.stop()
+
+    if sys.platform != "win32":
+        loop = asyncio.get_running_loop()
+        for sig in [signal.SIGINT, signal.SIGTERM]:
+            loop.add_signal_handler(sig, signal_handler)
+
+    # Messages nats-py had to drop because the aggregator fell behind
+    async def error_cb(e):
+        if isinstance(e, nats.errors.SlowConsumerError):
+            aggregator.dropped += 1
+        else:
+            print(f"NATS error: {e}", file=sys.stderr)
+
+    try:
+        subscriber.nc = await nats.connect(servers=[args.nats_url], error_cb=error_cb)
+        print(f"Connected to NATS at {args.nats_url}", file=sys.stderr)
+    except Exception as e:
+        print(f"Failed to connect to NATS: {e}", file=sys.stderr)
+        return
+    try:
+        await subscriber.aggregate(args.subjects, aggregator)
+    finally:
+        await subscriber.nc.close()
+
+async def main(nats_url="nats://localhost:4222"):
     # Default to port-forwarded NATS (you'll need to port-forward NATS service)
-    nats_url = "nats://localhost:4222"
     
     print("K8s Metrics NATS Subscriber")
     print("=" * 30)
@@ -159,12 +541,38 @@ async def main():
         await subscriber.close()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="NATS metrics subscriber")
+    parser.add_argument("--nats-url", default="nats://localhost:4222")
+    parser.add_argument("--aggregate", action="store_true", help="headless windowed aggregation")
+    parser.add_argument("--subjects", nargs="+", default=["k8s.>", "app.>"],
+                        help="subjects to aggregate, wildcards allowed")
+    parser.add_argument("--window", type=float, default=10, help="window length in seconds")
+    parser.add_argument("--max-samples", type=int, default=20000,
+                        help="lag samples kept per subject/source per window")
+    parser.add_argument("--format", choices=["text", "json"], default="text")
+    parser.add_argument("--top", type=int, default=20, help="subject/source rows printed per window (text)")
+    parser.add_argument("--store", help="directory to append windows to")
+    parser.add_argument("--query", metavar="STORE", help="print stored windows as JSON and exit")
+    parser.add_argument("--since", help="seconds ago or ISO time (with --query)")
+    parser.add_argument("--until", help="seconds ago or ISO time (with --query)")
+    parser.add_argument("--subject", help="subject pattern to select (with --query)")
+    parser.add_argument("--source", help="source to select (with --query)")
+    parser.add_argument("--summary-only", action="store_true", help="only per subject/source totals (with --query)")
+    args = parser.parse_args()
+
+    if args.query:
+        query_store(args)
+        sys.exit(0)
+    if args.aggregate:
+        asyncio.run(run_aggregator(args))
+        sys.exit(0)
+
     # Create requirements.txt reminder
     print("Required packages: nats-py")
     print("Install with: pip install nats-py")
     print()
     
     try:
-        asyncio.run(main())
+        asyncio.run(main(args.nats_url))
     except KeyboardInterrupt:
         print("\nExited by user")
\ No newline at end of file
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Stand-in NATS server - a small in-process broker speaking the NATS client protocol
+Lets the real nats-py client (apps, manager, load generator) run without nats-server.
+
+Supports INFO/CONNECT/PING/PONG, PUB/HPUB, SUB (with queue groups), UNSUB
+(with max) and '*' / '>' wildcards. Like nats-server, a subscriber that falls
+too far behind is disconnected as a slow consumer instead of slowing down
+publishers. No auth, clustering, JetStream or TLS.
+
+Usage:
+  python nats_standin_server.py [--host 127.0.0.1] [--port 4222]
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import signal
+import sys
+
+# Bytes buffered for one client before it is dropped as a slow consumer
+SLOW_CONSUMER_BYTES = 64 * 1024 * 1024
+MAX_PAYLOAD = 1024 * 1024
+
+def subject_matches(pattern, subject):
+    """NATS subject matching: '*' matches one token, '>' one or more trailing tokens"""
+    if pattern == subject:
+        return True
+    pattern_tokens = pattern.split(".")
+    subject_tokens = subject.split(".")
+    for i, token in enumerate(pattern_tokens):
+        if token == ">":
+            return len(subject_tokens) > i
+        if i >= len(subject_tokens) or (token != "*" and token != subject_tokens[i]):
+            return False
+    return len(pattern_tokens) == len(subject_tokens)
+
+class _Subscription:
+    __slots__ = ("client", "sid", "subject", "queue", "remaining")
+
+    def __init__(self, client, sid, subject, queue):
+        self.client = client
+        self.sid = sid
+        self.subject = subject
+        self.queue = queue
+        self.remaining = None
+
+class _Client(asyncio.Protocol):
+    """One client connection; parses protocol lines and payloads straight from the receive buffer"""
+
+    def __init__(self, server, client_id):
+        self.server = server
+        self.client_id = client_id
+        self.transport = None
+        self.subscriptions = {}
+        self.verbose = False
+        self.closed = False
+        self._buffer = bytearray()
+        # (subject, reply, payload size, header size) of a PUB/HPUB waiting for its payload
+        self._pending = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        info = dict(self.server.info, client_id=self.client_id)
+        transport.write(b"INFO " + json.dumps(info).encode() + b"\r\n")
+
+    def connection_lost(self, exc):
+        self.close()
+
+    def send(self, data):
+        if self.closed:
+            return
+        self.transport.write(data)
+        if self.transport.get_write_buffer_size() > SLOW_CONSUMER_BYTES:
+            self.server.slow_consumers += 1
+            self.send_error("Slow Consumer")
+            self.close()
+
+    def send_error(self, message):
+        if not self.closed:
+            self.transport.write(f"-ERR '{message}'\r\n".encode())
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.server.remove_client(self)
+            self.transport.close()
+
+    def data_received(self, data):
+        buffer = self._buffer
+        buffer += data
+        position = 0
+        try:
+            while not self.closed:
+                if self._pending is not None:
+                    subject, reply, size, header_size = self._pending
+                    if len(buffer) - position < size + 2:
+                        break
+                    payload = bytes(buffer[position:position + size])
+                    position += size + 2
+                    self._pending = None
+                    self.server.publish(subject, reply, payload, header_size)
+                    self.ok()
+                    continue
+                end = buffer.find(b"\r\n", position)
+                if end < 0:
+                    break
+                line = bytes(buffer[position:end])
+                position = end + 2
+                self.handle(line)
+        except (ValueError, IndexError):
+            self.send_error("Protocol Error")
+            self.close()
+        del buffer[:position]
+
+    def handle(self, line):
+        if not line:
+            return
+        parts = line.split()
+        op = parts[0].upper()
+        if op == b"PUB":
+            # PUB <subject> [reply] <#bytes>
+            reply = parts[2] if len(parts) == 4 else None
+            self._pending = (parts[1], reply, int(parts[-1]), None)
+        elif op == b"HPUB":
+            # HPUB <subject> [reply] <#header bytes> <#total bytes>
+            reply = parts[2] if len(parts) == 5 else None
+            self._pending = (parts[1], reply, int(parts[-1]), int(parts[-2]))
+        elif op == b"SUB":
+            # SUB <subject> [queue] <sid>
+            queue = parts[2] if len(parts) == 4 else None
+            sid = parts[-1]
+            subscription = _Subscription(self, sid, parts[1].decode(), queue)
+            self.subscriptions[sid] = subscription
+            self.server.add_subscription(subscription)
+            self.ok()
+        elif op == b"UNSUB":
+            sid = parts[1]
+            subscription = self.subscriptions.get(sid)
+            if subscription is not None:
+                if len(parts) > 2 and int(parts[2]) > 0:
+                    subscription.remaining = int(parts[2])
+                else:
+                    del self.subscriptions[sid]
+                    self.server.remove_subscription(subscription)
+            self.ok()
+        elif op == b"PING":
+            self.send(b"PONG\r\n")
+        elif op == b"PONG":
+            pass
+        elif op == b"CONNECT":
+            options = json.loads(line[len(b"CONNECT "):] or b"{}")
+            self.verbose = bool(options.get("verbose"))
+            self.ok()
+        else:
+            self.send_error("Unknown Protocol Operation")
+
+    def ok(self):
+        if self.verbose:
+            self.send(b"+OK\r\n")
+
+class StandInNatsServer:
+    """asyncio NATS protocol server for local tests and benchmarks"""
+
+    def __init__(self, host="127.0.0.1", port=0, seed=None):
+        self.host = host
+        self.port = port
+        self.clients = set()
+        self.subscriptions = []
+        self.messages_in = 0
+        self.messages_out = 0
+        self.slow_consumers = 0
+        self._server = None
+        self._ids = itertools.count(1)
+        self._routes = {}
+        self._random = random.Random(seed)
+        self.info = {
+            "server_id": "standin",
+            "server_name": "standin",
+            "version": "2.10.0",
+            "proto": 1,
+            "go": "n/a",
+            "host": host,
+            "port": port,
+            "headers": True,
+            "max_payload": MAX_PAYLOAD
+        }
+
+    @property
+    def url(self):
+        return f"nats://{self.host}:{self.port}"
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self._server = await loop.create_server(self._connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self.info["port"] = self.port
+        return self
+
+    async def stop(self):
+        for client in list(self.clients):
+            client.close()
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def _connection(self):
+        client = _Client(self, next(self._ids))
+        self.clients.add(client)
+        return client
+
+    def add_subscription(self, subscription):
+        self.subscriptions.append(subscription)
+        self._routes.clear()
+
+    def remove_subscription(self, subscription):
+        if subscription in self.subscriptions:
+            self.subscriptions.remove(subscription)
+            self._routes.clear()
+
+    def remove_client(self, client):
+        self.clients.discard(client)
+        for subscription in list(client.subscriptions.values()):
+            self.remove_subscription(subscription)
+
+    def _route(self, subject):
+        """(plain subscriptions, queue groups) for a subject, cached until subscriptions change"""
+        route = self._routes.get(subject)
+        if route is None:
+            text = subject.decode()
+            plain, groups = [], {}
+            for subscription in self.subscriptions:
+                if subject_matches(subscription.subject, text):
+                    if subscription.queue is None:
+                        plain.append(subscription)
+                    else:
+                        groups.setdefault(subscription.queue, []).append(subscription)
+            route = self._routes[subject] = (plain, list(groups.values()))
+        return route
+
+    def publish(self, subject, reply, payload, header_size=None):
+        self.messages_in += 1
+        plain, groups = self._route(subject)
+        targets = plain + [self._random.choice(members) for members in groups] if groups else plain
+        for subscription in targets:
+            if header_size is None:
+                head = b"MSG %s %s %s%d\r\n" % (subject, subscription.sid,
+                                                reply + b" " if reply else b"", len(payload))
+            else:
+                head = b"HMSG %s %s %s%d %d\r\n" % (subject, subscription.sid,
+                                                    reply + b" " if reply else b"", header_size, len(payload))
+            subscription.client.send(head + payload + b"\r\n")
+            self.messages_out += 1
+            if subscription.remaining is not None:
+                subscription.remaining -= 1
+                if subscription.remaining <= 0:
+                    subscription.client.subscriptions.pop(subscription.sid, None)
+                    self.remove_subscription(subscription)
+
+    def get_stats(self):
+        return {
+            "clients": len(self.clients),
+            "subscriptions": len(self.subscriptions),
+            "messagesIn": self.messages_in,
+            "messagesOut": self.messages_out,
+            "slowConsumers": self.slow_consumers
+        }
+
+async def main():
+    parser = argparse.ArgumentParser(description="Stand-in NATS server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4222)
+    args = parser.parse_args()
+
+    server = await StandInNatsServer(args.host, args.port).start()
+    print(f"Stand-in NATS server listening on {server.url} (Ctrl+C to exit)")
+
+    stopped = asyncio.Event()
+    if sys.platform != "win32":
+        loop = asyncio.get_running_loop()
+        for sig in [signal.SIGINT, signal.SIGTERM]:
+            loop.add_signal_handler(sig, stopped.set)
+    await stopped.wait()
+    await server.stop()
+    print(f"Stopped: {json.dumps(server.get_stats())}")
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
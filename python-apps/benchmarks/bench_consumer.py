@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for the shared NATS consumer runtime.
+
+Publishes k8s.events-style messages through an in-process stand-in for the
+NATS server to a queue group of consumer replicas, and compares the shared
+runtime (bounded handler pool) with the previous pattern of awaiting each
+handler inline on the subscription. Handlers simulate I/O with a sleep plus a
+little CPU work. Reports throughput and publish-to-handled latency.
+
+Usage:
+  python benchmarks/bench_consumer.py [--messages 20000] [--replicas 1,3] [--io-ms 2] [--output report.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from collections import defaultdict, namedtuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.consumer import NatsConsumer
+
+Msg = namedtuple("Msg", "subject data")
+
+class _BrokerSubscription:
+    def __init__(self, broker, subject, queue, limit):
+        self.broker = broker
+        self.subject = subject
+        self.queue = queue
+        self._pending = asyncio.Queue(maxsize=limit)
+
+    @property
+    async def messages(self):
+        while True:
+            msg = await self._pending.get()
+            if msg is None:
+                return
+            yield msg
+
+    async def unsubscribe(self):
+        self.broker.remove(self)
+        try:
+            self._pending.put_nowait(None)
+        except asyncio.QueueFull:
+            pass
+
+class InProcessBroker:
+    """Stand-in for nats-server: exact subject routing, queue groups served round-robin.
+
+    Publishing waits when a subscription's buffer is full rather than dropping
+    the message as a real server would for a slow consumer, so the benchmark
+    measures consumer throughput instead of loss.
+    """
+
+    def __init__(self):
+        self._subscriptions = defaultdict(list)
+        self._next = defaultdict(int)
+
+    def client(self):
+        return InProcessClient(self)
+
+    def add(self, subscription):
+        self._subscriptions[subscription.subject].append(subscription)
+
+    def remove(self, subscription):
+        subscriptions = self._subscriptions[subscription.subject]
+        if subscription in subscriptions:
+            subscriptions.remove(subscription)
+
+    async def deliver(self, subject, data):
+        groups = defaultdict(list)
+        for subscription in self._subscriptions[subject]:
+            groups[subscription.queue].append(subscription)
+        for queue, members in groups.items():
+            if queue:
+                index = self._next[(subject, queue)] % len(members)
+                self._next[(subject, queue)] += 1
+                members = [members[index]]
+            for subscription in members:
+                await subscription._pending.put(Msg(subject, data))
+
+class InProcessClient:
+    """The slice of the nats-py client the consumer runtime uses"""
+
+    def __init__(self, broker):
+        self.broker = broker
+
+    async def subscribe(self, subject, queue="", pending_msgs_limit=65536):
+        subscription = _BrokerSubscription(self.broker, subject, queue, pending_msgs_limit)
+        self.broker.add(subscription)
+        return subscription
+
+    async def publish(self, subject, data):
+        await self.broker.deliver(subject, data)
+
+    async def close(self):
+        pass
+
+def simulated_handler(io_seconds, latencies):
+    async def handle(subject, data):
+        # A little decoding/CPU work, then an awaited call (database, HTTP, ...)
+        sum(len(str(value)) for value in data.values())
+        await asyncio.sleep(io_seconds)
+        latencies.append(time.time() * 1000 - data["timestamp"])
+    return handle
+
+class InlineConsumer:
+    """The previous app pattern: each handler awaited in turn on its subscription"""
+
+    def __init__(self, client, handler, queue):
+        self.client = client
+        self.handler = handler
+        self.queue = queue
+        self._task = None
+
+    async def start(self):
+        self.sub = await self.client.subscribe("k8s.events", queue=self.queue)
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        async for msg in self.sub.messages:
+            await self.handler(msg.subject, json.loads(msg.data))
+
+    async def stop(self):
+        await self.sub.unsubscribe()
+        self._task.cancel()
+
+async def run_scenario(mode, messages, replicas, io_seconds, concurrency):
+    broker = InProcessBroker()
+    latencies = []
+    done = asyncio.Event()
+    handler = simulated_handler(io_seconds, latencies)
+
+    async def counting(subject, data):
+        await handler(subject, data)
+        if len(latencies) >= messages:
+            done.set()
+
+    async def connect():
+        return broker.client()
+
+    consumers = []
+    for _ in range(replicas):
+        if mode == "pool":
+            consumer = NatsConsumer("bench", queue_group="bench", concurrency=concurrency,
+                                    max_pending=concurrency * 4, status_interval=3600,
+                                    connect=connect)
+            consumer.subscribe("k8s.events", counting)
+        else:
+            consumer = InlineConsumer(broker.client(), counting, "bench")
+        await consumer.start()
+        consumers.append(consumer)
+
+    publisher = broker.client()
+    started = time.perf_counter()
+    for i in range(messages):
+        payload = {"action": "pod_updated", "name": f"pod-{i}", "namespace": "default",
+                   "timestamp": time.time() * 1000}
+        await publisher.publish("k8s.events", json.dumps(payload).encode())
+    await done.wait()
+    elapsed = time.perf_counter() - started
+
+    for consumer in consumers:
+        await consumer.stop()
+
+    ordered = sorted(latencies)
+    pick = lambda q: ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+    return {
+        "mode": mode,
+        "replicas": replicas,
+        "messages": messages,
+        "seconds": round(elapsed, 3),
+        "throughput": round(messages / elapsed, 1),
+        "latencyMs": {"p50": round(pick(0.5), 2), "p95": round(pick(0.95), 2), "p99": round(pick(0.99), 2),
+                      "max": round(ordered[-1], 2), "mean": round(statistics.mean(ordered), 2)}
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="NATS consumer runtime throughput benchmark")
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--replicas", default="1,3", help="comma separated replica counts")
+    parser.add_argument("--io-ms", type=float, default=2.0, help="simulated handler I/O per message")
+    parser.add_argument("--concurrency", type=int, default=64, help="handler pool size per replica")
+    parser.add_argument("--inline-messages", type=int, default=2000,
+                        help="messages for the inline baseline (it is much slower)")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    results = []
+    for replicas in [int(r) for r in args.replicas.split(",")]:
+        for mode, messages in (("inline", args.inline_messages), ("pool", args.messages)):
+            results.append(asyncio.run(run_scenario(mode, messages, replicas, args.io_ms / 1000,
+                                                    args.concurrency)))
+
+    report = {
+        "ioMs": args.io_ms,
+        "concurrency": args.concurrency,
+        "results": results,
+        "python": sys.version.split()[0]
+    }
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+if __name__ == "__main__":
+    main()
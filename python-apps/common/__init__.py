@@ -0,0 +1 @@
+# Shared runtime for the NATS consumer apps
@@ -0,0 +1,267 @@
+import asyncio
+import json
+import os
+import signal
+import socket
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+# Handlers get the message subject and its decoded JSON body
+Handler = Callable[[str, Any], Awaitable[None]]
+
+DEFAULT_CONCURRENCY = 16
+DEFAULT_MAX_PENDING = 256
+DEFAULT_STATUS_INTERVAL = 30
+DEFAULT_STATUS_BATCH = 100
+
+# Messages the client library buffers per subscription before it reports a slow consumer
+SUBSCRIPTION_PENDING_LIMIT = 8192
+
+class SubjectMetrics:
+    """Totals for one subscription plus a window that resets at every status publish"""
+
+    __slots__ = ('received', 'processed', 'failed', '_window_started', '_window_processed',
+                 '_wait_total', '_wait_max', '_lag_total', '_lag_max', '_lag_samples')
+
+    def __init__(self):
+        self.received = 0
+        self.processed = 0
+        self.failed = 0
+        self._reset_window(time.monotonic())
+
+    def _reset_window(self, now: float) -> None:
+        self._window_started = now
+        self._window_processed = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._lag_total = 0.0
+        self._lag_max = 0.0
+        self._lag_samples = 0
+
+    def record(self, queue_wait: float, lag: Optional[float], ok: bool) -> None:
+        if ok:
+            self.processed += 1
+        else:
+            self.failed += 1
+        self._window_processed += 1
+        self._wait_total += queue_wait
+        self._wait_max = max(self._wait_max, queue_wait)
+        if lag is not None:
+            self._lag_total += lag
+            self._lag_max = max(self._lag_max, lag)
+            self._lag_samples += 1
+
+    def snapshot(self, reset_window: bool = False) -> Dict[str, Any]:
+        """Totals, plus throughput, queue wait and publish-to-handle lag over the current window"""
+        now = time.monotonic()
+        elapsed = max(now - self._window_started, 1e-9)
+        handled = self._window_processed
+        result = {
+            "received": self.received,
+            "processed": self.processed,
+            "failed": self.failed,
+            "throughput": round(handled / elapsed, 2),
+            "queueWaitAvgMs": round(self._wait_total / handled * 1000, 3) if handled else None,
+            "queueWaitMaxMs": round(self._wait_max * 1000, 3),
+            "lagAvgMs": round(self._lag_total / self._lag_samples * 1000, 3) if self._lag_samples else None,
+            "lagMaxMs": round(self._lag_max * 1000, 3) if self._lag_samples else None
+        }
+        if reset_window:
+            self._reset_window(now)
+        return result
+
+@dataclass
+class _Subscription:
+    subject: str
+    handler: Handler
+    shared: bool
+    sub: Any = None
+
+def _message_lag(data: Any) -> Optional[float]:
+    """Seconds since the publisher stamped the message (k8s messages carry epoch-millis timestamps)"""
+    if isinstance(data, dict):
+        stamp = data.get("timestamp")
+        if isinstance(stamp, (int, float)) and not isinstance(stamp, bool):
+            return max(time.time() - stamp / 1000, 0.0)
+    return None
+
+class NatsConsumer:
+    """Shared runtime for the NATS consumer apps.
+
+    Subscriptions only read messages and hand them to a bounded queue; a fixed
+    pool of worker tasks runs the handlers. A slow handler therefore holds one
+    worker instead of the event loop, and once every worker is busy and the
+    queue is full the readers stop pulling, so backlog builds in the client's
+    per-subscription buffer instead of in memory here.
+
+    Shared subscriptions join the app's queue group, so replicas of one app
+    split the messages between them while different apps each see every
+    message. Status goes out on a timer (or early, once enough reported
+    events have batched up) with per-subject throughput and lag.
+    """
+
+    def __init__(self, app_name: str, nats_url: Optional[str] = None, queue_group: Optional[str] = None,
+                 concurrency: Optional[int] = None, max_pending: Optional[int] = None,
+                 status_interval: Optional[float] = None, status_batch: int = DEFAULT_STATUS_BATCH,
+                 status_subject: str = "app.status",
+                 connect: Optional[Callable[[], Awaitable[Any]]] = None):
+        self.app_name = app_name
+        self.nats_url = nats_url or os.getenv("NATS_URL", "nats://nats-service:4222")
+        self.queue_group = queue_group or os.getenv("NATS_QUEUE_GROUP", app_name)
+        self.concurrency = concurrency or int(os.getenv("HANDLER_CONCURRENCY", str(DEFAULT_CONCURRENCY)))
+        self.max_pending = max_pending or int(os.getenv("HANDLER_QUEUE_SIZE", str(DEFAULT_MAX_PENDING)))
+        self.status_interval = status_interval or float(os.getenv("STATUS_INTERVAL_SECONDS",
+                                                                  str(DEFAULT_STATUS_INTERVAL)))
+        self.status_batch = status_batch
+        self.status_subject = status_subject
+        # Inside Kubernetes the hostname is the pod name, which lets the manager join heartbeats to pods
+        self.instance = os.getenv("HOSTNAME") or socket.gethostname()
+        self.namespace = os.getenv("POD_NAMESPACE")
+        self.nc = None
+        self._connect = connect or self._connect_nats
+        self._subscriptions: List[_Subscription] = []
+        self._metrics: Dict[str, SubjectMetrics] = {}
+        self._events: Deque[Dict[str, Any]] = deque(maxlen=status_batch * 10)
+        self._queue: Optional[asyncio.Queue] = None
+        self._readers: List[asyncio.Task] = []
+        self._workers: List[asyncio.Task] = []
+        self._flush: Optional[asyncio.Event] = None
+        self._stopped: Optional[asyncio.Event] = None
+        self._stopping = False
+        self._started = time.time()
+
+    def subscribe(self, subject: str, handler: Handler, shared: bool = True) -> None:
+        """Register a handler; shared subscriptions split messages across replicas of this app"""
+        self._subscriptions.append(_Subscription(subject, handler, shared))
+        self._metrics[subject] = SubjectMetrics()
+
+    def report(self, event: Dict[str, Any]) -> None:
+        """Queue an event for the next status message instead of publishing it on its own"""
+        self._events.append(event)
+        if len(self._events) >= self.status_batch and self._flush:
+            self._flush.set()
+
+    async def _connect_nats(self):
+        import nats
+        return await nats.connect(servers=[self.nats_url])
+
+    async def start(self) -> None:
+        """Connect, subscribe and start the handler pool"""
+        self.nc = await self._connect()
+        print(f"{self.app_name} connected to NATS")
+
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._flush = asyncio.Event()
+        self._stopped = asyncio.Event()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+        for subscription in self._subscriptions:
+            subscription.sub = await self.nc.subscribe(
+                subscription.subject,
+                queue=self.queue_group if subscription.shared else "",
+                pending_msgs_limit=SUBSCRIPTION_PENDING_LIMIT
+            )
+            self._readers.append(asyncio.create_task(self._reader(subscription)))
+        print(f"{self.app_name} consuming {', '.join(s.subject for s in self._subscriptions)} "
+              f"(queue group {self.queue_group}, {self.concurrency} handlers)")
+
+    async def run(self) -> None:
+        """Start, then publish status until stop() is called (SIGTERM/SIGINT stop gracefully)"""
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(signum, lambda: asyncio.create_task(self.stop()))
+            except (NotImplementedError, RuntimeError):
+                pass
+        await self.start()
+        await self._status_loop()
+        await self._stopped.wait()
+
+    async def stop(self) -> None:
+        """Stop reading, let queued messages finish, publish a final status and disconnect"""
+        if self._stopping:
+            return
+        self._stopping = True
+        for subscription in self._subscriptions:
+            if subscription.sub is not None:
+                await subscription.sub.unsubscribe()
+        for task in self._readers:
+            task.cancel()
+        await asyncio.gather(*self._readers, return_exceptions=True)
+        if self._queue is not None:
+            await self._queue.join()
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        if self._flush:
+            self._flush.set()
+        if self.nc is not None:
+            await self.publish_status("stopped")
+            await self.nc.close()
+        if self._stopped:
+            self._stopped.set()
+        print(f"{self.app_name} stopped")
+
+    async def _reader(self, subscription: _Subscription) -> None:
+        metrics = self._metrics[subscription.subject]
+        async for msg in subscription.sub.messages:
+            metrics.received += 1
+            # Blocks while every handler is busy and the queue is full
+            await self._queue.put((subscription, msg, time.monotonic()))
+
+    async def _worker(self) -> None:
+        while True:
+            subscription, msg, enqueued = await self._queue.get()
+            queue_wait = time.monotonic() - enqueued
+            lag = None
+            ok = False
+            try:
+                data = json.loads(msg.data)
+                lag = _message_lag(data)
+                await subscription.handler(msg.subject, data)
+                ok = True
+            except Exception as e:
+                print(f"{self.app_name} failed handling {msg.subject}: {e}")
+            finally:
+                self._metrics[subscription.subject].record(queue_wait, lag, ok)
+                self._queue.task_done()
+
+    async def _status_loop(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._flush.wait(), timeout=self.status_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush.clear()
+            if not self._stopping:
+                await self.publish_status("running")
+
+    def status(self, state: str = "running", reset_window: bool = False) -> Dict[str, Any]:
+        return {
+            "app": self.app_name,
+            "instance": self.instance,
+            "namespace": self.namespace,
+            "timestamp": datetime.now().isoformat(),
+            "status": state,
+            "queueGroup": self.queue_group,
+            "uptime": time.time() - self._started,
+            "handlers": self.concurrency,
+            "pending": self._queue.qsize() if self._queue else 0,
+            "subjects": {subject: metrics.snapshot(reset_window) for subject, metrics in self._metrics.items()}
+        }
+
+    async def publish_status(self, state: str = "running") -> None:
+        """Publish one status message carrying the metrics window and any batched events"""
+        status = self.status(state, reset_window=True)
+        events = []
+        while self._events:
+            events.append(self._events.popleft())
+        if events:
+            status["events"] = events
+        try:
+            await self.nc.publish(self.status_subject, json.dumps(status).encode())
+        except Exception as e:
+            print(f"{self.app_name} failed publishing status: {e}")
@@ -0,0 +1,131 @@
+import hmac
+import math
+from flask import Blueprint, Response, jsonify, request
+from services.profiling_service import MemoryTracer, ProfilerBusy, SamplingProfiler
+from typing import Optional
+
+admin_bp = Blueprint('admin', __name__)
+
+ADMIN_TOKEN_HEADER = 'X-Admin-Token'
+
+# Will be set by main app
+admin_token: Optional[str] = None
+profiler: Optional[SamplingProfiler] = None
+memory: Optional[MemoryTracer] = None
+
+def require_admin():
+    """before_request hook: admin endpoints need ADMIN_TOKEN configured and sent in X-Admin-Token"""
+    if not admin_token:
+        return jsonify({"error": "admin endpoints are disabled (ADMIN_TOKEN is not set)"}), 404
+    supplied = request.headers.get(ADMIN_TOKEN_HEADER, '')
+    if not hmac.compare_digest(supplied.encode(), admin_token.encode()):
+        return jsonify({"error": f"missing or wrong {ADMIN_TOKEN_HEADER} header"}), 403
+    return None
+
+admin_bp.before_request(require_admin)
+
+def _number_arg(name: str, default: float) -> float:
+    raw = request.args.get(name)
+    if raw is None:
+        return default
+    try:
+        value = float(raw)
+    except ValueError:
+        raise ValueError(f"{name} must be a number")
+    # int(inf) raises OverflowError rather than ValueError, so reject it here as a bad argument
+    if not math.isfinite(value):
+        raise ValueError(f"{name} must be a finite number")
+    return value
+
+@admin_bp.route('/api/admin/profile', methods=['GET'])
+def profile():
+    """Sample all threads for ?seconds= (default 10) every ?interval_ms= (default 10).
+
+    Returns collapsed stacks (text, flamegraph.pl/speedscope ready) or, with
+    ?format=json, the top functions by self and total samples plus the stacks.
+    Threads parked in waits are left out unless ?idle=true.
+    """
+    try:
+        seconds = _number_arg('seconds', 10)
+        interval = _number_arg('interval_ms', 10) / 1000
+        output_format = request.args.get('format', 'collapsed')
+        if output_format not in ('collapsed', 'json'):
+            return jsonify({"error": "format must be collapsed or json"}), 400
+        include_idle = request.args.get('idle', 'false').lower() == 'true'
+
+        result = profiler.profile(seconds, interval, include_idle)
+        if output_format == 'collapsed':
+            response = Response(SamplingProfiler.collapsed(result), mimetype='text/plain')
+            response.headers['X-Profile-Samples'] = str(result["samples"])
+            return response
+
+        stacks = result.pop("stacks")
+        return jsonify(dict(result,
+                            top=SamplingProfiler.top_functions(dict(result, stacks=stacks)),
+                            collapsed=[f"{stack} {count}" for stack, count in stacks.most_common()]))
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except ProfilerBusy as e:
+        return jsonify({"error": str(e)}), 409
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@admin_bp.route('/api/admin/memory', methods=['GET'])
+def memory_status():
+    """tracemalloc state and traced memory"""
+    return jsonify(memory.get_status())
+
+@admin_bp.route('/api/admin/memory/start', methods=['POST'])
+def memory_start():
+    """Start tracing allocations, keeping ?frames= (default 25) frames per traceback"""
+    try:
+        frames = int(_number_arg('frames', 25))
+        if not 1 <= frames <= 100:
+            return jsonify({"error": "frames must be between 1 and 100"}), 400
+        return jsonify(memory.start(frames))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@admin_bp.route('/api/admin/memory/snapshot', methods=['POST'])
+def memory_snapshot():
+    """Record the baseline that diffs compare against"""
+    try:
+        return jsonify(memory.snapshot())
+    except ProfilerBusy as e:
+        return jsonify({"error": str(e)}), 409
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@admin_bp.route('/api/admin/memory/diff', methods=['GET'])
+def memory_diff():
+    """Allocation growth since the baseline (?key=lineno|filename|traceback, ?limit=, ?rebase=true)"""
+    try:
+        limit = int(_number_arg('limit', 30))
+        if not 1 <= limit <= 500:
+            return jsonify({"error": "limit must be between 1 and 500"}), 400
+        rebase = request.args.get('rebase', 'false').lower() == 'true'
+        return jsonify(memory.diff(request.args.get('key', 'lineno'), limit, rebase))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except ProfilerBusy as e:
+        return jsonify({"error": str(e)}), 409
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@admin_bp.route('/api/admin/memory/stop', methods=['POST'])
+def memory_stop():
+    """Stop tracing and drop the baseline"""
+    try:
+        return jsonify(memory.stop())
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def init_admin_routes(token, sampling_profiler, memory_tracer):
+    """Initialize route dependencies"""
+    global admin_token, profiler, memory
+    admin_token = token
+    profiler = sampling_profiler
+    memory = memory_tracer
@@ -0,0 +1,102 @@
+from flask import Blueprint, jsonify, request
+from services.app_registry import AppRegistry
+from models.cluster_data import PodInfo
+from api.cluster_context import cluster_service, current_cluster, require_cluster
+from typing import Any, Dict, List, Optional, Tuple
+
+app_bp = Blueprint('apps', __name__)
+
+# Pods are joined from the cluster named by ?cluster=
+cache = cluster_service('cache')
+
+# Will be set by main app
+apps: Optional[AppRegistry] = None
+
+APPS_DEFAULT_LIMIT = 500
+APPS_MAX_LIMIT = 5000
+
+# Pod name -> pods with that name, rebuilt once per snapshot version per cluster
+_pod_indexes: Dict[str, Tuple[int, Dict[str, List[PodInfo]]]] = {}
+
+def _pod_index() -> Dict[str, List[PodInfo]]:
+    name = current_cluster().name
+    cluster_data, version = cache.get_snapshot()
+    indexed = _pod_indexes.get(name)
+    if indexed is not None and indexed[0] == version:
+        return indexed[1]
+    index: Dict[str, List[PodInfo]] = {}
+    for pod in (cluster_data.pods if cluster_data else []):
+        index.setdefault(pod.name, []).append(pod)
+    _pod_indexes[name] = (version, index)
+    return index
+
+def _pod_for(instance: Dict[str, Any], index: Dict[str, List[PodInfo]]) -> Optional[Dict[str, Any]]:
+    """The pod an instance runs in: apps report their hostname, which is the pod name"""
+    candidates = index.get(instance["instance"])
+    if not candidates:
+        return None
+    pod = next((p for p in candidates if p.namespace == instance["namespace"]), candidates[0])
+    return dict(pod.to_dict(),
+                node_name=pod.node_name,
+                restarts=pod.restarts,
+                ready_containers=pod.ready_containers,
+                container_count=pod.container_count)
+
+@app_bp.route('/api/apps', methods=['GET'])
+def list_apps():
+    """Live app instance counts per app, from app.status heartbeats"""
+    if not apps:
+        return jsonify({"error": "app registry not available"}), 503
+    summary = apps.summary()
+    return jsonify({
+        "count": len(summary),
+        "instanceCount": sum(summary.values()),
+        "apps": {app: {"instances": count} for app, count in sorted(summary.items())},
+        "stats": apps.get_stats()
+    })
+
+@app_bp.route('/api/apps/<app>', methods=['GET'])
+def get_app(app):
+    """Live instances of one app joined with their pods (?limit=, ?expired=true adds recent expiries)"""
+    if not apps:
+        return jsonify({"error": "app registry not available"}), 503
+    # Only the pod join needs a cluster; the app list is cluster independent
+    error = require_cluster()
+    if error is not None:
+        return error
+    try:
+        limit = int(request.args.get('limit', APPS_DEFAULT_LIMIT))
+        if not 1 <= limit <= APPS_MAX_LIMIT:
+            raise ValueError
+    except ValueError:
+        return jsonify({"error": f"limit must be an integer between 1 and {APPS_MAX_LIMIT}"}), 400
+
+    try:
+        total, instances = apps.instances(app, limit)
+        index = _pod_index()
+        matched = 0
+        for instance in instances:
+            instance["pod"] = _pod_for(instance, index)
+            matched += instance["pod"] is not None
+
+        result = {
+            "app": app,
+            "count": total,
+            "truncated": total > len(instances),
+            "withPod": matched,
+            "withoutPod": len(instances) - matched,
+            "instances": instances
+        }
+        if request.args.get('expired', 'false').lower() == 'true':
+            result["recentlyExpired"] = apps.recently_expired(app)
+        if not total and not result.get("recentlyExpired"):
+            return jsonify(dict(result, error=f"no live instances of {app}")), 404
+        return jsonify(result)
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def init_app_routes(app_registry):
+    """Initialize route dependencies"""
+    global apps
+    apps = app_registry
@@ -1,16 +1,22 @@
 import time
 from flask import Blueprint, jsonify
-from services.cache_service import ClusterDataCache
-from services.interrogator_service import ClusterInterrogator
 from services.nats_service import NatsService
+from services.admission_service import FetchBudgetExceeded
+from api.cluster_context import cluster_service, current_cluster, require_ready_cluster
+from api.server_timing import phase
+from api.result_cache import result_cache
 from typing import Optional
 import time
 
 cache_bp = Blueprint('cache', __name__)
+cache_bp.before_request(require_ready_cluster)
+
+# Services of the cluster named by ?cluster=, resolved per request
+cache = cluster_service('cache')
+interrogator = cluster_service('interrogator')
+replicator = cluster_service('replicator')
 
 # Will be set by main app
-cache: Optional[ClusterDataCache] = None
-interrogator: Optional[ClusterInterrogator] = None
 nats_service: Optional[NatsService] = None
 
 @cache_bp.route('/api/cache/stats', methods=['GET'])
@@ -23,6 +29,8 @@ def get_cache_stats():
                 "interrogatorRunning": interrogator.is_running(),
                 "intervalSeconds": interrogator.interval_seconds
             })
+        # Shared across clusters: hit rates of encoded query results
+        stats["resultCache"] = result_cache.get_stats()
         return jsonify(stats)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -32,16 +40,27 @@ def refresh_cache():
     """Force cache refresh"""
     try:
         if interrogator:
-            interrogator.force_update()
+            if not interrogator.is_collecting():
+                # Followers get the leader's next snapshot; only the lease holder lists the cluster
+                return jsonify({"status": "cache refresh left to the collecting replica"})
+            try:
+                interrogator.force_update()
+            except FetchBudgetExceeded as e:
+                response = jsonify({"error": str(e), "retryAfter": e.retry_after})
+                response.status_code = 429
+                response.headers['Retry-After'] = e.retry_after_header
+                return response
             
             # Publish refresh event
             if nats_service:
                 event = {
                     "action": "cache_refresh_triggered",
                     "source": "python-k8s-manager",
+                    "cluster": current_cluster().name,
                     "timestamp": int(time.time() * 1000)
                 }
-                nats_service.publish_sync("k8s.events", event)
+                with phase('nats'):
+                    nats_service.publish_sync("k8s.events", event)
             
             return jsonify({"status": "cache refresh triggered"})
         else:
@@ -53,14 +72,18 @@ def refresh_cache():
 def invalidate_cache():
     """Invalidate cache"""
     try:
+        if interrogator and not interrogator.is_collecting():
+            # Emptying a follower's cache would fail reads until the leader's next diff; resync instead
+            if not replicator or not replicator.request_sync():
+                return jsonify({"error": "collecting replica not reachable, cache left as is"}), 503
+            return jsonify({"status": "snapshot requested from the collecting replica"}), 202
+        
         cache.invalidate()
         return jsonify({"status": "cache invalidated"})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-def init_cache_routes(cache_svc, interrogator_svc, nats_svc):
+def init_cache_routes(nats_svc):
     """Initialize route dependencies"""
-    global cache, interrogator, nats_service
-    cache = cache_svc
-    interrogator = interrogator_svc
+    global nats_service
     nats_service = nats_svc
@@ -0,0 +1,48 @@
+from flask import jsonify, request
+from werkzeug.local import LocalProxy
+from services.cluster_registry import ClusterContext, ClusterRegistry, UnknownCluster
+from typing import Optional
+
+# Will be set by main app
+clusters: Optional[ClusterRegistry] = None
+
+def current_cluster() -> ClusterContext:
+    """The cluster named by ?cluster= (the default cluster when absent)"""
+    return clusters.get(request.args.get('cluster'))
+
+def cluster_service(attribute: str) -> LocalProxy:
+    """Proxy to one of the requested cluster's services, resolved per request"""
+    return LocalProxy(lambda: getattr(current_cluster(), attribute))
+
+def _initializing(message: str):
+    response = jsonify({"error": message})
+    response.status_code = 503
+    response.headers['Retry-After'] = '2'
+    return response
+
+def require_cluster():
+    """before_request hook: 404 for unknown cluster names"""
+    if clusters is None or not clusters.names():
+        return _initializing("service initializing")
+    try:
+        current_cluster()
+    except UnknownCluster:
+        return jsonify({
+            "error": f"unknown cluster: {request.args.get('cluster')} (available: {', '.join(clusters.names())})"
+        }), 404
+    return None
+
+def require_ready_cluster():
+    """before_request hook: also 503 until the requested cluster's API server is connected"""
+    error = require_cluster()
+    if error is not None:
+        return error
+    context = current_cluster()
+    if not context.is_ready():
+        return _initializing(f"cluster {context.name} initializing")
+    return None
+
+def init_cluster_context(registry):
+    """Initialize route dependencies"""
+    global clusters
+    clusters = registry
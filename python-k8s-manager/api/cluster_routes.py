@@ -1,68 +1,270 @@
 import time
-import time
-from flask import Blueprint, jsonify, request
-from services.kubernetes_service import KubernetesService
-from services.cache_service import ClusterDataCache
+from flask import Blueprint, Response, jsonify, request
 from services.nats_service import NatsService
-from typing import Optional
+from services.admission_service import AdmissionController, FetchBudgetExceeded
+from services.search_service import KINDS
+from models.cluster_data import ClusterData
+from api.cluster_context import cluster_service, current_cluster, require_ready_cluster
+from api.json_stream import iter_json_object, streaming_json_response
+from api.server_timing import phase
+from api.projection import (POD_FIELDS, DEPLOYMENT_FIELDS, FORMAT_COMPACT, ProjectionError,
+                            compile_serializer, encode_projected_body, parse_fields, parse_format,
+                            resolve_fields)
+from api.result_cache import json_response, result_cache, result_key, snapshot_etag
+from typing import Optional, Tuple
 
 cluster_bp = Blueprint('cluster', __name__)
+cluster_bp.before_request(require_ready_cluster)
+
+# Services of the cluster named by ?cluster=, resolved per request
+k8s_service = cluster_service('k8s_service')
+cache = cluster_service('cache')
+admission = cluster_service('admission')
+topology = cluster_service('topology')
+search = cluster_service('search')
+usage = cluster_service('usage')
+interrogator = cluster_service('interrogator')
 
 # Will be set by main app
-k8s_service: Optional[KubernetesService] = None
-cache: Optional[ClusterDataCache] = None
 nats_service: Optional[NatsService] = None
 
 CACHE_MAX_AGE_SECONDS = 30
 
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 200
+
+# Level-of-detail defaults for /api/cluster/topology
+TOPOLOGY_MAX_GROUP = 50
+TOPOLOGY_MAX_PODS = 200
+
+USAGE_DEFAULT_LIMIT = 20
+USAGE_MAX_LIMIT = 1000
+
+def _wants_stream() -> bool:
+    """Check if the client asked for a chunked streaming response"""
+    return request.args.get('stream', 'false').lower() == 'true'
+
+def _wants_detail() -> bool:
+    """Check if the client asked for opt-in detail fields (node, restarts, owners, ...)"""
+    return request.args.get('detail', 'false').lower() == 'true'
+
+def _projection_args() -> Tuple[Optional[Tuple[str, ...]], str]:
+    """Parse ?fields= and ?format= (raises ProjectionError on bad input)"""
+    return parse_fields(request.args.get('fields')), parse_format(request.args.get('format'))
+
+def _validate_projection(*available_sets: Tuple[str, ...]) -> None:
+    """Reject bad projection args up front, before any cluster fetch"""
+    requested, _ = _projection_args()
+    if requested:
+        known = set().union(*available_sets)
+        unknown = [name for name in requested if name not in known]
+        if unknown:
+            raise ProjectionError(f"unknown fields: {', '.join(unknown)} (available: {', '.join(sorted(known))})")
+
+def _render(scalars: dict, lists: list, version: Optional[int] = None,
+            volatile: Optional[dict] = None):
+    """Render a response, answering revalidations with 304 when the snapshot is unchanged"""
+    if version is None:
+        return _render_body(scalars, lists, None, volatile)
+    
+    etag = snapshot_etag(version)
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = _render_body(scalars, lists, version, volatile)
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def _render_body(scalars: dict, lists: list, version: Optional[int] = None,
+                 volatile: Optional[dict] = None):
+    """Render scalars plus (key, items, available_fields) lists honoring projection args.
+
+    Unprojected requests keep the original jsonify output. Projected or compact
+    requests are encoded with precompiled serializers. When a snapshot version
+    is given the encoded body goes through the result cache, keyed by the
+    parsed projection, so repeated queries skip serialization until the next
+    snapshot. Volatile per-request fields are spliced in per response.
+    """
+    requested, output_format = _projection_args()
+    compact = output_format == FORMAT_COMPACT
+    
+    # One ?fields= value may span several models; it only has to match one of them
+    _validate_projection(*(available for _, _, available in lists))
+    strict = len(lists) == 1
+    detail = requested is None and _wants_detail()
+    projections = [(key, items, available if detail else resolve_fields(requested, available, strict))
+                   for key, items, available in lists]
+    
+    if compact:
+        scalars = dict(scalars, fields={key: list(fields) for key, _, fields in projections})
+    
+    if _wants_stream():
+        return streaming_json_response(iter_json_object(dict(scalars, **(volatile or {})), [
+            (key, items, compile_serializer(fields, compact)) for key, items, fields in projections
+        ]))
+    
+    plain = requested is None and not compact and not detail
+    if plain and version is None:
+        with phase('serialize'):
+            result = dict(scalars, **(volatile or {}))
+            for key, items, _ in projections:
+                result[key] = [item.to_dict() for item in items]
+            return jsonify(result)
+    
+    cache_key = None
+    if version is not None:
+        cache_key = result_key(version, 'plain' if plain else output_format,
+                               *(fields for _, _, fields in projections))
+        with phase('cache'):
+            body = result_cache.get(cache_key)
+        if body is not None:
+            return json_response(body, volatile)
+    
+    with phase('serialize'):
+        if plain:
+            result = dict(scalars)
+            for key, items, _ in projections:
+                result[key] = [item.to_dict() for item in items]
+            body = jsonify(result).get_data()
+        else:
+            body = encode_projected_body(scalars, [
+                (key, items, fields, compact) for key, items, fields in projections
+            ]).encode()
+    if cache_key is not None:
+        with phase('cache'):
+            result_cache.put(cache_key, body)
+    return json_response(body, volatile)
+
+class NotCollecting(Exception):
+    """Raised instead of fetching on a replica that follows the collecting one"""
+
+    retry_after_header = '2'
+
+    def __init__(self, cluster_name: str):
+        super().__init__(f"cluster {cluster_name} is collected by another replica; "
+                         "waiting for its first snapshot")
+
+def _fetch_fresh(kind: str) -> Tuple[ClusterData, str]:
+    """Fetch from the API server under admission control and update the cache.
+
+    Returns the data with its source. Only the replica holding the cluster's
+    lease lists the API server ('fresh'); followers return the latest
+    replicated snapshot ('replicated'), or raise NotCollecting until the
+    first one arrives.
+    """
+    if interrogator and not interrogator.is_collecting():
+        cached_data, _ = cache.get_snapshot()
+        if cached_data is None:
+            raise NotCollecting(current_cluster().name)
+        return cached_data, 'replicated'
+    permit = admission.acquire(kind) if admission else None
+    try:
+        with phase('k8s'):
+            cluster_data = k8s_service.fetch_cluster_data()
+    finally:
+        if permit:
+            permit.release()
+    with phase('cache'):
+        cache.update_data(cluster_data)
+    return cluster_data, 'fresh'
+
+def _fetch_rejected(e):
+    """429 when admission control refused the fetch, 503 on a follower without a snapshot yet"""
+    response = jsonify({"error": str(e)})
+    response.status_code = 503 if isinstance(e, NotCollecting) else 429
+    response.headers['Retry-After'] = e.retry_after_header
+    return response
+
+def _over_budget(e: FetchBudgetExceeded, render):
+    """Serve the cached snapshot (however old) with Retry-After, or 429 without one"""
+    cached_data, version = cache.get_snapshot()
+    if not cached_data:
+        return _fetch_rejected(e)
+    response = render(cached_data, version)
+    response.headers['Retry-After'] = e.retry_after_header
+    return response
+
+def _info_scalars(cluster_data: ClusterData, source: str, version: int) -> dict:
+    """Metadata fields of a cluster info response"""
+    return {
+        "podCount": cluster_data.pod_count,
+        "deploymentCount": cluster_data.deployment_count,
+        "fetchTimestamp": cluster_data.fetch_timestamp,
+        "source": source,
+        "version": version
+    }
+
+def _info_lists(cluster_data: ClusterData) -> list:
+    """List fields of a cluster info response"""
+    return [
+        ("pods", cluster_data.pods, POD_FIELDS),
+        ("deployments", cluster_data.deployments, DEPLOYMENT_FIELDS)
+    ]
+
 @cluster_bp.route('/api/cluster/info', methods=['GET'])
 def get_cluster_info():
     """Get cluster information from cache or fresh from API"""
     try:
+        _validate_projection(POD_FIELDS, DEPLOYMENT_FIELDS)
         force_refresh = request.args.get('force', 'false').lower() == 'true'
         
         # Check if we should use cache or fetch fresh data
-        if not force_refresh and cache.is_valid() and not cache.is_stale(CACHE_MAX_AGE_SECONDS):
+        with phase('cache'):
+            use_cache = not force_refresh and cache.is_valid() and not cache.is_stale(CACHE_MAX_AGE_SECONDS)
+            cached_data, version = cache.get_snapshot() if use_cache else (None, None)
+        if use_cache:
             # Return cached data
-            cached_data = cache.get_data()
             if cached_data:
-                result = cached_data.to_dict()
-                result['source'] = 'cache'
-                result['cacheAge'] = cache.get_cache_age()
-                
                 # Publish access event
                 if nats_service:
                     event = {
                         "action": "cluster_info_accessed",
                         "source": "python-k8s-manager",
+                        "cluster": current_cluster().name,
                         "timestamp": int(time.time() * 1000),
                         "podCount": cached_data.pod_count,
                         "fromCache": True
                     }
-                    nats_service.publish_sync("k8s.events", event)
+                    with phase('nats'):
+                        nats_service.publish_sync("k8s.events", event)
                 
-                return jsonify(result)
+                cache_age = cache.get_cache_age()
+                response = _render(_info_scalars(cached_data, 'cache', version),
+                                   _info_lists(cached_data), version,
+                                   volatile={'cacheAge': cache_age})
+                response.headers['Age'] = str(int(cache_age))
+                return response
         
         # Fetch fresh data
-        cluster_data = k8s_service.fetch_cluster_data()
-        cache.update_data(cluster_data)
-        
-        result = cluster_data.to_dict()
-        result['source'] = 'fresh'
+        fetch_kind = AdmissionController.FORCED if force_refresh else AdmissionController.MISS
+        try:
+            cluster_data, source = _fetch_fresh(fetch_kind)
+        except FetchBudgetExceeded as e:
+            return _over_budget(e, lambda data, version: _render(
+                _info_scalars(data, 'cache', version), _info_lists(data), version,
+                volatile={'cacheAge': cache.get_cache_age()}))
+        except NotCollecting as e:
+            return _fetch_rejected(e)
+        version = cache.get_version()
         
         # Publish access event
         if nats_service:
             event = {
                 "action": "cluster_info_accessed",
-                "source": "python-k8s-manager", 
+                "source": "python-k8s-manager",
+                "cluster": current_cluster().name,
                 "timestamp": int(time.time() * 1000),
                 "podCount": cluster_data.pod_count,
-                "fromCache": False
+                "fromCache": source != 'fresh'
             }
-            nats_service.publish_sync("k8s.events", event)
+            with phase('nats'):
+                nats_service.publish_sync("k8s.events", event)
         
-        return jsonify(result)
+        return _render(_info_scalars(cluster_data, source, version), _info_lists(cluster_data))
         
+    except ProjectionError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -70,25 +272,30 @@ def get_cluster_info():
 def get_pods():
     """Get only pod information"""
     try:
-        if cache.is_valid() and not cache.is_stale(CACHE_MAX_AGE_SECONDS):
-            cached_data = cache.get_data()
+        _validate_projection(POD_FIELDS)
+        with phase('cache'):
+            fresh = cache.is_valid() and not cache.is_stale(CACHE_MAX_AGE_SECONDS)
+            cached_data, version = cache.get_snapshot() if fresh else (None, None)
+        if fresh:
             if cached_data:
-                return jsonify({
-                    "pods": [pod.to_dict() for pod in cached_data.pods],
-                    "count": len(cached_data.pods),
-                    "source": "cache"
-                })
+                return _render({"count": len(cached_data.pods), "source": "cache"},
+                               [("pods", cached_data.pods, POD_FIELDS)], version)
         
         # Fetch fresh if cache invalid/stale
-        cluster_data = k8s_service.fetch_cluster_data()
-        cache.update_data(cluster_data)
+        try:
+            cluster_data, source = _fetch_fresh(AdmissionController.MISS)
+        except FetchBudgetExceeded as e:
+            return _over_budget(e, lambda data, version: _render(
+                {"count": len(data.pods), "source": "cache"},
+                [("pods", data.pods, POD_FIELDS)], version))
+        except NotCollecting as e:
+            return _fetch_rejected(e)
         
-        return jsonify({
-            "pods": [pod.to_dict() for pod in cluster_data.pods],
-            "count": len(cluster_data.pods),
-            "source": "fresh"
-        })
+        return _render({"count": len(cluster_data.pods), "source": source},
+                       [("pods", cluster_data.pods, POD_FIELDS)])
         
+    except ProjectionError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -96,31 +303,202 @@ def get_pods():
 def get_deployments():
     """Get only deployment information"""
     try:
-        if cache.is_valid() and not cache.is_stale(CACHE_MAX_AGE_SECONDS):
-            cached_data = cache.get_data()
+        _validate_projection(DEPLOYMENT_FIELDS)
+        with phase('cache'):
+            fresh = cache.is_valid() and not cache.is_stale(CACHE_MAX_AGE_SECONDS)
+            cached_data, version = cache.get_snapshot() if fresh else (None, None)
+        if fresh:
             if cached_data:
-                return jsonify({
-                    "deployments": [dep.to_dict() for dep in cached_data.deployments],
-                    "count": len(cached_data.deployments),
-                    "source": "cache"
-                })
+                return _render({"count": len(cached_data.deployments), "source": "cache"},
+                               [("deployments", cached_data.deployments, DEPLOYMENT_FIELDS)], version)
         
         # Fetch fresh if cache invalid/stale
-        cluster_data = k8s_service.fetch_cluster_data()
-        cache.update_data(cluster_data)
+        try:
+            cluster_data, source = _fetch_fresh(AdmissionController.MISS)
+        except FetchBudgetExceeded as e:
+            return _over_budget(e, lambda data, version: _render(
+                {"count": len(data.deployments), "source": "cache"},
+                [("deployments", data.deployments, DEPLOYMENT_FIELDS)], version))
+        except NotCollecting as e:
+            return _fetch_rejected(e)
+        
+        return _render({"count": len(cluster_data.deployments), "source": source},
+                       [("deployments", cluster_data.deployments, DEPLOYMENT_FIELDS)])
+        
+    except ProjectionError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@cluster_bp.route('/api/cluster/summary', methods=['GET'])
+def get_summary():
+    """Get pod and deployment counts without the object lists.
+    
+    Served from aggregates the cache keeps current from each snapshot diff, so
+    the response size and cost scale with namespaces rather than pods.
+    """
+    try:
+        with phase('cache'):
+            summary = cache.get_summary()
+        if summary is None:
+            # Nothing collected yet: fetch once so the cache builds the aggregates
+            try:
+                _fetch_fresh(AdmissionController.MISS)
+            except (FetchBudgetExceeded, NotCollecting) as e:
+                return _fetch_rejected(e)
+            summary = cache.get_summary()
+        
+        etag = snapshot_etag(summary["version"])
+        with phase('serialize'):
+            response = Response(status=304) if request.if_none_match.contains_weak(etag) else jsonify(summary)
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def _int_arg(name: str, default: int, minimum: int, maximum: int) -> int:
+    """Parse a bounded integer query parameter (raises ValueError on bad input)"""
+    raw = request.args.get(name)
+    if raw is None:
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer")
+    if not minimum <= value <= maximum:
+        raise ValueError(f"{name} must be between {minimum} and {maximum}")
+    return value
+
+@cluster_bp.route('/api/cluster/search', methods=['GET'])
+def search_names():
+    """Typeahead search over pod and deployment names.
+    
+    ?q= is matched case-insensitively against names; results are ranked exact,
+    prefix, then substring and capped at ?limit=. Optional ?kind=pod|deployment
+    and ?namespace= narrow the results.
+    """
+    try:
+        if not search:
+            return jsonify({"error": "search not available"}), 503
+        
+        query = request.args.get('q', '')
+        if not query.strip():
+            return jsonify({"error": "q parameter is required"}), 400
+        limit = _int_arg('limit', SEARCH_DEFAULT_LIMIT, 1, SEARCH_MAX_LIMIT)
+        kind = request.args.get('kind')
+        if kind is not None and kind not in KINDS:
+            return jsonify({"error": f"kind must be one of: {', '.join(KINDS)}"}), 400
+        
+        if search.get_version() == 0:
+            # Nothing indexed yet: fetch once, the cache listener builds the index
+            try:
+                _fetch_fresh(AdmissionController.MISS)
+            except (FetchBudgetExceeded, NotCollecting) as e:
+                return _fetch_rejected(e)
+        
+        namespace = request.args.get('namespace')
+        with phase('cache'):
+            body = result_cache.get(result_key(search.get_version(), query, limit, kind, namespace))
+        if body is None:
+            with phase('search'):
+                result = search.search(query, limit, kind, namespace)
+            with phase('serialize'):
+                body = jsonify(result).get_data()
+            # Keyed by the version actually searched, which may be newer than the one looked up
+            result_cache.put(result_key(result["version"], query, limit, kind, namespace), body)
+        return json_response(body)
+        
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def _derived_response(name: str, service, render):
+    """Serve a view the cache listener derives from each snapshot (topology, usage).
+
+    Fetches once when nothing has been collected yet, answers 304 when the
+    client's ETag is still current, and otherwise sends render()'s
+    (version, body). 503 while the service has nothing to render.
+    """
+    version = service.get_version()
+    if version is None:
+        # Nothing collected yet: fetch once, the cache listener builds the view
+        try:
+            _fetch_fresh(AdmissionController.MISS)
+        except (FetchBudgetExceeded, NotCollecting) as e:
+            return _fetch_rejected(e)
+        version = service.get_version()
+        if version is None:
+            return jsonify({"error": f"{name} not available yet"}), 503
+    
+    etag = snapshot_etag(version)
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        with phase('serialize'):
+            rendered = render()
+        if rendered is None:
+            return jsonify({"error": f"{name} not available yet"}), 503
+        version, body = rendered
+        etag = snapshot_etag(version)
+        response = Response(body, mimetype='application/json')
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@cluster_bp.route('/api/cluster/topology', methods=['GET'])
+def get_topology():
+    """Get the namespace/deployment/pod topology of the latest snapshot.
+    
+    Groups larger than max_group are collapsed into aggregate nodes with a count
+    and per-phase breakdown; pass their ids in ?expand= (comma separated) to
+    open them. Expanded pod lists are capped at max_pods.
+    """
+    try:
+        if not topology:
+            return jsonify({"error": "topology not available"}), 503
+        
+        expand = frozenset(filter(None, (part.strip() for part in request.args.get('expand', '').split(','))))
+        max_group = _int_arg('max_group', TOPOLOGY_MAX_GROUP, 1, 10000)
+        max_pods = _int_arg('max_pods', TOPOLOGY_MAX_PODS, 1, 10000)
+        
+        return _derived_response('topology', topology,
+                                 lambda: topology.get_topology(expand, max_group, max_pods))
+        
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@cluster_bp.route('/api/cluster/usage', methods=['GET'])
+def get_usage():
+    """Get pod CPU/memory usage rolled up from the latest snapshot.
+    
+    ?by=namespace|deployment|node (default namespace) returns the top ?limit=
+    groups by ?sort=cpu|memory usage, each with usage and request sums,
+    utilization and p50/p90/p99 of its pods; ?by=pod returns the top pods.
+    Cluster totals are always included. Rollups are computed once per
+    snapshot, so "available": false means the snapshot has no usage
+    (metrics-server missing or POD_USAGE_SOURCE=none).
+    """
+    try:
+        if not usage:
+            return jsonify({"error": "usage not available"}), 503
+        
+        by = request.args.get('by', 'namespace')
+        sort = request.args.get('sort', 'cpu')
+        limit = _int_arg('limit', USAGE_DEFAULT_LIMIT, 1, USAGE_MAX_LIMIT)
         
-        return jsonify({
-            "deployments": [dep.to_dict() for dep in cluster_data.deployments],
-            "count": len(cluster_data.deployments),
-            "source": "fresh"
-        })
+        return _derived_response('usage', usage, lambda: usage.get_usage(by, sort, limit))
         
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-def init_cluster_routes(k8s_svc, cache_svc, nats_svc):
+def init_cluster_routes(nats_svc):
     """Initialize route dependencies"""
-    global k8s_service, cache, nats_service
-    k8s_service = k8s_svc
-    cache = cache_svc 
+    global nats_service
     nats_service = nats_svc
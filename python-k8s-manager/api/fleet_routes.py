@@ -0,0 +1,116 @@
+import time
+import zlib
+from flask import Blueprint, Response, jsonify, request
+from services.cluster_registry import ClusterRegistry
+from api.result_cache import BOOT_TOKEN
+from typing import Optional
+
+fleet_bp = Blueprint('fleet', __name__)
+
+# Will be set by main app
+clusters: Optional[ClusterRegistry] = None
+
+@fleet_bp.route('/api/fleet/clusters', methods=['GET'])
+def list_clusters():
+    """List configured clusters with their connection state and cache freshness"""
+    if not clusters:
+        return jsonify({"error": "cluster registry not available"}), 503
+
+    now = time.time()
+    result = []
+    for context in clusters.contexts():
+        _, version = context.cache.get_snapshot()
+        result.append({
+            "name": context.name,
+            "kubeContext": context.kube_context,
+            "default": context.name == clusters.default_name,
+            "ready": context.is_ready(),
+            "readySeconds": now - context.ready_time if context.ready_time else None,
+            "lastError": context.last_error,
+            "version": version,
+            "cacheAge": context.cache.get_cache_age() if version else None
+        })
+    return jsonify({"count": len(result), "clusters": result})
+
+@fleet_bp.route('/api/fleet/summary', methods=['GET'])
+def get_fleet_summary():
+    """Totals across every cluster plus each cluster's headline numbers.
+
+    Built from each cluster's incrementally maintained summary, so the cost is
+    per cluster, not per pod. Clusters that haven't been collected yet are
+    listed as unavailable and left out of the totals.
+    """
+    if not clusters:
+        return jsonify({"error": "cluster registry not available"}), 503
+
+    try:
+        summaries = [(context, context.cache.get_summary()) for context in clusters.contexts()]
+
+        # The fleet view changes whenever any cluster's snapshot does
+        versions = ','.join(f"{context.name}={summary['version'] if summary else 0}"
+                            for context, summary in summaries)
+        etag = f'fleet-{BOOT_TOKEN}-{zlib.crc32(versions.encode()):08x}'
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+            response.set_etag(etag, weak=True)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+
+        pods_by_phase = {}
+        pod_count = deployment_count = replicas = ready_replicas = degraded = 0
+        per_cluster = {}
+        for context, summary in summaries:
+            if not summary:
+                per_cluster[context.name] = {
+                    "available": False,
+                    "ready": context.is_ready(),
+                    "lastError": context.last_error
+                }
+                continue
+
+            readiness = summary["readiness"]
+            pod_count += summary["podCount"]
+            deployment_count += summary["deploymentCount"]
+            replicas += readiness["replicas"]
+            ready_replicas += readiness["readyReplicas"]
+            degraded += readiness["degradedDeployments"]
+            for phase, count in summary["podsByPhase"].items():
+                pods_by_phase[phase] = pods_by_phase.get(phase, 0) + count
+
+            per_cluster[context.name] = {
+                "available": True,
+                "ready": context.is_ready(),
+                "version": summary["version"],
+                "fetchTimestamp": summary["fetchTimestamp"],
+                "podCount": summary["podCount"],
+                "deploymentCount": summary["deploymentCount"],
+                "podsByPhase": summary["podsByPhase"],
+                "readiness": readiness,
+                "lastError": context.last_error
+            }
+
+        response = jsonify({
+            "clusterCount": len(summaries),
+            "availableClusters": sum(1 for _, summary in summaries if summary),
+            "podCount": pod_count,
+            "deploymentCount": deployment_count,
+            "podsByPhase": pods_by_phase,
+            "readiness": {
+                "replicas": replicas,
+                "readyReplicas": ready_replicas,
+                "ratio": round(ready_replicas / replicas, 4) if replicas else 1.0,
+                "degradedDeployments": degraded
+            },
+            "clusters": per_cluster
+        })
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def init_fleet_routes(registry):
+    """Initialize route dependencies"""
+    global clusters
+    clusters = registry
@@ -0,0 +1,49 @@
+from flask import Blueprint, jsonify, request
+from services.history_service import HistoryQueryError
+from api.cluster_context import cluster_service, require_cluster
+
+history_bp = Blueprint('history', __name__)
+history_bp.before_request(require_cluster)
+
+# Services of the cluster named by ?cluster=, resolved per request
+history = cluster_service('history')
+
+@history_bp.route('/api/history/series', methods=['GET'])
+def list_series():
+    """List recorded metric series and how far back each resolution reaches"""
+    if not history:
+        return jsonify({"error": "history not available"}), 503
+    return jsonify({
+        "series": history.history.series(),
+        "stats": history.get_stats()
+    })
+
+@history_bp.route('/api/history/query', methods=['GET'])
+def query_history():
+    """Windowed aggregates of metric series over a time range.
+    
+    ?series=pods,pods.ns.default  series names (see /api/history/series)
+    ?start=-6h&end=               epoch seconds or relative offsets (default: last hour)
+    ?step=60                      window size in seconds (default: fits the range)
+    ?agg=avg|min|max|rate         window aggregate (default: avg)
+    """
+    if not history:
+        return jsonify({"error": "history not available"}), 503
+    
+    names = [name.strip() for name in request.args.get('series', '').split(',') if name.strip()]
+    if not names:
+        return jsonify({"error": "series parameter is required"}), 400
+    
+    try:
+        result = history.query(
+            names,
+            request.args.get('start'),
+            request.args.get('end'),
+            request.args.get('step'),
+            request.args.get('agg', 'avg')
+        )
+        return jsonify(result)
+    except HistoryQueryError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
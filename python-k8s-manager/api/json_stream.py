@@ -0,0 +1,46 @@
+import json
+from flask import Response
+from typing import Any, Callable, Dict, Iterable, Iterator, Tuple
+
+# Items encoded per yielded chunk; bounds per-request memory regardless of list size
+DEFAULT_CHUNK_SIZE = 500
+
+_encode = json.JSONEncoder(separators=(',', ':')).encode
+
+def iter_json_object(scalars: Dict[str, Any],
+                     lists: Iterable[Tuple[str, Iterable[Any], Callable[[Any], Any]]],
+                     chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+    """Incrementally encode a JSON object made of scalar fields and large lists.
+
+    Scalars are written first so clients get counts and metadata in the first
+    chunk; each list is then encoded chunk_size items at a time using its
+    serializer (item -> JSON-compatible value).
+    """
+    head = _encode(scalars)
+    # Reopen the scalar object so lists can be appended to it
+    yield head[:-1]
+    first_field = head == '{}'
+
+    for key, items, serializer in lists:
+        prefix = '' if first_field else ','
+        first_field = False
+        yield f'{prefix}{_encode(key)}:['
+
+        batch = []
+        first_batch = True
+        for item in items:
+            batch.append(_encode(serializer(item)))
+            if len(batch) >= chunk_size:
+                yield ('' if first_batch else ',') + ','.join(batch)
+                first_batch = False
+                batch = []
+        if batch:
+            yield ('' if first_batch else ',') + ','.join(batch)
+        yield ']'
+
+    yield '}'
+
+def streaming_json_response(chunks: Iterator[str], status: int = 200) -> Response:
+    """Wrap encoded chunks in a chunked application/json response"""
+    return Response(chunks, status=status, mimetype='application/json',
+                    headers={'X-Accel-Buffering': 'no'})
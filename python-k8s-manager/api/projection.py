@@ -0,0 +1,89 @@
+import json
+from dataclasses import fields as dataclass_fields
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Callable, Dict, Optional, Tuple
+from models.cluster_data import PodInfo, DeploymentInfo
+
+# Pod detail fields are opt-in (?fields= or ?detail=true) so default responses keep their size
+POD_DETAIL_FIELDS: Tuple[str, ...] = (
+    'node_name', 'restarts', 'ready_containers', 'container_count', 'containers',
+    'owner_kind', 'owner_name', 'owner_references', 'cpu_request_millis', 'memory_request_bytes'
+)
+POD_FIELDS: Tuple[str, ...] = tuple(f.name for f in dataclass_fields(PodInfo) if f.name != 'details') + POD_DETAIL_FIELDS
+DEPLOYMENT_FIELDS: Tuple[str, ...] = tuple(f.name for f in dataclass_fields(DeploymentInfo))
+
+OPT_IN_FIELDS = frozenset(POD_DETAIL_FIELDS)
+
+FORMAT_OBJECTS = 'objects'
+FORMAT_COMPACT = 'compact'
+
+class ProjectionError(ValueError):
+    """Invalid ?fields= or ?format= value"""
+
+def parse_fields(raw: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """Parse a ?fields= value into a de-duplicated, ordered tuple (None = all fields)"""
+    if not raw:
+        return None
+    requested = []
+    for name in raw.split(','):
+        name = name.strip()
+        if name and name not in requested:
+            requested.append(name)
+    return tuple(requested) or None
+
+def resolve_fields(requested: Optional[Tuple[str, ...]], available: Tuple[str, ...],
+                   strict: bool = True) -> Tuple[str, ...]:
+    """Restrict requested fields to those a model has.
+
+    With strict=True unknown names raise ProjectionError; otherwise they are dropped
+    (used when one ?fields= value applies to several models).
+    """
+    if requested is None:
+        return default_fields(available)
+    unknown = [name for name in requested if name not in available]
+    if unknown and strict:
+        raise ProjectionError(f"unknown fields: {', '.join(unknown)} (available: {', '.join(available)})")
+    return tuple(name for name in requested if name in available)
+
+def default_fields(available: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Fields returned when no projection is requested (everything except opt-in fields)"""
+    return tuple(name for name in available if name not in OPT_IN_FIELDS)
+
+def parse_format(raw: Optional[str]) -> str:
+    """Parse a ?format= value"""
+    value = (raw or FORMAT_OBJECTS).lower()
+    if value not in (FORMAT_OBJECTS, FORMAT_COMPACT):
+        raise ProjectionError(f"unknown format: {raw} (expected '{FORMAT_OBJECTS}' or '{FORMAT_COMPACT}')")
+    return value
+
+@lru_cache(maxsize=256)
+def compile_serializer(fields: Tuple[str, ...], compact: bool) -> Callable[[Any], Any]:
+    """Build (once per projection) a serializer mapping a model object to JSON-ready data.
+
+    Compact serializers return a row tuple in field order; object serializers
+    return a dict with only the projected keys.
+    """
+    if not fields:
+        return (lambda obj: ()) if compact else (lambda obj: {})
+
+    getter = attrgetter(*fields)
+    if len(fields) == 1:
+        name = fields[0]
+        if compact:
+            return lambda obj: (getter(obj),)
+        return lambda obj: {name: getter(obj)}
+
+    if compact:
+        return getter
+    return lambda obj: dict(zip(fields, getter(obj)))
+
+_encode = json.JSONEncoder(separators=(',', ':')).encode
+
+def encode_projected_body(scalars: Dict[str, Any], lists) -> str:
+    """Encode scalars plus (key, items, fields, compact) lists in one pass"""
+    body = dict(scalars)
+    for key, items, fields, compact in lists:
+        serializer = compile_serializer(fields, compact)
+        body[key] = [serializer(item) for item in items]
+    return _encode(body)
@@ -0,0 +1,86 @@
+from flask import Blueprint, Response, jsonify, request
+from services.admission_service import AdmissionController, FetchBudgetExceeded
+from api.cluster_context import cluster_service, require_ready_cluster
+from api.result_cache import json_response, result_cache, result_key, snapshot_etag
+
+resource_bp = Blueprint('resources', __name__)
+resource_bp.before_request(require_ready_cluster)
+
+# Services of the cluster named by ?cluster=, resolved per request
+resources = cluster_service('resources')
+scheduler = cluster_service('collectors')
+admission = cluster_service('admission')
+
+@resource_bp.route('/api/cluster/resources', methods=['GET'])
+def list_resource_kinds():
+    """List collected kinds with their counts, ages and schedules"""
+    if not scheduler:
+        return jsonify({"error": "resource collectors not available"}), 503
+    return jsonify({
+        "kinds": scheduler.kinds(),
+        "cache": resources.get_stats(),
+        "collectors": scheduler.get_stats()["collectors"]
+    })
+
+@resource_bp.route('/api/cluster/resources/<kind>', methods=['GET'])
+def get_resources(kind):
+    """Get the latest collected objects of one kind (?namespace= filters)"""
+    try:
+        if not scheduler:
+            return jsonify({"error": "resource collectors not available"}), 503
+        if kind not in scheduler.kinds():
+            return jsonify({"error": f"unknown kind: {kind} (available: {', '.join(scheduler.kinds())})"}), 404
+        
+        snapshot = resources.get(kind)
+        if snapshot is None:
+            response = jsonify({"error": f"{kind} not collected yet"})
+            response.status_code = 503
+            response.headers['Retry-After'] = '2'
+            return response
+        
+        etag = snapshot_etag(snapshot.version)
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+        else:
+            namespace = request.args.get('namespace')
+            key = result_key(snapshot.version, namespace)
+            body = result_cache.get(key)
+            if body is None:
+                items = snapshot.items if namespace is None else [
+                    item for item in snapshot.items if item.get("namespace") == namespace
+                ]
+                body = jsonify({
+                    "kind": kind,
+                    "count": len(items),
+                    "version": snapshot.version,
+                    "fetchTimestamp": snapshot.fetch_timestamp,
+                    "items": items
+                }).get_data()
+                result_cache.put(key, body)
+            response = json_response(body)
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@resource_bp.route('/api/cluster/resources/<kind>/refresh', methods=['POST'])
+def refresh_resources(kind):
+    """Collect one kind now instead of waiting for its interval"""
+    if not scheduler:
+        return jsonify({"error": "resource collectors not available"}), 503
+    if kind not in scheduler.kinds():
+        return jsonify({"error": f"unknown kind: {kind}"}), 404
+    if not scheduler.is_running():
+        # Followers get the collecting replica's next result for the kind
+        return jsonify({"message": f"{kind} refresh left to the collecting replica"})
+    try:
+        permit = admission.acquire(AdmissionController.FORCED)
+    except FetchBudgetExceeded as e:
+        response = jsonify({"error": str(e), "retryAfter": e.retry_after})
+        response.status_code = 429
+        response.headers['Retry-After'] = e.retry_after_header
+        return response
+    scheduler.refresh(kind, permit)
+    return jsonify({"message": f"{kind} refresh triggered"}), 202
@@ -0,0 +1,143 @@
+import json
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from flask import Response, request
+from api.cluster_context import current_cluster
+from typing import Any, Dict, Optional, Set, Tuple
+
+_encode = json.JSONEncoder(separators=(',', ':')).encode
+
+# Snapshot versions count from 0 in every process. The boot token keeps an ETag
+# from a previous run, or from another replica behind the same Service, from
+# matching a different snapshot that happens to have the same version.
+BOOT_TOKEN = os.urandom(4).hex()
+
+class ResultCache:
+    """LRU cache of encoded response bodies, bounded by total bytes and entry count.
+
+    Keys are (cluster, route, normalized parameters, snapshot version), so a
+    new snapshot never serves an old body and nothing has to be invalidated
+    explicitly. Storing a body for a newer version of a route drops that
+    route's bodies for older versions right away rather than leaving them to
+    age out of the LRU.
+    """
+
+    def __init__(self, max_bytes: int = 64 << 20, max_entries: int = 1024, max_entry_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        # One huge body shouldn't flush everything else
+        self.max_entry_bytes = max_entry_bytes or max_bytes // 4
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple, bytes]" = OrderedDict()
+        self._routes: Dict[Tuple[str, str], Set[Tuple]] = {}
+        self._latest: Dict[Tuple[str, str], int] = {}
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._superseded = 0
+        self._rejected = 0
+        self._route_stats: Dict[str, list] = {}
+
+    @classmethod
+    def from_env(cls) -> 'ResultCache':
+        """Limits from RESULT_CACHE_MAX_MB (default 64) and RESULT_CACHE_MAX_ENTRIES (default 1024)"""
+        return cls(max_bytes=int(float(os.getenv("RESULT_CACHE_MAX_MB", "64")) * (1 << 20)),
+                   max_entries=int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "1024")))
+
+    def get(self, key: Tuple) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get(key)
+            route = self._route_stats.setdefault(key[1], [0, 0])
+            if body is None:
+                self._misses += 1
+                route[1] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            route[0] += 1
+            return body
+
+    def put(self, key: Tuple, body: bytes) -> None:
+        if self.max_bytes <= 0 or len(body) > self.max_entry_bytes:
+            with self._lock:
+                self._rejected += 1
+            return
+        route, version = key[:2], key[-1]
+        with self._lock:
+            latest = self._latest.get(route)
+            if latest is not None and version < latest:
+                # A newer snapshot already replaced this one
+                return
+            if latest is not None and version > latest:
+                for stale in [k for k in self._routes.get(route, ()) if k[-1] < version]:
+                    self._remove(stale)
+                    self._superseded += 1
+            self._latest[route] = version
+
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = body
+            self._routes.setdefault(route, set()).add(key)
+            self._bytes += len(body)
+            while self._bytes > self.max_bytes or len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self._evictions += 1
+
+    def _remove(self, key: Tuple) -> None:
+        body = self._entries.pop(key)
+        self._bytes -= len(body)
+        keys = self._routes[key[:2]]
+        keys.discard(key)
+        if not keys:
+            del self._routes[key[:2]]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._routes.clear()
+            self._latest.clear()
+            self._bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "maxBytes": self.max_bytes,
+                "maxEntries": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hitRate": round(self._hits / lookups, 4) if lookups else None,
+                "evictions": self._evictions,
+                "superseded": self._superseded,
+                "rejectedTooLarge": self._rejected,
+                "routes": {path: {"hits": hits, "misses": misses, "hitRate": round(hits / (hits + misses), 4)}
+                           for path, (hits, misses) in sorted(self._route_stats.items())}
+            }
+
+# Shared by every route and cluster so the memory cap is global
+result_cache = ResultCache.from_env()
+
+def result_key(version: int, *params) -> Tuple:
+    """Key for this request: cluster, route, its parsed (normalized) parameters and the snapshot version.
+
+    Routes pass parameters after parsing and defaulting, so equivalent
+    queries (reordered, defaults spelled out or omitted) share an entry.
+    """
+    return (current_cluster().name, request.path, params, version)
+
+def json_response(body: bytes, volatile: Optional[Dict[str, Any]] = None) -> Response:
+    """Response for a cached JSON object body, with per-request fields spliced in front"""
+    if volatile and body[:1] == b'{':
+        fields = _encode(volatile)[1:-1].encode()
+        body = b'{' + fields + (b',' if body[1:2] != b'}' else b'') + body[1:]
+    return Response(body, mimetype='application/json')
+
+def snapshot_etag(version: int) -> str:
+    """Weak ETag for a response derived from one snapshot version and this query"""
+    query = '&'.join(sorted(f'{k}={v}' for k, v in request.args.items(multi=True)))
+    return f'{BOOT_TOKEN}-{version}-{zlib.crc32(f"{request.path}?{query}".encode()):08x}'
@@ -0,0 +1,42 @@
+import os
+import time
+from contextlib import contextmanager
+from flask import g, has_request_context
+from typing import Iterator
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Add the time spent in the block to this request's Server-Timing entry for name.
+
+    Phases repeated within a request add up. Outside a request (background
+    threads calling shared code) this does nothing.
+    """
+    if not has_request_context():
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases = g.setdefault('server_timing', {})
+        phases[name] = phases.get(name, 0.0) + time.perf_counter() - started
+
+def _start_timer():
+    g.request_started = time.perf_counter()
+
+def _add_header(response):
+    started = g.get('request_started')
+    if started is None:
+        return response
+    # Streamed bodies are generated after this runs, so their encoding isn't included
+    entries = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in g.get('server_timing', {}).items()]
+    entries.append(f"total;dur={(time.perf_counter() - started) * 1000:.2f}")
+    response.headers['Server-Timing'] = ', '.join(entries)
+    return response
+
+def init_server_timing(app) -> None:
+    """Emit a Server-Timing header on every response (SERVER_TIMING=false turns it off)"""
+    if os.getenv("SERVER_TIMING", "true").lower() == "false":
+        return
+    app.before_request(_start_timer)
+    app.after_request(_add_header)
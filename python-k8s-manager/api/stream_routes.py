@@ -0,0 +1,31 @@
+from flask import Blueprint, Response, jsonify
+from api.cluster_context import cluster_service, require_cluster
+
+stream_bp = Blueprint('stream', __name__)
+stream_bp.before_request(require_cluster)
+
+# Services of the cluster named by ?cluster=, resolved per request
+broadcaster = cluster_service('broadcaster')
+
+@stream_bp.route('/api/stream/updates', methods=['GET'])
+def stream_updates():
+    """Server-Sent Events stream of snapshot versions and diffs"""
+    if not broadcaster:
+        return jsonify({"error": "update stream not available"}), 503
+
+    subscriber = broadcaster.subscribe()
+    return Response(
+        broadcaster.stream(subscriber),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
+@stream_bp.route('/api/stream/stats', methods=['GET'])
+def stream_stats():
+    """Get streaming statistics"""
+    if not broadcaster:
+        return jsonify({"error": "update stream not available"}), 503
+    return jsonify(broadcaster.get_stats())
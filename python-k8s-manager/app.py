@@ -1,3 +1,4 @@
+import logging
 import os
 from flask import Flask, jsonify
 from flask_cors import CORS
@@ -5,89 +6,195 @@ import time
 import os
 import signal
 import sys
+import threading
 import time
 
-from services.kubernetes_service import KubernetesService
-from services.cache_service import ClusterDataCache
+from concurrent.futures import ThreadPoolExecutor
+
 from services.nats_service import NatsService
-from services.interrogator_service import ClusterInterrogator
+from services.app_registry import AppRegistry
+from services.cluster_registry import ClusterContext, ClusterRegistry, configured_clusters, kubeconfig_clusters
+from services.profiling_service import MemoryTracer, SamplingProfiler
+from services.log_service import configure_logging
+from services.coordination_service import lease_backend_from_env
+from api.cluster_context import init_cluster_context
 from api.cluster_routes import cluster_bp, init_cluster_routes
 from api.cache_routes import cache_bp, init_cache_routes
+from api.stream_routes import stream_bp
+from api.history_routes import history_bp
+from api.resource_routes import resource_bp
+from api.fleet_routes import fleet_bp, init_fleet_routes
+from api.app_routes import app_bp, init_app_routes
+from api.admin_routes import admin_bp, init_admin_routes
+from api.server_timing import init_server_timing
+
+logger = logging.getLogger(__name__)
 
 class PythonK8sManager:
     """Main application class"""
     
     def __init__(self):
+        # Logs go through a queue to one writer thread so a slow stdout never blocks serving
+        self.logging = configure_logging()
         self.app = Flask(__name__)
         CORS(self.app)
+        # Per-request phase breakdown (cache, serialize, k8s, nats) in Server-Timing headers
+        init_server_timing(self.app)
         
-        # Services
-        self.k8s_service = None
-        self.cache = None
+        # Services: one context per cluster, NATS shared by all of them
+        self.clusters = ClusterRegistry()
         self.nats_service = None
-        self.interrogator = None
+        self.apps = None
+        self.lease_backend = None
+        self._collector_pool = None
+        
+        # Startup state: liveness is "process is serving", readiness is "a cluster is wired"
+        self.start_time = time.time()
+        self.ready_time = None
+        self._ready = threading.Event()
+        self._shutting_down = False
     
     def initialize_services(self):
-        """Initialize all services"""
+        """Initialize services without blocking the HTTP listener.
+        
+        Each cluster's in-process services are built inline. The Kubernetes
+        clients (one per cluster, connected concurrently) and the NATS connection
+        come up in the background, and the manager reports ready once the first
+        cluster is wired in. A cluster that is slow or unreachable only keeps its
+        own routes at 503.
+        """
+        logger.info("Initializing Python K8s Manager services")
+        
+        init_cluster_context(self.clusters)
+        init_fleet_routes(self.clusters)
+        
+        # Profiler and tracemalloc endpoints, only reachable with ADMIN_TOKEN set
+        init_admin_routes(
+            os.getenv("ADMIN_TOKEN"),
+            SamplingProfiler(max_seconds=float(os.getenv("PROFILE_MAX_SECONDS", "60"))),
+            MemoryTracer()
+        )
+        
+        # With K8S_CONTEXTS=* the cluster list comes from the kubeconfig, read in the background
+        configs = configured_clusters()
+        if configs is not None:
+            self._register_clusters(configs)
+        
+        # Liveness of the NATS apps, from their app.status heartbeats
+        self.apps = AppRegistry(ttl_seconds=float(os.getenv("APP_HEARTBEAT_TTL_SECONDS", "90")))
+        init_app_routes(self.apps)
+        
+        # NATS connects on its own loop thread; the startup event goes out once connected
+        nats_url = os.getenv("NATS_URL", "nats://nats-service:4222")
+        self.nats_service = NatsService(nats_url, app_registry=self.apps)
+        self.nats_service.on_connect(self._publish_startup_event)
+        
+        if self.nats_service.start():
+            logger.info("NATS service starting in background")
+        else:
+            logger.warning("NATS service failed to start")
+        init_cluster_routes(self.nats_service)
+        init_cache_routes(self.nats_service)
+        
+        # With LEADER_ELECTION set, one replica per cluster collects and the rest follow over NATS
         try:
-            print("Initializing Python K8s Manager services...")
-            
-            # Initialize Kubernetes service
-            self.k8s_service = KubernetesService()
-            
-            # Initialize cache
-            self.cache = ClusterDataCache()
-            
-            # Initialize NATS service
-            nats_url = os.getenv("NATS_URL", "nats://nats-service:4222")
-            self.nats_service = NatsService(nats_url)
-            
-            if self.nats_service.start():
-                print("NATS service started successfully")
-            else:
-                print("Warning: NATS service failed to start")
-            
-            # Initialize background interrogator
-            self.interrogator = ClusterInterrogator(
-                self.k8s_service, 
-                self.cache, 
-                self.nats_service,
-                interval_seconds=30
-            )
-            self.interrogator.start()
-            
-            # Initialize API routes
-            init_cluster_routes(self.k8s_service, self.cache, self.nats_service)
-            init_cache_routes(self.cache, self.interrogator, self.nats_service)
-            
-            print("All services initialized successfully")
-            
+            self.lease_backend = lease_backend_from_env()
         except Exception as e:
-            print(f"Failed to initialize services: {e}")
-            raise
+            logger.error(f"Leader election unavailable, every replica collects: {e}")
+        
+        threading.Thread(target=self._initialize_clusters, args=(configs is None,), daemon=True).start()
+    
+    def _register_clusters(self, configs):
+        """Create the in-process services for each (name, kubeconfig context) pair"""
+        for name, kube_context in configs:
+            self.clusters.register(ClusterContext.create(name, kube_context))
+        logger.info("Registered clusters", extra={"clusters": self.clusters.names()})
+    
+    def _initialize_clusters(self, discover):
+        """Connect every cluster concurrently; each one retries on its own"""
+        if discover:
+            try:
+                self._register_clusters(kubeconfig_clusters())
+            except Exception as e:
+                logger.error(f"Failed to read kubeconfig contexts: {e}")
+                return
+        
+        contexts = self.clusters.contexts()
+        if not contexts:
+            logger.warning("No clusters configured")
+            return
+        
+        # Resource collectors of every cluster share one pool; each kind has at most one run in flight
+        self._collector_pool = ThreadPoolExecutor(
+            max_workers=int(os.getenv("COLLECTOR_WORKERS", str(min(4 * len(contexts), 32)))),
+            thread_name_prefix="collector"
+        )
+        
+        with ThreadPoolExecutor(max_workers=len(contexts), thread_name_prefix="cluster-init") as pool:
+            for context in contexts:
+                pool.submit(self._connect_cluster, context)
+        
+        logger.info("All clusters initialized", extra={"seconds": round(time.time() - self.start_time, 3)})
+    
+    def _connect_cluster(self, context):
+        """Connect one cluster (retrying until it works), then start its collection"""
+        retry_seconds = float(os.getenv("K8S_INIT_RETRY_SECONDS", "5"))
+        
+        while not context.is_ready() and not self._shutting_down:
+            try:
+                context.connect(self.nats_service, self._collector_pool, interval_seconds=30,
+                                lease_backend=self.lease_backend)
+            except Exception as e:
+                context.last_error = str(e)
+                logger.warning(f"Failed to initialize cluster, retrying in {retry_seconds}s: {e}",
+                               extra={"cluster": context.name})
+                time.sleep(retry_seconds)
+        
+        if self._shutting_down:
+            return
+        
+        logger.info("Cluster initialized", extra={"cluster": context.name,
+                                                 "seconds": round(context.ready_time - self.start_time, 3)})
+        if not self._ready.is_set():
+            self.ready_time = context.ready_time
+            self._ready.set()
+    
+    def _publish_startup_event(self):
+        """Publish startup event (runs once NATS is connected)"""
+        startup_event = {
+            "action": "service_started",
+            "service": "python-k8s-manager",
+            "timestamp": int(time.time() * 1000)
+        }
+        self.nats_service.publish_sync("k8s.events", startup_event)
     
     def setup_routes(self):
         """Setup Flask routes"""
         
         @self.app.route('/health', methods=['GET'])
         def health_check():
-            """Health check endpoint"""
+            """Liveness endpoint: healthy as long as the process is serving"""
             try:
+                contexts = self.clusters.contexts()
+                default = contexts[0] if contexts else None
                 status = {
                     "status": "healthy",
+                    "ready": self._ready.is_set(),
                     "service": "python-k8s-manager",
                     "timestamp": int(time.time() * 1000),
                     "services": {
-                        "kubernetes": self.k8s_service is not None,
-                        "cache": self.cache is not None and self.cache.is_valid(),
-                        "nats": self.nats_service is not None,
-                        "interrogator": self.interrogator is not None and self.interrogator.is_running()
-                    }
+                        "kubernetes": any(context.is_ready() for context in contexts),
+                        "cache": default is not None and default.cache.is_valid(),
+                        "nats": self.nats_service is not None and self.nats_service.is_connected(),
+                        "interrogator": default is not None and default.interrogator is not None
+                                        and default.interrogator.is_running()
+                    },
+                    "clusters": {context.name: context.is_ready() for context in contexts}
                 }
                 
                 # Add cache stats if available
-                if self.cache:
-                    status["cache_stats"] = self.cache.get_stats()
+                if default:
+                    status["cache_stats"] = default.cache.get_stats()
                 
                 return jsonify(status)
                 
@@ -97,6 +204,25 @@ class PythonK8sManager:
                     "error": str(e)
                 }), 500
         
+        @self.app.route('/ready', methods=['GET'])
+        def readiness_check():
+            """Readiness endpoint: 200 once at least one cluster is connected and wired"""
+            ready = self._ready.is_set()
+            contexts = self.clusters.contexts()
+            status = {
+                "ready": ready,
+                "service": "python-k8s-manager",
+                "timestamp": int(time.time() * 1000),
+                "startupSeconds": self.ready_time - self.start_time if ready else None,
+                "services": {
+                    "kubernetes": ready,
+                    "nats": self.nats_service is not None and self.nats_service.is_connected(),
+                    "cacheWarm": any(context.cache.is_valid() for context in contexts)
+                },
+                "clusters": {context.name: context.is_ready() for context in contexts}
+            }
+            return jsonify(status), 200 if ready else 503
+        
         @self.app.route('/api/status', methods=['GET'])
         def get_status():
             """Detailed status endpoint"""
@@ -108,17 +234,19 @@ class PythonK8sManager:
                     "services": {}
                 }
                 
-                if self.k8s_service:
-                    status["services"]["kubernetes"] = {"status": "connected"}
+                if self.nats_service:
+                    status["services"]["nats"] = {
+                        "status": "connected" if self.nats_service.is_connected() else "connecting"
+                    }
                 
-                if self.cache:
-                    status["services"]["cache"] = self.cache.get_stats()
+                if self.apps:
+                    status["services"]["apps"] = self.apps.get_stats()
                 
-                if self.interrogator:
-                    status["services"]["interrogator"] = self.interrogator.get_status()
+                status["services"]["logging"] = self.logging.get_stats()
                 
-                if self.nats_service:
-                    status["services"]["nats"] = {"status": "connected"}
+                # Cache, interrogator, stream, admission, topology, history, search, collectors and replication per cluster
+                status["defaultCluster"] = self.clusters.default_name
+                status["clusters"] = {context.name: context.get_status() for context in self.clusters.contexts()}
                 
                 return jsonify(status)
                 
@@ -128,11 +256,17 @@ class PythonK8sManager:
         # Register blueprints
         self.app.register_blueprint(cluster_bp)
         self.app.register_blueprint(cache_bp)
+        self.app.register_blueprint(stream_bp)
+        self.app.register_blueprint(history_bp)
+        self.app.register_blueprint(resource_bp)
+        self.app.register_blueprint(fleet_bp)
+        self.app.register_blueprint(app_bp)
+        self.app.register_blueprint(admin_bp)
     
     def setup_signal_handlers(self):
         """Setup graceful shutdown"""
         def signal_handler(signum, frame):
-            print("\nShutting down Python K8s Manager...")
+            logger.info("Shutting down Python K8s Manager")
             self.shutdown()
             sys.exit(0)
         
@@ -141,51 +275,70 @@ class PythonK8sManager:
     
     def shutdown(self):
         """Graceful shutdown"""
+        self._shutting_down = True
         try:
-            if self.interrogator:
-                self.interrogator.stop()
+            for context in self.clusters.contexts():
+                context.stop()
+            
+            if self._collector_pool:
+                self._collector_pool.shutdown(wait=False)
             
             if self.nats_service:
                 self.nats_service.stop()
             
-            print("Python K8s Manager shutdown complete")
+            logger.info("Python K8s Manager shutdown complete")
             
         except Exception as e:
-            print(f"Error during shutdown: {e}")
+            logger.error(f"Error during shutdown: {e}")
+        finally:
+            # Flushes whatever is still queued
+            self.logging.stop()
     
     def run(self, host='0.0.0.0', port=8080, debug=False):
         """Run the application"""
         self.start_time = time.time()
         
         try:
-            self.initialize_services()
+            # Routes first so the listener can answer liveness probes immediately
             self.setup_routes()
+            self.initialize_services()
             self.setup_signal_handlers()
             
-            print(f"Python K8s Manager starting on {host}:{port}")
-            print("Available endpoints:")
-            print("  GET  /health - Health check")
-            print("  GET  /api/status - Detailed status")
-            print("  GET  /api/cluster/info - Cluster information") 
-            print("  GET  /api/cluster/pods - Pod information")
-            print("  GET  /api/cluster/deployments - Deployment information")
-            print("  GET  /api/cache/stats - Cache statistics")
-            print("  POST /api/cache/refresh - Force cache refresh")
-            print("  POST /api/cache/invalidate - Invalidate cache")
-            
-            # Publish startup event
-            if self.nats_service:
-                startup_event = {
-                    "action": "service_started",
-                    "service": "python-k8s-manager",
-                    "timestamp": int(time.time() * 1000)
-                }
-                self.nats_service.publish_sync("k8s.events", startup_event)
+            logger.info("Python K8s Manager starting", extra={"host": host, "port": port})
+            logger.info("Available endpoints:\n" + "\n".join([
+                "  GET  /health - Liveness check",
+                "  GET  /ready - Readiness check",
+                "  GET  /api/status - Detailed status",
+                "  GET  /api/cluster/info - Cluster information",
+                "  GET  /api/cluster/pods - Pod information (?stream=true for chunked encoding)",
+                "  GET  /api/cluster/deployments - Deployment information",
+                "       (list endpoints accept ?fields=a,b and ?format=compact)",
+                "  GET  /api/cluster/summary - Pod/deployment counts by namespace and phase",
+                "  GET  /api/cluster/search - Pod/deployment name search (?q=&limit=)",
+                "  GET  /api/cluster/resources/<kind> - Services, nodes, replicasets, statefulsets",
+                "  GET  /api/cluster/topology - Grouped topology (?expand=ns:<name>,deploy:<ns>/<name>)",
+                "  GET  /api/cluster/usage - Pod CPU/memory usage rollups (?by=namespace|deployment|node|pod&sort=cpu|memory)",
+                "  GET  /api/cache/stats - Cache statistics",
+                "  POST /api/cache/refresh - Force cache refresh",
+                "  POST /api/cache/invalidate - Invalidate cache",
+                "  GET  /api/stream/updates - Snapshot version/diff event stream (SSE)",
+                "  GET  /api/history/series - Recorded metric series",
+                "  GET  /api/history/query - Windowed min/max/avg/rate over a time range",
+                "  GET  /api/fleet/clusters - Configured clusters and their state",
+                "  GET  /api/fleet/summary - Pod/deployment totals across all clusters",
+                "  GET  /api/apps - Live NATS app instances per app (from app.status heartbeats)",
+                "  GET  /api/apps/<app> - Live instances of one app joined with their pods",
+                "       (cluster, cache, stream and history endpoints accept ?cluster=<name>)",
+                "  GET  /api/admin/profile - Sampling profile as collapsed stacks (?seconds=&format=json)",
+                "  POST /api/admin/memory/start|snapshot|stop, GET /api/admin/memory/diff - tracemalloc diffs",
+                "       (admin endpoints need ADMIN_TOKEN set and sent as X-Admin-Token)"
+            ]))
             
-            self.app.run(host=host, port=port, debug=debug)
+            # Threaded so long-lived stream connections don't block other requests
+            self.app.run(host=host, port=port, debug=debug, threaded=True)
             
         except Exception as e:
-            print(f"Failed to start application: {e}")
+            logger.error(f"Failed to start application: {e}")
             self.shutdown()
             raise
 
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+App heartbeat registry benchmark for python-k8s-manager.
+
+Simulates many app instances heartbeating on a fixed interval (spread evenly
+over it), with a slice of them going silent, and reports heartbeat cost,
+the time spent expiring/rescheduling deadlines and the heap size.
+
+Usage:
+  python benchmarks/bench_app_registry.py [--instances 50000] [--rounds 6] [--output report.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.app_registry import AppRegistry
+
+def main():
+    parser = argparse.ArgumentParser(description="python-k8s-manager app registry benchmark")
+    parser.add_argument("--instances", type=int, default=50000)
+    parser.add_argument("--apps", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=6, help="heartbeat intervals to simulate")
+    parser.add_argument("--interval", type=float, default=30)
+    parser.add_argument("--ttl", type=float, default=90)
+    parser.add_argument("--silent", type=float, default=0.1, help="fraction that stops after the first round")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    registry = AppRegistry(ttl_seconds=args.ttl)
+    messages = [{
+        "app": f"app{i % args.apps}",
+        "instance": f"app{i % args.apps}-7d9f8b6c5-{i:06d}",
+        "namespace": "default",
+        "status": "running",
+        "uptime": 0,
+        "pending": 0,
+        "handlers": 16,
+        "subjects": {"k8s.events": {"throughput": 2.5, "failed": 0}}
+    } for i in range(args.instances)]
+    silent_from = int(args.instances * (1 - args.silent))
+
+    heartbeats = 0
+    started = time.perf_counter()
+    for round_number in range(args.rounds):
+        base = round_number * args.interval
+        active = messages if round_number == 0 else messages[:silent_from]
+        step = args.interval / len(active)
+        for i, message in enumerate(active):
+            registry.heartbeat(message, now=base + i * step)
+        heartbeats += len(active)
+    heartbeat_seconds = time.perf_counter() - started
+
+    # Reads after the silent instances' deadlines have passed
+    now = args.rounds * args.interval
+    started = time.perf_counter()
+    summary = registry.summary(now=now)
+    summary_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    total, _ = registry.instances("app0", limit=500, now=now)
+    instances_ms = (time.perf_counter() - started) * 1000
+
+    stats = registry.get_stats(now=now)
+    report = {
+        "instances": args.instances,
+        "heartbeats": heartbeats,
+        "heartbeatsPerSecond": round(heartbeats / heartbeat_seconds),
+        "heartbeatUs": round(heartbeat_seconds / heartbeats * 1e6, 2),
+        "liveInstances": sum(summary.values()),
+        "expired": stats["expirations"],
+        "heapSize": stats["heapSize"],
+        "summaryMs": round(summary_ms, 3),
+        "appInstancesMs": round(instances_ms, 3),
+        "appInstances": total,
+        "python": sys.version.split()[0]
+    }
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+if __name__ == "__main__":
+    main()
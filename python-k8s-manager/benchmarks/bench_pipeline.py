@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+End-to-end pipeline benchmark for python-k8s-manager.
+
+For each cluster size, starts benchmarks/fake_k8s_api.py (optionally with
+injected latency) and, in a fresh interpreter so peak RSS is per size and
+excludes the fake server, runs the real pipeline against it:
+
+  transfer     raw GET of the pod and deployment lists (server + socket)
+  fetch        KubernetesService.fetch_cluster_data(): transfer, client
+               deserialization and model build
+  cacheUpdate  ClusterDataCache.update_data() with the cluster's listeners
+               (stream, topology, search, history) attached; first update
+               and later ones (diffs) reported separately
+  serving      cluster_routes endpoints over real HTTP (the threaded
+               werkzeug server app.py runs), first request (builds the
+               serialized body) then --requests requests from --concurrency
+               clients: throughput and latency percentiles
+  watch        optional (--watch-seconds): pod watch events through the
+               kubernetes client into PodInfo, events/s and send -> built lag
+
+and records current and peak RSS. With --baseline, compares against an
+earlier report and exits non-zero when a metric regressed by more than
+--max-regression.
+
+Usage:
+  python benchmarks/bench_pipeline.py [--sizes 1000,10000,50000] [--latency-ms 0] [--watch-seconds 5] [--output report.json]
+  python benchmarks/bench_pipeline.py --sizes 1000,10000,50000,200000 --baseline report.json
+"""
+
+import argparse
+import http.client
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from typing import Any, Dict, List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+ENDPOINTS = [
+    "/api/cluster/summary",
+    "/api/cluster/info",
+    "/api/cluster/pods",
+    "/api/cluster/pods?format=compact",
+    "/api/cluster/deployments",
+    "/api/cluster/usage?by=deployment"
+]
+
+def percentiles(values: List[float]) -> Optional[Dict[str, float]]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    pick = lambda q: ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+    return {
+        "count": len(ordered),
+        "medianMs": round(statistics.median(ordered), 3),
+        "p90Ms": round(pick(0.90), 3),
+        "p99Ms": round(pick(0.99), 3),
+        "maxMs": round(ordered[-1], 3)
+    }
+
+def rss_mb() -> Optional[float]:
+    """Current resident set size (Linux only)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return round(int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20, 1)
+    except (OSError, ValueError):
+        return None
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10, 1)
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - started) * 1000, result
+
+def load(port: int, path: str, requests: int, concurrency: int) -> Dict[str, Any]:
+    """requests GETs of path from concurrency keep-alive clients"""
+    latencies: List[float] = []
+    errors = [0]
+    remaining = [requests]
+    size = [0]
+    lock = threading.Lock()
+
+    def client():
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=300)
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    break
+                remaining[0] -= 1
+            started = time.perf_counter()
+            connection.request("GET", path)
+            response = connection.getresponse()
+            body = response.read()
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                latencies.append(elapsed)
+                size[0] = len(body)
+                errors[0] += response.status != 200
+        connection.close()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - started
+    return dict(percentiles(latencies), throughput=round(len(latencies) / seconds, 1),
+                bytes=size[0], errors=errors[0])
+
+def run_step(args) -> Dict[str, Any]:
+    """One cluster size against the fake API server named by KUBECONFIG (context 'fake')"""
+    from flask import Flask
+    from werkzeug.serving import make_server
+    from api.cluster_context import init_cluster_context
+    from api.cluster_routes import cluster_bp, init_cluster_routes
+    from models.cluster_data import PodInfo
+    from services.cluster_registry import ClusterContext, ClusterRegistry
+    from services.kubernetes_service import KubernetesService
+    from services.usage_service import usage_source_from_env
+    from fake_k8s_api import SENT_ANNOTATION
+
+    result: Dict[str, Any] = {"rssMb": {"start": rss_mb()}}
+    k8s = KubernetesService(context="fake", request_timeout=600, usage_source=usage_source_from_env())
+    url = k8s.core_v1.api_client.configuration.host
+
+    transfer = []
+    for _ in range(args.fetch_repeat):
+        started = time.perf_counter()
+        received = 0
+        for path in ("/api/v1/pods", "/apis/apps/v1/deployments"):
+            with urllib.request.urlopen(url + path, timeout=600) as response:
+                received += len(response.read())
+        transfer.append((time.perf_counter() - started) * 1000)
+    result["transfer"] = dict(percentiles(transfer), bytes=received)
+
+    # The cluster context app.py builds, with its cache listeners attached
+    registry = ClusterRegistry()
+    context = ClusterContext.create("bench")
+    context.k8s_service = k8s
+    context.ready_time = time.time()
+    registry.register(context)
+
+    fetches, updates = [], []
+    cluster_data = None
+    for _ in range(args.fetch_repeat):
+        elapsed, cluster_data = timed(k8s.fetch_cluster_data)
+        fetches.append(elapsed)
+        elapsed, _ = timed(lambda: context.cache.update_data(cluster_data))
+        updates.append(elapsed)
+    result["fetch"] = dict(percentiles(fetches), pods=cluster_data.pod_count,
+                           deployments=cluster_data.deployment_count,
+                           podsWithUsage=len(cluster_data.pod_usage or ()))
+    result["cacheUpdate"] = {"firstMs": round(updates[0], 3), "later": percentiles(updates[1:])}
+    result["rssMb"]["afterFetch"] = rss_mb()
+
+    init_cluster_context(registry)
+    init_cluster_routes(None)
+    app = Flask(__name__)
+    app.register_blueprint(cluster_bp)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    port = server.server_port
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    serving = {}
+    for path in ENDPOINTS:
+        first_ms, _ = timed(lambda: urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=600).read())
+        serving[path] = dict(load(port, path, args.requests, args.concurrency), firstMs=round(first_ms, 3))
+    server.shutdown()
+    result["serving"] = serving
+    result["rssMb"]["afterServing"] = rss_mb()
+
+    if args.watch_seconds > 0:
+        from kubernetes import watch
+        lags = []
+        started = time.perf_counter()
+        for event in watch.Watch().stream(k8s.core_v1.list_pod_for_all_namespaces,
+                                          timeout_seconds=int(args.watch_seconds),
+                                          _request_timeout=args.watch_seconds + 60):
+            pod = event["object"]
+            # Built the way KubernetesService._fetch_pods builds each pod
+            PodInfo(name=pod.metadata.name, namespace=pod.metadata.namespace,
+                    status=pod.status.phase or "Unknown",
+                    creation_timestamp=pod.metadata.creation_timestamp.isoformat(),
+                    details=KubernetesService._pod_details(pod))
+            lags.append((time.time() - float(pod.metadata.annotations[SENT_ANNOTATION])) * 1000)
+        seconds = time.perf_counter() - started
+        result["watch"] = {"events": len(lags), "eventsPerSecond": round(len(lags) / seconds, 1),
+                           "targetRate": args.watch_rate, "lag": percentiles(lags)}
+
+    result["peakRssMb"] = peak_rss_mb()
+    return result
+
+def start_fake_api(args, pods: int, kubeconfig: str):
+    command = [sys.executable, os.path.join(BENCH_DIR, "fake_k8s_api.py"), "--port", "0",
+               "--pods", str(pods), "--deployments", str(max(int(pods * args.deployment_ratio), 1)),
+               "--latency-ms", str(args.latency_ms), "--jitter-ms", str(args.jitter_ms),
+               "--watch-rate", str(args.watch_rate), "--seed", str(args.seed), "--kubeconfig", kubeconfig]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if not line:
+        process.wait()
+        raise RuntimeError("fake API server failed to start")
+    return process, json.loads(line)
+
+def measure_size(args, pods: int) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp:
+        kubeconfig = os.path.join(tmp, "kubeconfig")
+        step_output = os.path.join(tmp, "step.json")
+        server, info = start_fake_api(args, pods, kubeconfig)
+        try:
+            command = [sys.executable, os.path.abspath(__file__), "--step", str(pods), "--step-output", step_output]
+            command += ["--fetch-repeat", str(args.fetch_repeat), "--requests", str(args.requests),
+                        "--concurrency", str(args.concurrency), "--watch-seconds", str(args.watch_seconds),
+                        "--watch-rate", str(args.watch_rate)]
+            # Service logging goes to stderr so it can't interleave with the report
+            subprocess.run(command, env=dict(os.environ, KUBECONFIG=kubeconfig), check=True,
+                           stdout=sys.stderr if args.verbose else subprocess.DEVNULL,
+                           stderr=None if args.verbose else subprocess.DEVNULL)
+            with open(step_output) as f:
+                result = json.load(f)
+        finally:
+            server.terminate()
+            server.wait()
+    return dict(result, pods=pods, podListBytes=info["podListBytes"])
+
+# (metric path, True when higher is worse)
+REGRESSION_METRICS = [
+    (("fetch", "medianMs"), True),
+    (("cacheUpdate", "firstMs"), True),
+    (("peakRssMb",), True)
+] + [(("serving", path, "p99Ms"), True) for path in ENDPOINTS] \
+  + [(("serving", path, "throughput"), False) for path in ENDPOINTS]
+
+def _metric(step: Dict[str, Any], path) -> Optional[float]:
+    value: Any = step
+    for key in path:
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+def compare(baseline: Dict[str, Any], report: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """Metrics that got worse by more than threshold, per size present in both reports"""
+    before = {step["pods"]: step for step in baseline.get("steps", [])}
+    regressions = []
+    for step in report["steps"]:
+        previous = before.get(step["pods"])
+        if previous is None:
+            continue
+        for path, higher_is_worse in REGRESSION_METRICS:
+            old, new = _metric(previous, path), _metric(step, path)
+            if not old or new is None:
+                continue
+            change = (new - old) / old if higher_is_worse else (old - new) / old
+            if change > threshold:
+                regressions.append({"pods": step["pods"], "metric": ".".join(path),
+                                    "baseline": old, "current": new, "change": round(change, 3)})
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="python-k8s-manager end-to-end pipeline benchmark")
+    parser.add_argument("--sizes", default="1000,10000,50000", help="comma separated pod counts (up to 200000)")
+    parser.add_argument("--deployment-ratio", type=float, default=0.05, help="deployments per pod")
+    parser.add_argument("--latency-ms", type=float, default=0, help="injected API server latency")
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--fetch-repeat", type=int, default=3)
+    parser.add_argument("--requests", type=int, default=100, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--watch-seconds", type=float, default=0, help="seconds of pod watch events (0 = skip)")
+    parser.add_argument("--watch-rate", type=float, default=2000, help="watch events per second")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", help="earlier report to check for regressions")
+    parser.add_argument("--max-regression", type=float, default=0.25,
+                        help="allowed fractional slowdown/growth before failing")
+    parser.add_argument("--verbose", action="store_true", help="show service logging")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--step", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--step-output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.step is not None:
+        # Keep service logging off stdout; the parent reads the step result from a file
+        sys.stdout = sys.stderr
+        with open(args.step_output, "w") as f:
+            json.dump(run_step(args), f)
+        return
+
+    import kubernetes
+    steps = [measure_size(args, int(size)) for size in args.sizes.split(",")]
+    report = {
+        "config": {key: value for key, value in vars(args).items()
+                   if key not in ("output", "baseline", "step", "step_output", "verbose")},
+        "steps": steps,
+        "python": sys.version.split()[0],
+        "kubernetesClient": kubernetes.__version__
+    }
+
+    regressions = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(json.load(f), report, args.max_regression)
+        report["regressions"] = regressions
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    if regressions:
+        print(f"{len(regressions)} metric(s) regressed more than {args.max_regression:.0%}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
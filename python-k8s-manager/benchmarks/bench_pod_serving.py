@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Pod serving benchmark for python-k8s-manager.
+
+Serves /api/cluster/pods from a warm cache through the Flask test client and
+compares the current PodInfo (with collected details) against the original
+four-field model, so growth in the pod model can be checked for serving-cost
+regressions. Reports median latency and body size per query variant, plus
+snapshot memory per pod.
+
+Usage:
+  python benchmarks/bench_pod_serving.py [--pods 20000] [--repeat 15] [--output report.json]
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+
+from api.cluster_context import init_cluster_context
+from api.cluster_routes import cluster_bp, init_cluster_routes
+from models.cluster_data import (ClusterData, PodDetails, PodInfo, container_info, node_name,
+                                 owner_reference)
+from services.cache_service import ClusterDataCache
+from services.cluster_registry import ClusterContext, ClusterRegistry
+
+@dataclass
+class LegacyPodInfo:
+    """PodInfo as it was before detail fields were added"""
+    name: str
+    namespace: str
+    status: str
+    creation_timestamp: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+VARIANTS = {
+    "default": "",
+    "compact": "?format=compact",
+    "fields": "?fields=name,status",
+    "stream": "?stream=true"
+}
+
+def make_pods(count: int, detailed: bool, rng: random.Random):
+    pods = []
+    for i in range(count):
+        name = f"app-{i % 500}-7d9f8b6c5-{i:06d}"
+        namespace = f"ns-{i % 40}"
+        status = rng.choice(("Running", "Running", "Running", "Pending"))
+        created = "2024-01-01T00:00:00+00:00"
+        if not detailed:
+            pods.append(LegacyPodInfo(name, namespace, status, created))
+            continue
+        # Built the way KubernetesService._pod_details builds them
+        details = PodDetails(
+            node_name=node_name(f"node-{i % 200}"),
+            containers=(container_info("app", True, rng.randint(0, 3)), container_info("sidecar", True, 0)),
+            owners=(owner_reference("ReplicaSet", f"app-{i % 500}-7d9f8b6c5", True),),
+            cpu_request_millis=250,
+            memory_request_bytes=128 * 1024 * 1024
+        )
+        pods.append(PodInfo(name, namespace, status, created, details))
+    return pods
+
+def snapshot_bytes_per_pod(count: int, detailed: bool) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    pods = make_pods(count, detailed, random.Random(0))
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del pods
+    return (after - before) / count
+
+def serve(client, cache: ClusterDataCache, pods, variants, repeat: int) -> Dict[str, Any]:
+    cache.update_data(ClusterData(pods, [], len(pods), 0, time.time()))
+    results = {}
+    for variant, query in variants.items():
+        timings, size = [], 0
+        for _ in range(repeat):
+            started = time.perf_counter()
+            response = client.get(f"/api/cluster/pods{query}")
+            body = response.get_data()
+            timings.append((time.perf_counter() - started) * 1000)
+            size = len(body)
+        results[variant] = {"medianMs": statistics.median(timings), "bytes": size}
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="python-k8s-manager pod serving benchmark")
+    parser.add_argument("--pods", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=15)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    registry = ClusterRegistry()
+    context = ClusterContext.create("bench")
+    context.ready_time = time.time()
+    registry.register(context)
+    cache = context.cache
+    init_cluster_context(registry)
+    init_cluster_routes(None)
+    app = Flask(__name__)
+    app.register_blueprint(cluster_bp)
+    client = app.test_client()
+
+    legacy = serve(client, cache, make_pods(args.pods, False, random.Random(1)), VARIANTS, args.repeat)
+    current = serve(client, cache, make_pods(args.pods, True, random.Random(1)),
+                    dict(VARIANTS, detail="?detail=true"), args.repeat)
+
+    report = {
+        "pods": args.pods,
+        "legacy": legacy,
+        "current": current,
+        "ratio": {variant: current[variant]["medianMs"] / legacy[variant]["medianMs"] for variant in VARIANTS},
+        "bytesIdentical": {variant: current[variant]["bytes"] == legacy[variant]["bytes"] for variant in VARIANTS},
+        "snapshotBytesPerPod": {
+            "legacy": snapshot_bytes_per_pod(args.pods, False),
+            "current": snapshot_bytes_per_pod(args.pods, True)
+        },
+        "python": sys.version.split()[0]
+    }
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Name search benchmark for python-k8s-manager.
+
+Builds the search index over a synthetic cluster (deployment-style pod names
+spread over namespaces) and reports build time, incremental patch time and
+per-query latency percentiles for typeahead-style queries, unfiltered and
+narrowed by ?namespace= and ?kind=.
+
+Usage:
+  python benchmarks/bench_search.py [--pods 100000] [--queries 2000] [--output report.json]
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.cluster_data import ClusterData, DeploymentInfo, PodInfo, diff_cluster_data
+from services.cache_service import ClusterDataCache
+from services.search_service import SearchService
+
+def synthetic_cluster(pod_count: int, rng: random.Random) -> ClusterData:
+    words = ["api", "web", "worker", "cache", "auth", "billing", "search", "ingest", "report", "gateway"]
+    deployments, pods = [], []
+    for i in range(max(pod_count // 50, 1)):
+        deployments.append(DeploymentInfo(f"{rng.choice(words)}-{rng.choice(words)}-{i}", f"ns-{i % 40}",
+                                          50, 50, None))
+    for i in range(pod_count):
+        deployment = deployments[i % len(deployments)]
+        suffix = ''.join(rng.choice('abcdefghijklmnopqrstuvwxyz0123456789') for _ in range(5))
+        pods.append(PodInfo(f"{deployment.name}-7d9f8b6c5-{suffix}", deployment.namespace, "Running"))
+    return ClusterData(pods, deployments, len(pods), len(deployments), time.time())
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+    return {"p50": pick(0.5), "p95": pick(0.95), "p99": pick(0.99), "max": ordered[-1],
+            "mean": statistics.mean(ordered)}
+
+def main():
+    parser = argparse.ArgumentParser(description="python-k8s-manager search benchmark")
+    parser.add_argument("--pods", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    cluster = synthetic_cluster(args.pods, rng)
+    cache = ClusterDataCache()
+    search = SearchService(cache)
+
+    started = time.perf_counter()
+    search._on_cache_update(diff_cluster_data(None, cluster, 0, 1), cluster)
+    build_seconds = time.perf_counter() - started
+
+    # Roll 1% of pods, as a scheduled collection would see them
+    churn = max(args.pods // 100, 1)
+    replaced = [PodInfo(f"{pod.name}-new", pod.namespace, pod.status) for pod in cluster.pods[:churn]]
+    updated = ClusterData(replaced + cluster.pods[churn:], cluster.deployments, args.pods,
+                          cluster.deployment_count, time.time())
+    started = time.perf_counter()
+    search._on_cache_update(diff_cluster_data(cluster, updated, 1, 2), updated)
+    patch_seconds = time.perf_counter() - started
+
+    # The first substring query after a patch must not pay for the patch
+    started = time.perf_counter()
+    search.search("7d9f", limit=20, namespace="ns-1")
+    first_query_ms = (time.perf_counter() - started) * 1000
+
+    # Typeahead: successive prefixes of real names plus substrings from their middle
+    queries = []
+    for _ in range(args.queries):
+        name = rng.choice(updated.pods).name
+        if rng.random() < 0.5:
+            queries.append(name[:rng.randint(1, len(name))])
+        else:
+            start = rng.randint(1, len(name) - 4)
+            queries.append(name[start:start + rng.randint(3, 8)])
+
+    # Filters that match little or nothing are the worst case for the scan cap
+    namespaces = sorted({pod.namespace for pod in updated.pods})
+    filters = {
+        "all": lambda: {},
+        "namespace": lambda: {"namespace": rng.choice(namespaces)},
+        "missingNamespace": lambda: {"namespace": "ns-nonexistent"},
+        "kind": lambda: {"kind": "deployment"}
+    }
+    query_ms = {}
+    for label, make_filter in filters.items():
+        latencies_ms = []
+        for query in queries:
+            narrow = make_filter()
+            started = time.perf_counter()
+            search.search(query, limit=20, **narrow)
+            latencies_ms.append((time.perf_counter() - started) * 1000)
+        query_ms[label] = percentiles(latencies_ms)
+
+    report = {
+        "pods": args.pods,
+        "buildSeconds": build_seconds,
+        "patchSeconds": patch_seconds,
+        "patchedNames": churn * 2,
+        "firstQueryAfterPatchMs": first_query_ms,
+        "queryMs": query_ms,
+        "index": search.get_stats(),
+        "python": sys.version.split()[0]
+    }
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark for python-k8s-manager.
+
+Measures, over several cold starts of app.py in a subprocess:
+  - import time of the app module (heavy client libraries should not load here)
+  - time until the HTTP listener answers /health (liveness)
+  - time until /ready returns 200 (readiness; needs a reachable cluster)
+
+Usage:
+  python benchmarks/bench_startup.py [--runs 5] [--ready-timeout 30] [--output report.json]
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_PROBE = (
+    "import sys, time; t = time.perf_counter(); import app; "
+    "print(time.perf_counter() - t); "
+    "print(','.join(m for m in ('kubernetes', 'nats') if m in sys.modules))"
+)
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def measure_import() -> dict:
+    """Time `import app` in a fresh interpreter and report which heavy modules it pulled in"""
+    output = subprocess.run([sys.executable, "-c", IMPORT_PROBE], cwd=APP_DIR,
+                            capture_output=True, text=True, check=True).stdout.splitlines()
+    return {
+        "seconds": float(output[0]),
+        "heavyModulesLoaded": [m for m in output[1].split(',') if m] if len(output) > 1 else []
+    }
+
+def poll(url: str, deadline: float):
+    """Poll url until it returns 200; returns the perf_counter time or None on timeout"""
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return time.perf_counter()
+        except (urllib.error.URLError, ConnectionError, socket.timeout):
+            pass
+        time.sleep(0.01)
+    return None
+
+def measure_startup(ready_timeout: float) -> dict:
+    """Launch app.py and time liveness and readiness"""
+    port = free_port()
+    env = dict(os.environ, PORT=str(port), NATS_URL=os.getenv("NATS_URL", "nats://127.0.0.1:1"),
+               K8S_INIT_RETRY_SECONDS="1")
+    base = f"http://127.0.0.1:{port}"
+
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "app.py"], cwd=APP_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        live_at = poll(f"{base}/health", started + 30)
+        ready_at = poll(f"{base}/ready", started + ready_timeout) if live_at else None
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            # NATS connect retries can hold shutdown open; startup is what's measured here
+            process.kill()
+            process.wait()
+
+    return {
+        "livenessSeconds": live_at - started if live_at else None,
+        "readinessSeconds": ready_at - started if ready_at else None
+    }
+
+def summarize(values):
+    values = [v for v in values if v is not None]
+    if not values:
+        return None
+    return {"min": min(values), "median": statistics.median(values), "max": max(values)}
+
+def main():
+    parser = argparse.ArgumentParser(description="python-k8s-manager startup benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--ready-timeout", type=float, default=30,
+                        help="seconds to wait for /ready (needs a reachable cluster)")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    imports = [measure_import() for _ in range(args.runs)]
+    starts = [measure_startup(args.ready_timeout) for _ in range(args.runs)]
+
+    report = {
+        "runs": args.runs,
+        "importSeconds": summarize([i["seconds"] for i in imports]),
+        "heavyModulesAtImport": imports[0]["heavyModulesLoaded"],
+        "livenessSeconds": summarize([s["livenessSeconds"] for s in starts]),
+        "readinessSeconds": summarize([s["readinessSeconds"] for s in starts]),
+        "python": sys.version.split()[0]
+    }
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Pod usage rollup benchmark for python-k8s-manager.
+
+Builds a synthetic snapshot with per-pod usage (pods spread over namespaces,
+deployments and nodes), then reports the time to align usage into arrays and
+compute the namespace/deployment/node rollups, per-view render latency, and
+the same rollups done with per-pod Python loops for comparison. The
+vectorized per-group percentiles are checked against numpy.percentile.
+
+Usage:
+  python benchmarks/bench_usage.py [--pods 100000] [--output report.json]
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.cluster_data import ClusterData, DeploymentInfo, PodDetails, PodInfo, owner_reference
+from services.usage_service import GROUPINGS, METRICS, PERCENTILES, ClusterUsage, _deployment
+
+def synthetic_cluster(pod_count: int, rng: random.Random) -> ClusterData:
+    deployments = [DeploymentInfo(f"app-{i}", f"ns-{i % 40}", 5, 5) for i in range(max(pod_count // 20, 1))]
+    pods, usage = [], {}
+    for i in range(pod_count):
+        deployment = deployments[i % len(deployments)]
+        details = PodDetails(
+            node_name=f"node-{i % 500}",
+            owners=(owner_reference("ReplicaSet", f"{deployment.name}-7d9f8b6c5", True),),
+            cpu_request_millis=rng.choice((100, 250, 500, 1000)),
+            memory_request_bytes=rng.choice((128, 256, 512, 1024)) << 20
+        )
+        pod = PodInfo(f"{deployment.name}-7d9f8b6c5-{i:06d}", deployment.namespace, "Running", details=details)
+        pods.append(pod)
+        # A few pods are too new to have metrics yet
+        if rng.random() < 0.98:
+            usage[(pod.namespace, pod.name)] = (rng.lognormvariate(4, 1), rng.lognormvariate(18.5, 0.7))
+    return ClusterData(pods, deployments, len(pods), len(deployments), time.time(), pod_usage=usage)
+
+def python_rollups(cluster: ClusterData):
+    """The same rollups with dicts and per-group sorted lists"""
+    rollups = {}
+    for grouping in GROUPINGS:
+        sums = defaultdict(lambda: [0, 0.0, 0.0, 0.0, 0.0])
+        samples = defaultdict(lambda: ([], []))
+        for pod in cluster.pods:
+            key = pod.namespace if grouping == 'namespace' else pod.node_name if grouping == 'node' else _deployment(pod)
+            if key is None:
+                continue
+            row = sums[key]
+            row[0] += 1
+            row[3] += pod.details.cpu_request_millis
+            row[4] += pod.details.memory_request_bytes
+            usage = cluster.pod_usage.get((pod.namespace, pod.name))
+            if usage:
+                row[1] += usage[0]
+                row[2] += usage[1]
+                samples[key][0].append(usage[0])
+                samples[key][1].append(usage[1])
+        percentiles = {}
+        for key, (cpu, memory) in samples.items():
+            percentiles[key] = [statistics.quantiles(sorted(values), n=100, method='inclusive') for values in (cpu, memory)]
+        rollups[grouping] = (sums, percentiles)
+    return rollups
+
+def max_percentile_error(usage: ClusterUsage, groups: int = 5) -> float:
+    """Largest relative difference between the vectorized percentiles and numpy.percentile (first groups of each rollup)"""
+    worst = 0.0
+    for grouping, rollup in usage.rollups.items():
+        labels = np.array([pod.namespace if grouping == 'namespace' else pod.node_name if grouping == 'node'
+                           else _deployment(pod) for pod in usage.pods], dtype=object)
+        for i, name in enumerate(rollup.names[:groups]):
+            members = (labels == name) & usage.measured
+            for metric in METRICS:
+                expected = np.percentile(usage.usage[metric][members], PERCENTILES)
+                actual = rollup.percentiles[metric][:, i]
+                worst = max(worst, float(np.max(np.abs(actual - expected) / np.abs(expected))))
+    return worst
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+    return {"p50": pick(0.5), "p95": pick(0.95), "p99": pick(0.99), "max": ordered[-1],
+            "mean": statistics.mean(ordered)}
+
+def main():
+    parser = argparse.ArgumentParser(description="python-k8s-manager pod usage rollup benchmark")
+    parser.add_argument("--pods", type=int, default=100000)
+    parser.add_argument("--renders", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--skip-python", action="store_true", help="skip the per-pod Python loop comparison")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    cluster = synthetic_cluster(args.pods, rng)
+
+    builds = []
+    for _ in range(3):
+        started = time.perf_counter()
+        usage = ClusterUsage(cluster, 1)
+        builds.append(time.perf_counter() - started)
+
+    # Render is what a request pays when the view isn't cached yet
+    views = [(by, sort, limit) for by in GROUPINGS + ('pod',) for sort in METRICS for limit in (10, 100)]
+    render_ms = []
+    for i in range(args.renders):
+        by, sort, limit = views[i % len(views)]
+        started = time.perf_counter()
+        json.dumps(usage.render(by, sort, limit))
+        render_ms.append((time.perf_counter() - started) * 1000)
+
+    report = {
+        "pods": args.pods,
+        "podsWithUsage": usage.totals["podsWithUsage"],
+        "groups": {grouping: len(rollup.names) for grouping, rollup in usage.rollups.items()},
+        "buildSeconds": min(builds),
+        "renderMs": percentiles(render_ms),
+        "maxPercentileRelativeError": max_percentile_error(usage),
+        "numpy": np.__version__,
+        "python": sys.version.split()[0]
+    }
+    if not args.skip_python:
+        started = time.perf_counter()
+        python_rollups(cluster)
+        report["pythonLoopSeconds"] = time.perf_counter() - started
+        report["speedup"] = round(report["pythonLoopSeconds"] / report["buildSeconds"], 1)
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+if __name__ == "__main__":
+    main()
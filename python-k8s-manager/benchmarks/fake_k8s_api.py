@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Fake Kubernetes API server for python-k8s-manager benchmarks.
+
+Serves synthetic pod and deployment lists (pods shaped like real ones:
+owners, node, containers with statuses and resource requests) in the wire
+format the kubernetes client deserializes, so KubernetesService runs its
+real code path against it. Other list endpoints the collectors call return
+empty lists, and metrics.k8s.io serves usage for every pod. List bodies are
+rendered once up front so serving them costs the benchmark as little as
+possible.
+
+Options:
+  --latency-ms / --jitter-ms  delay before every response (seeded jitter)
+  ?watch=true on pods         chunked MODIFIED events at --watch-rate per
+                              second; each pod carries its send time in the
+                              bench.k8s-manager/sent annotation
+
+Usage:
+  python benchmarks/fake_k8s_api.py [--pods 10000] [--deployments 500] [--port 8001] [--kubeconfig fake.kubeconfig]
+
+Then point the manager at it:
+  KUBECONFIG=fake.kubeconfig K8S_CONTEXTS=fake python app.py
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+SENT_ANNOTATION = "bench.k8s-manager/sent"
+
+CREATED = "2024-01-01T00:00:00Z"
+
+# Empty lists for the other kinds the resource collectors list
+EMPTY_LISTS = {
+    "/api/v1/nodes": ("v1", "NodeList"),
+    "/api/v1/services": ("v1", "ServiceList"),
+    "/apis/apps/v1/replicasets": ("apps/v1", "ReplicaSetList"),
+    "/apis/apps/v1/statefulsets": ("apps/v1", "StatefulSetList")
+}
+
+NAMESPACED = re.compile(r"^(/api/v1|/apis/apps/v1)/namespaces/[^/]+/(\w+)$")
+
+def make_pod(i: int, rng: random.Random, annotations: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    app = f"app-{i % 500}"
+    replicaset = f"{app}-7d9f8b6c5"
+    phase = rng.choice(("Running", "Running", "Running", "Running", "Pending", "Succeeded", "Failed"))
+    ready = phase == "Running"
+    metadata = {
+        "name": f"{replicaset}-{i:06d}",
+        "namespace": f"ns-{i % 40}",
+        "uid": f"00000000-0000-4000-8000-{i:012d}",
+        "resourceVersion": str(1000 + i),
+        "creationTimestamp": CREATED,
+        "labels": {"app": app, "pod-template-hash": "7d9f8b6c5"},
+        "ownerReferences": [{
+            "apiVersion": "apps/v1", "kind": "ReplicaSet", "name": replicaset,
+            "uid": f"10000000-0000-4000-8000-{i % 500:012d}", "controller": True, "blockOwnerDeletion": True
+        }]
+    }
+    if annotations:
+        metadata["annotations"] = annotations
+    containers = [("app", f"registry.local/{app}:1.0", "250m", "128Mi"), ("sidecar", "registry.local/proxy:2.1", "50m", "32Mi")]
+    return {
+        "metadata": metadata,
+        "spec": {
+            "nodeName": f"node-{i % 200}",
+            "containers": [{
+                "name": name, "image": image,
+                "resources": {"requests": {"cpu": cpu, "memory": memory}}
+            } for name, image, cpu, memory in containers]
+        },
+        "status": {
+            "phase": phase,
+            "podIP": f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}",
+            "hostIP": f"192.168.0.{i % 200}",
+            "startTime": CREATED,
+            "containerStatuses": [{
+                "name": name, "image": image, "imageID": f"{image}@sha256:{i % 97:064x}",
+                "ready": ready, "restartCount": rng.randint(0, 3) if name == "app" else 0,
+                "started": ready
+            } for name, image, _, _ in containers]
+        }
+    }
+
+def make_pod_metrics(i: int, rng: random.Random) -> Dict[str, Any]:
+    """metrics.k8s.io PodMetrics for make_pod(i), in the units metrics-server reports"""
+    app = f"app-{i % 500}"
+    return {
+        "metadata": {"name": f"{app}-7d9f8b6c5-{i:06d}", "namespace": f"ns-{i % 40}", "creationTimestamp": CREATED},
+        "timestamp": CREATED,
+        "window": "30s",
+        "containers": [
+            {"name": "app", "usage": {"cpu": f"{rng.randint(1_000_000, 400_000_000)}n",
+                                      "memory": f"{rng.randint(20_000, 200_000)}Ki"}},
+            {"name": "sidecar", "usage": {"cpu": f"{rng.randint(100_000, 20_000_000)}n",
+                                          "memory": f"{rng.randint(8_000, 40_000)}Ki"}}
+        ]
+    }
+
+def make_deployment(i: int, rng: random.Random) -> Dict[str, Any]:
+    replicas = rng.randint(1, 5)
+    return {
+        "metadata": {
+            "name": f"app-{i}",
+            "namespace": f"ns-{i % 40}",
+            "uid": f"20000000-0000-4000-8000-{i:012d}",
+            "creationTimestamp": CREATED,
+            "labels": {"app": f"app-{i}"}
+        },
+        "spec": {
+            "replicas": replicas,
+            "selector": {"matchLabels": {"app": f"app-{i}"}},
+            "template": {"metadata": {"labels": {"app": f"app-{i}"}}}
+        },
+        "status": {"replicas": replicas, "readyReplicas": rng.randint(0, replicas)}
+    }
+
+def render_list(api_version: str, kind: str, items) -> bytes:
+    """A list body, joined from per-item JSON so no full object tree is held at once"""
+    head = json.dumps({"apiVersion": api_version, "kind": kind, "metadata": {"resourceVersion": "1"}})[:-1]
+    return (head + ', "items": [' + ", ".join(json.dumps(item) for item in items) + "]}").encode()
+
+class FakeKubernetesApi:
+    """Pre-rendered list bodies plus request counters and latency injection"""
+
+    def __init__(self, pods: int, deployments: int, latency_ms: float = 0, jitter_ms: float = 0,
+                 watch_rate: float = 1000, seed: int = 0):
+        self.pod_count = pods
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.watch_rate = watch_rate
+        self.seed = seed
+        self.requests = 0
+        self.watch_events = 0
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        rng = random.Random(seed)
+        self.bodies = {
+            "/api/v1/pods": render_list("v1", "PodList", (make_pod(i, rng) for i in range(pods))),
+            "/apis/apps/v1/deployments": render_list("apps/v1", "DeploymentList",
+                                                     (make_deployment(i, rng) for i in range(deployments))),
+            "/apis/metrics.k8s.io/v1beta1/pods": render_list("metrics.k8s.io/v1beta1", "PodMetricsList",
+                                                             (make_pod_metrics(i, rng) for i in range(pods)))
+        }
+        for path, (api_version, kind) in EMPTY_LISTS.items():
+            self.bodies[path] = render_list(api_version, kind, [])
+        self.bodies["/version"] = json.dumps({"major": "1", "minor": "28", "gitVersion": "v1.28.0-fake"}).encode()
+
+    def delay(self) -> None:
+        with self._lock:
+            self.requests += 1
+            delay = self.latency_ms + (self._random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"requests": self.requests, "watchEvents": self.watch_events}
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    api: FakeKubernetesApi
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        path = url.path
+        # Namespaced lists are answered with the cluster-wide list
+        match = NAMESPACED.match(path)
+        if match:
+            path = f"{match.group(1)}/{match.group(2)}"
+
+        self.api.delay()
+        if path == "/api/v1/pods" and query.get("watch", ["false"])[0].lower() in ("true", "1"):
+            self._watch(float(query.get("timeoutSeconds", ["10"])[0]))
+            return
+        body = self.api.bodies.get(path)
+        if body is None:
+            body = json.dumps({"kind": "Status", "apiVersion": "v1", "status": "Failure",
+                               "reason": "NotFound", "code": 404}).encode()
+            self.send_response(404)
+        else:
+            self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _watch(self, timeout_seconds: float):
+        """Chunked MODIFIED events on a fixed schedule until the timeout"""
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        rng = random.Random(self.api.seed)
+        interval = 1 / self.api.watch_rate
+        started = time.monotonic()
+        sent = 0
+        try:
+            while True:
+                due = started + sent * interval
+                if due - started >= timeout_seconds:
+                    break
+                wait = due - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+                pod = make_pod(rng.randrange(max(self.api.pod_count, 1)), rng,
+                               {SENT_ANNOTATION: repr(time.time())})
+                line = json.dumps({"type": "MODIFIED", "object": dict(pod, apiVersion="v1", kind="Pod")}).encode() + b"\n"
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+                sent += 1
+                with self.api._lock:
+                    self.api.watch_events += 1
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        self.close_connection = True
+
+def serve(api: FakeKubernetesApi, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Start serving api in a background thread; the bound port is server.server_address[1]"""
+    handler = type("Handler", (_Handler,), {"api": api})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def write_kubeconfig(path: str, url: str, context: str = "fake") -> None:
+    """A kubeconfig with one context for the fake server (JSON is valid kubeconfig YAML)"""
+    with open(path, "w") as f:
+        json.dump({
+            "apiVersion": "v1",
+            "kind": "Config",
+            "clusters": [{"name": context, "cluster": {"server": url}}],
+            "users": [{"name": context, "user": {"token": "bench"}}],
+            "contexts": [{"name": context, "context": {"cluster": context, "user": context}}],
+            "current-context": context
+        }, f)
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Kubernetes API server")
+    parser.add_argument("--pods", type=int, default=10000)
+    parser.add_argument("--deployments", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--watch-rate", type=float, default=1000, help="watch events per second")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--kubeconfig", help="write a kubeconfig (context 'fake') for this server")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    api = FakeKubernetesApi(args.pods, args.deployments, args.latency_ms, args.jitter_ms,
+                            args.watch_rate, args.seed)
+    server = serve(api, args.host, args.port)
+    url = f"http://{args.host}:{server.server_address[1]}"
+    if args.kubeconfig:
+        write_kubeconfig(args.kubeconfig, url)
+    # The first line is read by bench_pipeline.py to find the server
+    print(json.dumps({"url": url, "pods": args.pods, "deployments": args.deployments,
+                      "podListBytes": len(api.bodies["/api/v1/pods"]),
+                      "renderSeconds": round(time.perf_counter() - started, 3)}), flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
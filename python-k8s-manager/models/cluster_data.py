@@ -1,16 +1,112 @@
-from dataclasses import dataclass, asdict
-from typing import List, Optional, Dict, Any
+import sys
+from dataclasses import dataclass, asdict, field
+from functools import lru_cache
+from typing import List, NamedTuple, Optional, Dict, Any, Tuple
 from datetime import datetime
 
-@dataclass
+class ContainerInfo(NamedTuple):
+    name: str
+    ready: bool
+    restart_count: int
+
+class OwnerReference(NamedTuple):
+    kind: str
+    name: str
+    controller: bool
+
+# Pods of one workload repeat the same containers, owners and nodes; share one instance of each
+
+@lru_cache(maxsize=16384)
+def container_info(name: str, ready: bool, restart_count: int) -> ContainerInfo:
+    return ContainerInfo(name, ready, restart_count)
+
+@lru_cache(maxsize=16384)
+def owner_reference(kind: str, name: str, controller: bool) -> OwnerReference:
+    return OwnerReference(kind, name, controller)
+
+def node_name(name: Optional[str]) -> Optional[str]:
+    return sys.intern(name) if name else None
+
+@dataclass(frozen=True, slots=True)
+class PodDetails:
+    """Operational pod fields, kept as tuples and ints so large snapshots stay small"""
+    node_name: Optional[str] = None
+    containers: Tuple[ContainerInfo, ...] = ()
+    owners: Tuple[OwnerReference, ...] = ()
+    cpu_request_millis: int = 0
+    memory_request_bytes: int = 0
+    
+    @property
+    def restarts(self) -> int:
+        return sum(container.restart_count for container in self.containers)
+    
+    @property
+    def controller(self) -> Optional[OwnerReference]:
+        for owner in self.owners:
+            if owner.controller:
+                return owner
+        return self.owners[0] if self.owners else None
+
+@dataclass(slots=True)
 class PodInfo:
     name: str
     namespace: str
     status: str
     creation_timestamp: Optional[str] = None
+    # Only serialized when a response asks for detail fields (see api/projection.py)
+    details: Optional[PodDetails] = field(default=None, repr=False)
     
     def to_dict(self) -> Dict[str, Any]:
-        return asdict(self)
+        return {
+            "name": self.name,
+            "namespace": self.namespace,
+            "status": self.status,
+            "creation_timestamp": self.creation_timestamp
+        }
+    
+    # Detail accessors, named as projectable fields; None when details weren't collected
+    
+    @property
+    def node_name(self) -> Optional[str]:
+        return self.details.node_name if self.details else None
+    
+    @property
+    def restarts(self) -> Optional[int]:
+        return self.details.restarts if self.details else None
+    
+    @property
+    def ready_containers(self) -> Optional[int]:
+        return sum(c.ready for c in self.details.containers) if self.details else None
+    
+    @property
+    def container_count(self) -> Optional[int]:
+        return len(self.details.containers) if self.details else None
+    
+    @property
+    def containers(self) -> Optional[List[Dict[str, Any]]]:
+        return [c._asdict() for c in self.details.containers] if self.details else None
+    
+    @property
+    def owner_kind(self) -> Optional[str]:
+        owner = self.details.controller if self.details else None
+        return owner.kind if owner else None
+    
+    @property
+    def owner_name(self) -> Optional[str]:
+        owner = self.details.controller if self.details else None
+        return owner.name if owner else None
+    
+    @property
+    def owner_references(self) -> Optional[List[Dict[str, Any]]]:
+        return [o._asdict() for o in self.details.owners] if self.details else None
+    
+    @property
+    def cpu_request_millis(self) -> Optional[int]:
+        return self.details.cpu_request_millis if self.details else None
+    
+    @property
+    def memory_request_bytes(self) -> Optional[int]:
+        return self.details.memory_request_bytes if self.details else None
 
 @dataclass
 class DeploymentInfo:
@@ -30,6 +126,8 @@ class ClusterData:
     pod_count: int
     deployment_count: int
     fetch_timestamp: float
+    # (namespace, pod name) -> (CPU millicores, memory bytes) from metrics.k8s.io; None when not collected
+    pod_usage: Optional[Dict[Tuple[str, str], Tuple[float, float]]] = field(default=None, compare=False, repr=False)
     
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -39,3 +137,76 @@ class ClusterData:
             "deploymentCount": self.deployment_count,
             "fetchTimestamp": self.fetch_timestamp
         }
+
+@dataclass
+class ClusterDataDiff:
+    """Changes between two consecutive cluster snapshots"""
+    version: int
+    base_version: int
+    added_pods: List[PodInfo] = field(default_factory=list)
+    removed_pods: List[PodInfo] = field(default_factory=list)
+    modified_pods: List[Tuple[PodInfo, PodInfo]] = field(default_factory=list)
+    added_deployments: List[DeploymentInfo] = field(default_factory=list)
+    removed_deployments: List[DeploymentInfo] = field(default_factory=list)
+    modified_deployments: List[Tuple[DeploymentInfo, DeploymentInfo]] = field(default_factory=list)
+    pod_count: int = 0
+    deployment_count: int = 0
+    fetch_timestamp: float = 0
+    
+    def is_empty(self) -> bool:
+        return not (self.added_pods or self.removed_pods or self.modified_pods or
+                    self.added_deployments or self.removed_deployments or self.modified_deployments)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "baseVersion": self.base_version,
+            "pods": {
+                "added": [pod.to_dict() for pod in self.added_pods],
+                "removed": [{"namespace": pod.namespace, "name": pod.name} for pod in self.removed_pods],
+                "modified": [new.to_dict() for _, new in self.modified_pods]
+            },
+            "deployments": {
+                "added": [dep.to_dict() for dep in self.added_deployments],
+                "removed": [{"namespace": dep.namespace, "name": dep.name} for dep in self.removed_deployments],
+                "modified": [new.to_dict() for _, new in self.modified_deployments]
+            },
+            "podCount": self.pod_count,
+            "deploymentCount": self.deployment_count,
+            "fetchTimestamp": self.fetch_timestamp
+        }
+
+def _diff_items(old_items, new_items):
+    """Diff two lists of namespaced objects keyed by (namespace, name)"""
+    old_by_key = {(item.namespace, item.name): item for item in old_items}
+    added, modified = [], []
+    
+    for item in new_items:
+        previous = old_by_key.pop((item.namespace, item.name), None)
+        if previous is None:
+            added.append(item)
+        elif previous != item:
+            modified.append((previous, item))
+    
+    # Whatever is left was not present in the new snapshot
+    return added, list(old_by_key.values()), modified
+
+def diff_cluster_data(old: Optional[ClusterData], new: ClusterData,
+                      base_version: int, version: int) -> ClusterDataDiff:
+    """Compute the diff from old to new (old=None treats everything as added)"""
+    added_pods, removed_pods, modified_pods = _diff_items(old.pods if old else [], new.pods)
+    added_deps, removed_deps, modified_deps = _diff_items(old.deployments if old else [], new.deployments)
+    
+    return ClusterDataDiff(
+        version=version,
+        base_version=base_version,
+        added_pods=added_pods,
+        removed_pods=removed_pods,
+        modified_pods=modified_pods,
+        added_deployments=added_deps,
+        removed_deployments=removed_deps,
+        modified_deployments=modified_deps,
+        pod_count=new.pod_count,
+        deployment_count=new.deployment_count,
+        fetch_timestamp=new.fetch_timestamp
+    )
@@ -0,0 +1,144 @@
+from collections import Counter
+from typing import Any, Dict, Tuple
+from models.cluster_data import ClusterDataDiff, DeploymentInfo, PodInfo
+
+def _replicas(deployment: DeploymentInfo) -> Tuple[int, int]:
+    """(desired, ready) replicas; the API leaves either as None when zero"""
+    return deployment.replicas or 0, deployment.ready_replicas or 0
+
+def _ratio(ready: int, desired: int) -> float:
+    return round(ready / desired, 4) if desired else 1.0
+
+def _bump(counter: Counter, key, delta: int) -> None:
+    """Adjust a counter, dropping keys that reach zero"""
+    value = counter[key] + delta
+    if value:
+        counter[key] = value
+    else:
+        del counter[key]
+
+class _NamespaceTotals:
+    __slots__ = ('pods', 'phases', 'deployments', 'replicas', 'ready_replicas')
+
+    def __init__(self):
+        self.pods = 0
+        self.phases: Counter = Counter()
+        self.deployments = 0
+        self.replicas = 0
+        self.ready_replicas = 0
+
+    def is_empty(self) -> bool:
+        return not (self.pods or self.deployments)
+
+class ClusterSummary:
+    """Counts derived from the cluster snapshot, maintained from diffs.
+
+    apply() only touches the pods and deployments that changed, so keeping the
+    summary current costs O(changes) per snapshot and rendering it costs
+    O(namespaces + degraded deployments) rather than O(pods).
+    """
+
+    def __init__(self):
+        self.version = 0
+        self.fetch_timestamp: float = 0
+        self.pod_count = 0
+        self.deployment_count = 0
+        self.phases: Counter = Counter()
+        self.replicas = 0
+        self.ready_replicas = 0
+        self.namespaces: Dict[str, _NamespaceTotals] = {}
+        # Deployments with fewer ready replicas than desired: (namespace, name) -> (desired, ready)
+        self.degraded: Dict[Tuple[str, str], Tuple[int, int]] = {}
+
+    def apply(self, diff: ClusterDataDiff) -> None:
+        """Fold one snapshot diff into the aggregates"""
+        for pod in diff.removed_pods:
+            self._count_pod(pod, -1)
+        for pod in diff.added_pods:
+            self._count_pod(pod, 1)
+        for old, new in diff.modified_pods:
+            self._count_pod(old, -1)
+            self._count_pod(new, 1)
+
+        for deployment in diff.removed_deployments:
+            self._count_deployment(deployment, -1)
+        for deployment in diff.added_deployments:
+            self._count_deployment(deployment, 1)
+        for old, new in diff.modified_deployments:
+            self._count_deployment(old, -1)
+            self._count_deployment(new, 1)
+
+        self.version = diff.version
+        self.fetch_timestamp = diff.fetch_timestamp
+        self.pod_count = diff.pod_count
+        self.deployment_count = diff.deployment_count
+
+    def _namespace(self, name: str) -> _NamespaceTotals:
+        totals = self.namespaces.get(name)
+        if totals is None:
+            totals = self.namespaces[name] = _NamespaceTotals()
+        return totals
+
+    def _prune(self, name: str, totals: _NamespaceTotals) -> None:
+        if totals.is_empty():
+            del self.namespaces[name]
+
+    def _count_pod(self, pod: PodInfo, delta: int) -> None:
+        _bump(self.phases, pod.status, delta)
+        totals = self._namespace(pod.namespace)
+        totals.pods += delta
+        _bump(totals.phases, pod.status, delta)
+        self._prune(pod.namespace, totals)
+
+    def _count_deployment(self, deployment: DeploymentInfo, delta: int) -> None:
+        desired, ready = _replicas(deployment)
+        self.replicas += delta * desired
+        self.ready_replicas += delta * ready
+
+        totals = self._namespace(deployment.namespace)
+        totals.deployments += delta
+        totals.replicas += delta * desired
+        totals.ready_replicas += delta * ready
+        self._prune(deployment.namespace, totals)
+
+        key = (deployment.namespace, deployment.name)
+        if delta < 0:
+            self.degraded.pop(key, None)
+        elif ready < desired:
+            self.degraded[key] = (desired, ready)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "fetchTimestamp": self.fetch_timestamp,
+            "podCount": self.pod_count,
+            "deploymentCount": self.deployment_count,
+            "podsByPhase": dict(self.phases),
+            "readiness": {
+                "replicas": self.replicas,
+                "readyReplicas": self.ready_replicas,
+                "ratio": _ratio(self.ready_replicas, self.replicas),
+                "degradedDeployments": len(self.degraded)
+            },
+            "namespaces": {
+                name: {
+                    "pods": totals.pods,
+                    "podsByPhase": dict(totals.phases),
+                    "deployments": totals.deployments,
+                    "replicas": totals.replicas,
+                    "readyReplicas": totals.ready_replicas,
+                    "readiness": _ratio(totals.ready_replicas, totals.replicas)
+                }
+                for name, totals in sorted(self.namespaces.items())
+            },
+            "degraded": [
+                {
+                    "namespace": namespace,
+                    "name": name,
+                    "replicas": desired,
+                    "readyReplicas": ready,
+                    "readiness": _ratio(ready, desired)
+                }
+                for (namespace, name), (desired, ready) in sorted(self.degraded.items())
+            ]
+        }
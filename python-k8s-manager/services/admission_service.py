@@ -0,0 +1,163 @@
+import math
+import os
+import threading
+import time
+from typing import Dict, Any, Optional
+
+# Longest wait a rejection advertises; a bucket with rate 0 would otherwise say "never"
+MAX_RETRY_AFTER_SECONDS = 60
+
+class FetchBudgetExceeded(Exception):
+    """Raised when a cluster fetch is rejected by admission control"""
+
+    def __init__(self, kind: str, reason: str, retry_after: float):
+        super().__init__(f"{kind} fetch rejected: {reason}")
+        self.kind = kind
+        self.reason = reason
+        self.retry_after = min(retry_after, MAX_RETRY_AFTER_SECONDS)
+
+    @property
+    def retry_after_header(self) -> str:
+        """Retry-After value in whole seconds"""
+        return str(max(1, math.ceil(self.retry_after)))
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at a fixed rate"""
+
+    def __init__(self, rate_per_minute: float, burst: int):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate_per_second)
+        self._updated = now
+
+    def try_take(self) -> float:
+        """Take one token; returns 0 on success or the seconds until one is available"""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            if self.rate_per_second <= 0:
+                return float('inf')
+            return (1 - self._tokens) / self.rate_per_second
+
+    def refund(self) -> None:
+        """Return a token taken for a request that did not go ahead"""
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + 1)
+
+    def get_state(self) -> Dict[str, Any]:
+        with self._lock:
+            self._refill(time.monotonic())
+            return {
+                "tokens": round(self._tokens, 2),
+                "burst": self.burst,
+                "ratePerMinute": self.rate_per_second * 60
+            }
+
+class FetchPermit:
+    """Admission to run one cluster fetch; release() frees the concurrency slot"""
+
+    def __init__(self, controller: 'AdmissionController', kind: str):
+        self._controller = controller
+        self.kind = kind
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._controller._release(self.kind)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+class AdmissionController:
+    """Rate limits and caps concurrency of full-cluster fetches against the API server.
+
+    Each fetch kind (scheduled, forced, cache miss) has its own token bucket so a
+    burst of forced refreshes cannot starve the scheduled collection; all kinds
+    share one concurrency cap.
+    """
+
+    SCHEDULED = 'scheduled'
+    FORCED = 'forced'
+    MISS = 'miss'
+
+    def __init__(self, budgets: Dict[str, TokenBucket], max_concurrent: int = 2):
+        self.budgets = budgets
+        self.max_concurrent = max_concurrent
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._admitted: Dict[str, int] = {kind: 0 for kind in budgets}
+        self._rejected: Dict[str, int] = {kind: 0 for kind in budgets}
+
+    @classmethod
+    def from_env(cls) -> 'AdmissionController':
+        """Build a controller from FETCH_* environment variables"""
+        def bucket(kind: str, rate: float, burst: int) -> TokenBucket:
+            prefix = f"FETCH_{kind.upper()}"
+            return TokenBucket(
+                rate_per_minute=float(os.getenv(f"{prefix}_PER_MINUTE", rate)),
+                burst=int(os.getenv(f"{prefix}_BURST", burst))
+            )
+
+        return cls(
+            budgets={
+                # Covers the interrogator and every resource collector, and a lease takeover runs them all at once
+                cls.SCHEDULED: bucket(cls.SCHEDULED, 8, 6),
+                cls.FORCED: bucket(cls.FORCED, 6, 2),
+                cls.MISS: bucket(cls.MISS, 12, 3)
+            },
+            max_concurrent=int(os.getenv("FETCH_MAX_CONCURRENT", "2"))
+        )
+
+    def acquire(self, kind: str) -> FetchPermit:
+        """Admit a fetch of the given kind or raise FetchBudgetExceeded"""
+        bucket = self.budgets[kind]
+        wait = bucket.try_take()
+        if wait > 0:
+            self._record_rejection(kind)
+            raise FetchBudgetExceeded(kind, "rate limit exceeded", wait)
+
+        with self._lock:
+            if self._in_flight >= self.max_concurrent:
+                self._rejected[kind] += 1
+                bucket.refund()
+                raise FetchBudgetExceeded(kind, "too many concurrent fetches", 1)
+            self._in_flight += 1
+            self._admitted[kind] += 1
+
+        return FetchPermit(self, kind)
+
+    def _release(self, kind: str) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    def _record_rejection(self, kind: str) -> None:
+        with self._lock:
+            self._rejected[kind] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get limiter state for status reporting"""
+        with self._lock:
+            stats = {
+                "inFlight": self._in_flight,
+                "maxConcurrent": self.max_concurrent,
+                "budgets": {}
+            }
+            admitted = dict(self._admitted)
+            rejected = dict(self._rejected)
+
+        for kind, bucket in self.budgets.items():
+            state = bucket.get_state()
+            state.update({"admitted": admitted[kind], "rejected": rejected[kind]})
+            stats["budgets"][kind] = state
+        return stats
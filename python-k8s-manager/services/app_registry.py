@@ -0,0 +1,197 @@
+import heapq
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+# (app, instance)
+InstanceKey = Tuple[str, str]
+
+class _AppInstance:
+    """Latest heartbeat from one app instance"""
+
+    __slots__ = ('app', 'instance', 'namespace', 'status', 'first_seen', 'last_seen', 'deadline',
+                 'scheduled', 'heartbeats', 'uptime', 'pending', 'handlers', 'throughput', 'failed')
+
+    def __init__(self, app: str, instance: str, now: float):
+        self.app = app
+        self.instance = instance
+        self.namespace: Optional[str] = None
+        self.status = "running"
+        self.first_seen = now
+        self.last_seen = now
+        self.deadline = now
+        # Deadline of this instance's item in the heap (may lag behind deadline)
+        self.scheduled = now
+        self.heartbeats = 0
+        self.uptime: Optional[float] = None
+        self.pending: Optional[int] = None
+        self.handlers: Optional[int] = None
+        self.throughput: Optional[float] = None
+        self.failed: Optional[int] = None
+
+    def update(self, message: Dict[str, Any], now: float, ttl: float) -> None:
+        self.namespace = message.get("namespace") or self.namespace
+        self.status = message.get("status", "running")
+        self.last_seen = now
+        self.deadline = now + ttl
+        self.heartbeats += 1
+        self.uptime = message.get("uptime")
+        self.pending = message.get("pending")
+        self.handlers = message.get("handlers")
+        # Keep only totals from the per-subject metrics, not the whole message
+        subjects = message.get("subjects")
+        if isinstance(subjects, dict):
+            self.throughput = sum(s.get("throughput") or 0 for s in subjects.values())
+            self.failed = sum(s.get("failed") or 0 for s in subjects.values())
+
+    def to_dict(self, now: float) -> Dict[str, Any]:
+        return {
+            "app": self.app,
+            "instance": self.instance,
+            "namespace": self.namespace,
+            "status": self.status,
+            "firstSeen": self.first_seen,
+            "lastSeen": self.last_seen,
+            "age": now - self.last_seen,
+            "expiresIn": max(self.deadline - now, 0),
+            "heartbeats": self.heartbeats,
+            "uptime": self.uptime,
+            "pending": self.pending,
+            "handlers": self.handlers,
+            "throughput": self.throughput,
+            "failed": self.failed
+        }
+
+class AppRegistry:
+    """Liveness registry built from app.status heartbeats.
+
+    Each instance has one entry in a deadline heap. A heartbeat only moves the
+    instance's own deadline forward (O(1), no heap work); when an entry reaches
+    the top of the heap with a deadline that has since moved, it is pushed
+    back with the new one. So the heap holds one item per instance, and
+    expiry touches only instances that are actually due instead of scanning
+    them all. Expiry runs as part of heartbeats and reads, so no timer thread
+    is needed.
+    """
+
+    def __init__(self, ttl_seconds: float = 90, expired_history: int = 1000):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._instances: Dict[InstanceKey, _AppInstance] = {}
+        self._deadlines: List[Tuple[float, InstanceKey]] = []
+        self._by_app: Dict[str, Dict[str, _AppInstance]] = {}
+        self._expired: Deque[Dict[str, Any]] = deque(maxlen=expired_history)
+        self._heartbeats = 0
+        self._expirations = 0
+        self._departures = 0
+        self._rejected = 0
+
+    def heartbeat(self, message: Dict[str, Any], now: Optional[float] = None) -> bool:
+        """Record one app.status message; returns False if it doesn't name an app"""
+        app = message.get("app")
+        if not isinstance(app, str) or not app:
+            with self._lock:
+                self._rejected += 1
+            return False
+
+        now = time.time() if now is None else now
+        key = (app, str(message.get("instance") or app))
+        with self._lock:
+            self._heartbeats += 1
+            self._expire(now)
+
+            if message.get("status") == "stopped":
+                # Clean shutdown: drop right away instead of waiting for the TTL
+                if self._remove(key) is not None:
+                    self._departures += 1
+                return True
+
+            entry = self._instances.get(key)
+            if entry is None:
+                entry = _AppInstance(app, key[1], now)
+                self._instances[key] = entry
+                self._by_app.setdefault(app, {})[key[1]] = entry
+                entry.update(message, now, self.ttl_seconds)
+                entry.scheduled = entry.deadline
+                heapq.heappush(self._deadlines, (entry.deadline, key))
+            else:
+                entry.update(message, now, self.ttl_seconds)
+            return True
+
+    def _remove(self, key: InstanceKey) -> Optional[_AppInstance]:
+        # The heap item stays behind and is dropped when it surfaces
+        entry = self._instances.pop(key, None)
+        if entry is not None:
+            siblings = self._by_app[entry.app]
+            del siblings[entry.instance]
+            if not siblings:
+                del self._by_app[entry.app]
+        return entry
+
+    def _expire(self, now: float) -> None:
+        deadlines = self._deadlines
+        while deadlines and deadlines[0][0] <= now:
+            scheduled, key = heapq.heappop(deadlines)
+            entry = self._instances.get(key)
+            if entry is None or entry.scheduled != scheduled:
+                # Left over from an instance that stopped (and maybe came back)
+                continue
+            if entry.deadline > now:
+                # Heartbeats moved the deadline since this item was pushed
+                entry.scheduled = entry.deadline
+                heapq.heappush(deadlines, (entry.deadline, key))
+                continue
+            self._expire_entry(key, entry, now)
+
+    def _expire_entry(self, key: InstanceKey, entry: _AppInstance, now: float) -> None:
+        self._remove(key)
+        self._expirations += 1
+        self._expired.append({
+            "app": entry.app,
+            "instance": entry.instance,
+            "namespace": entry.namespace,
+            "lastSeen": entry.last_seen,
+            "expiredAt": now
+        })
+
+    def summary(self, now: Optional[float] = None) -> Dict[str, int]:
+        """Live instance count per app"""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._expire(now)
+            return {app: len(instances) for app, instances in self._by_app.items()}
+
+    def instances(self, app: Optional[str] = None, limit: Optional[int] = None,
+                  now: Optional[float] = None) -> Tuple[int, List[Dict[str, Any]]]:
+        """(total matching, up to limit live instances), optionally for one app"""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._expire(now)
+            if app is None:
+                entries = list(self._instances.values())
+            else:
+                entries = list(self._by_app.get(app, {}).values())
+        entries.sort(key=lambda entry: (entry.app, entry.instance))
+        total = len(entries)
+        if limit is not None:
+            entries = entries[:limit]
+        return total, [entry.to_dict(now) for entry in entries]
+
+    def recently_expired(self, app: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [item for item in self._expired if app is None or item["app"] == app]
+
+    def get_stats(self, now: Optional[float] = None) -> Dict[str, Any]:
+        with self._lock:
+            self._expire(time.time() if now is None else now)
+            return {
+                "ttlSeconds": self.ttl_seconds,
+                "apps": len(self._by_app),
+                "instances": len(self._instances),
+                "heapSize": len(self._deadlines),
+                "heartbeats": self._heartbeats,
+                "expirations": self._expirations,
+                "departures": self._departures,
+                "rejected": self._rejected
+            }
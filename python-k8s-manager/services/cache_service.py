@@ -1,7 +1,14 @@
+import logging
 import threading
 import time
-from typing import Optional, Dict, Any
-from models.cluster_data import ClusterData
+from typing import Optional, Dict, Any, Callable, List, Tuple
+from models.cluster_data import ClusterData, ClusterDataDiff, diff_cluster_data
+from models.cluster_summary import ClusterSummary
+
+# Listener signature: (diff, new snapshot) -> None
+UpdateListener = Callable[[ClusterDataDiff, ClusterData], None]
+
+logger = logging.getLogger(__name__)
 
 class ClusterDataCache:
     """Thread-safe cache for cluster data with read/write locking"""
@@ -11,14 +18,73 @@ class ClusterDataCache:
         self._data: Optional[ClusterData] = None
         self._last_updated: float = 0
         self._is_valid: bool = False
+        self._version: int = 0
+        
+        # Serializes writers so diffs and listener notifications stay in version order
+        self._update_lock = threading.Lock()
+        # Last snapshot handed to listeners; survives invalidate() so diffs stay consistent
+        self._last_published: Optional[ClusterData] = None
+        self._listeners: List[UpdateListener] = []
+        
+        # Counts kept current from each diff; the rendered dict is swapped in per version
+        self._summary = ClusterSummary()
+        self._summary_dict: Optional[Dict[str, Any]] = None
     
     def update_data(self, cluster_data: ClusterData) -> None:
         """Update cache with new cluster data"""
-        with self._lock.gen_wlock():
-            self._data = cluster_data
-            self._last_updated = time.time()
-            self._is_valid = True
-            print(f"Cache updated with {cluster_data.pod_count} pods, {cluster_data.deployment_count} deployments")
+        with self._update_lock:
+            with self._lock.gen_wlock():
+                self._data = cluster_data
+                self._last_updated = time.time()
+                self._is_valid = True
+                base_version = self._version
+                self._version += 1
+                version = self._version
+            
+            # Diff and notify outside the read/write lock so readers are never blocked
+            diff = diff_cluster_data(self._last_published, cluster_data, base_version, version)
+            self._last_published = cluster_data
+            self._summary.apply(diff)
+            summary_dict = self._summary.to_dict()
+            with self._lock.gen_wlock():
+                self._summary_dict = summary_dict
+            
+            for listener in list(self._listeners):
+                try:
+                    listener(diff, cluster_data)
+                except Exception:
+                    logger.exception("Cache listener error")
+        
+        logger.info("Cache updated", extra={"version": version, "pods": cluster_data.pod_count,
+                                            "deployments": cluster_data.deployment_count})
+    
+    def add_listener(self, listener: UpdateListener) -> None:
+        """Register a callback invoked with the diff after every update"""
+        self._listeners.append(listener)
+    
+    def remove_listener(self, listener: UpdateListener) -> None:
+        """Unregister an update callback"""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+    
+    def get_snapshot(self) -> Tuple[Optional[ClusterData], int]:
+        """Get cached cluster data together with its version, read atomically"""
+        with self._lock.gen_rlock():
+            return self._data, self._version
+
+    def get_summary(self) -> Optional[Dict[str, Any]]:
+        """Get aggregate counts for the latest published snapshot (None before the first update).
+        
+        Unlike get_data() this is not cleared by invalidate(); it always describes
+        the last snapshot handed to listeners.
+        """
+        with self._lock.gen_rlock():
+            return self._summary_dict
+
+    def get_version(self) -> int:
+        """Get the snapshot version (incremented on every update)"""
+        with self._lock.gen_rlock():
+            return self._version
     
     def get_data(self) -> Optional[ClusterData]:
         """Get cached cluster data"""
@@ -53,13 +119,14 @@ class ClusterDataCache:
             self._data = None
             self._is_valid = False
             self._last_updated = 0
-            print("Cache invalidated")
+        logger.info("Cache invalidated")
     
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
         with self._lock.gen_rlock():
             return {
                 "isValid": self._is_valid,
+                "version": self._version,
                 "entryCount": len(self._data.pods) + len(self._data.deployments) if self._data else 0,
                 "lastUpdated": self._last_updated * 1000,  # Convert to milliseconds
                 "cacheAge": self.get_cache_age() * 1000 if self._is_valid else -1
@@ -0,0 +1,242 @@
+import os
+import re
+import threading
+import time
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from services.kubernetes_service import KubernetesService
+from services.cache_service import ClusterDataCache
+from services.nats_service import NatsService
+from services.interrogator_service import ClusterInterrogator
+from services.stream_service import ClusterUpdateBroadcaster
+from services.admission_service import AdmissionController
+from services.topology_service import TopologyService
+from services.history_service import HistoryService, MetricsHistory
+from services.search_service import SearchService
+from services.usage_service import UsageService, usage_source_from_env
+from services.collector_service import CollectorScheduler, ResourceCache, default_collectors
+from services.coordination_service import LeaseBackend, LeaderElector, replica_identity
+from services.replication_service import ClusterReplicator
+
+class UnknownCluster(KeyError):
+    """No cluster registered under the requested name"""
+
+@dataclass
+class ClusterContext:
+    """Everything the manager keeps for one cluster.
+
+    In-process services (cache, stream, topology, search, history, usage, admission)
+    exist from registration; the Kubernetes client, interrogator and resource
+    collectors are attached by connect() once the API server is reachable.
+    With leader election, connect() also attaches the cluster's elector and
+    replicator: only the lease holder collects (snapshots and resource kinds),
+    the others follow over NATS.
+    """
+    name: str
+    kube_context: Optional[str]
+    cache: ClusterDataCache
+    admission: AdmissionController
+    broadcaster: ClusterUpdateBroadcaster
+    topology: TopologyService
+    search: SearchService
+    history: HistoryService
+    usage: UsageService
+    k8s_service: Optional[KubernetesService] = None
+    interrogator: Optional[ClusterInterrogator] = None
+    resources: Optional[ResourceCache] = None
+    collectors: Optional[CollectorScheduler] = None
+    elector: Optional[LeaderElector] = None
+    replicator: Optional[ClusterReplicator] = None
+    ready_time: Optional[float] = None
+    last_error: Optional[str] = None
+
+    @classmethod
+    def create(cls, name: str, kube_context: Optional[str] = None) -> 'ClusterContext':
+        """Build and start the in-process services for a cluster"""
+        cache = ClusterDataCache()
+        context = cls(
+            name=name,
+            kube_context=kube_context,
+            cache=cache,
+            # Rate limits and concurrency cap apply per API server
+            admission=AdmissionController.from_env(),
+            # Fan cache updates out to streaming clients
+            broadcaster=ClusterUpdateBroadcaster(
+                cache,
+                max_queue_size=int(os.getenv("STREAM_QUEUE_SIZE", "32")),
+                heartbeat_seconds=float(os.getenv("STREAM_HEARTBEAT_SECONDS", "15"))
+            ),
+            # Regroup the diagram topology once per snapshot version
+            topology=TopologyService(cache),
+            # Name search index, patched from each snapshot diff
+            search=SearchService(cache),
+            # Fixed-size metric history, downsampled into 1m/10m buckets as it ages
+            history=HistoryService(cache, MetricsHistory(
+                max_series=int(os.getenv("HISTORY_MAX_SERIES", "128")),
+                raw_capacity=int(os.getenv("HISTORY_RAW_SAMPLES", "720"))
+            )),
+            # Pod usage arrays and namespace/deployment/node rollups, rebuilt once per snapshot
+            usage=UsageService(cache)
+        )
+        context.broadcaster.start()
+        context.topology.start()
+        context.search.start()
+        context.history.start()
+        context.usage.start()
+        return context
+
+    def connect(self, nats_service: Optional[NatsService], collector_executor: Optional[Executor] = None,
+                interval_seconds: int = 30, lease_backend: Optional[LeaseBackend] = None) -> None:
+        """Create the Kubernetes client and start collection (raises if the cluster is unreachable)"""
+        self.k8s_service = KubernetesService(
+            context=self.kube_context,
+            request_timeout=float(os.getenv("K8S_REQUEST_TIMEOUT", "30")),
+            usage_source=usage_source_from_env()
+        )
+
+        # Other kinds are collected independently, each on its own interval
+        self.resources = ResourceCache()
+        self.collectors = CollectorScheduler(
+            self.k8s_service,
+            self.resources,
+            default_collectors(),
+            max_workers=int(os.getenv("COLLECTOR_WORKERS", "4")),
+            executor=collector_executor,
+            admission=self.admission
+        )
+
+        # One lease per cluster, so different replicas can end up collecting different clusters
+        if lease_backend is not None and nats_service is not None:
+            self.elector = LeaderElector(
+                lease_backend,
+                lease_name(self.name),
+                replica_identity(),
+                ttl_seconds=float(os.getenv("LEADER_ELECTION_TTL_SECONDS", "15")),
+                on_started_leading=self._on_started_leading,
+                on_stopped_leading=self._on_stopped_leading
+            )
+            self.replicator = ClusterReplicator(self.name, self.cache, nats_service, self.elector,
+                                                resources=self.resources)
+
+        self.interrogator = ClusterInterrogator(
+            self.k8s_service,
+            self.cache,
+            nats_service,
+            interval_seconds=interval_seconds,
+            admission=self.admission,
+            cluster_name=self.name,
+            elector=self.elector
+        )
+        self.interrogator.start()
+        if self.elector:
+            # Collectors start and stop with the lease
+            self.replicator.start()
+            self.elector.start()
+        else:
+            self.collectors.start()
+
+        self.last_error = None
+        self.ready_time = time.time()
+
+    def _on_started_leading(self) -> None:
+        self.replicator.start_term()
+        # Don't wait out the interval; followers are waiting for a snapshot
+        self.interrogator.collect_now()
+        # Collect every kind now, including ones an earlier term collected recently
+        self.collectors.refresh_all()
+        self.collectors.start()
+
+    def _on_stopped_leading(self) -> None:
+        self.collectors.stop()
+        self.replicator.end_term()
+
+    def is_ready(self) -> bool:
+        return self.ready_time is not None
+
+    def stop(self) -> None:
+        # Hand the lease over first so another replica takes over collection right away
+        if self.elector:
+            self.elector.stop()
+        if self.replicator:
+            self.replicator.stop()
+        if self.interrogator:
+            self.interrogator.stop()
+        if self.collectors:
+            self.collectors.stop()
+        self.broadcaster.stop()
+
+    def get_status(self) -> Dict[str, Any]:
+        status = {
+            "kubeContext": self.kube_context,
+            "ready": self.is_ready(),
+            "lastError": self.last_error,
+            "cache": self.cache.get_stats(),
+            "stream": self.broadcaster.get_stats(),
+            "admission": self.admission.get_stats(),
+            "topology": self.topology.get_stats(),
+            "history": self.history.get_stats(),
+            "search": self.search.get_stats(),
+            "usage": self.usage.get_stats()
+        }
+        if self.interrogator:
+            status["interrogator"] = self.interrogator.get_status()
+        if self.collectors:
+            status["collectors"] = self.collectors.get_stats()
+        if self.replicator:
+            status["replication"] = self.replicator.get_stats()
+        return status
+
+class ClusterRegistry:
+    """Named cluster contexts; requests without a cluster name get the default (first registered)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._contexts: Dict[str, ClusterContext] = {}
+        self.default_name: Optional[str] = None
+
+    def register(self, context: ClusterContext) -> None:
+        with self._lock:
+            self._contexts[context.name] = context
+            if self.default_name is None:
+                self.default_name = context.name
+
+    def get(self, name: Optional[str] = None) -> ClusterContext:
+        with self._lock:
+            context = self._contexts.get(name or self.default_name)
+        if context is None:
+            raise UnknownCluster(name or self.default_name)
+        return context
+
+    def contexts(self) -> List[ClusterContext]:
+        with self._lock:
+            return list(self._contexts.values())
+
+    def names(self) -> List[str]:
+        with self._lock:
+            return list(self._contexts)
+
+def lease_name(cluster_name: str) -> str:
+    """Lease for a cluster's collection, a valid Kubernetes object name"""
+    return "python-k8s-manager-" + re.sub(r'[^a-z0-9.-]', '-', cluster_name.lower()).strip('-.')[:200]
+
+def configured_clusters() -> Optional[List[Tuple[str, Optional[str]]]]:
+    """(cluster name, kubeconfig context) pairs from K8S_CONTEXTS.
+
+    Unset means a single cluster (named K8S_CLUSTER_NAME) using the in-cluster
+    or default kubeconfig, and a comma separated list loads those contexts.
+    Returns None for '*', meaning every context in the kubeconfig (see
+    kubeconfig_clusters()).
+    """
+    raw = os.getenv("K8S_CONTEXTS", "").strip()
+    if not raw:
+        return [(os.getenv("K8S_CLUSTER_NAME", "default"), None)]
+    if raw == "*":
+        return None
+    return [(name.strip(), name.strip()) for name in raw.split(",") if name.strip()]
+
+def kubeconfig_clusters() -> List[Tuple[str, Optional[str]]]:
+    """Every context in the local kubeconfig (imports the kubernetes client)"""
+    from kubernetes import config
+    contexts, _ = config.list_kube_config_contexts()
+    return [(context["name"], context["name"]) for context in contexts]
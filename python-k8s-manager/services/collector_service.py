@@ -0,0 +1,341 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Set
+from services.kubernetes_service import KubernetesService
+from services.cache_service import RWLock
+from services.admission_service import AdmissionController, FetchBudgetExceeded, FetchPermit
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class ResourceCollector:
+    """One Kubernetes kind to collect: how to list it, how to reduce each object, how often"""
+    kind: str
+    fetch: Callable[[KubernetesService], Any]
+    extract: Callable[[Any], Dict[str, Any]]
+    interval_seconds: float
+
+@dataclass
+class ResourceSnapshot:
+    kind: str
+    items: List[Dict[str, Any]]
+    version: int
+    fetch_timestamp: float
+    duration_seconds: float
+
+class ResourceCache:
+    """Latest snapshot of every collected kind, under one version counter"""
+
+    def __init__(self):
+        self._lock = RWLock()
+        self._snapshots: Dict[str, ResourceSnapshot] = {}
+        self._version = 0
+        self._listeners: List[Callable[[ResourceSnapshot], None]] = []
+
+    def put(self, kind: str, items: List[Dict[str, Any]], duration_seconds: float,
+            fetch_timestamp: Optional[float] = None) -> int:
+        with self._lock.gen_wlock():
+            self._version += 1
+            snapshot = ResourceSnapshot(kind, items, self._version, fetch_timestamp or time.time(), duration_seconds)
+            self._snapshots[kind] = snapshot
+        for listener in list(self._listeners):
+            try:
+                listener(snapshot)
+            except Exception:
+                logger.exception("Resource cache listener error", extra={"kind": kind})
+        return snapshot.version
+
+    def add_listener(self, listener: Callable[[ResourceSnapshot], None]) -> None:
+        """Register a callback invoked with each new snapshot of a kind"""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[ResourceSnapshot], None]) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def snapshots(self) -> List[ResourceSnapshot]:
+        with self._lock.gen_rlock():
+            return list(self._snapshots.values())
+
+    def get(self, kind: str) -> Optional[ResourceSnapshot]:
+        with self._lock.gen_rlock():
+            return self._snapshots.get(kind)
+
+    def get_version(self) -> int:
+        with self._lock.gen_rlock():
+            return self._version
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock.gen_rlock():
+            return {
+                "version": self._version,
+                "kinds": {
+                    kind: {
+                        "count": len(snapshot.items),
+                        "version": snapshot.version,
+                        "age": now - snapshot.fetch_timestamp,
+                        "fetchSeconds": snapshot.duration_seconds
+                    }
+                    for kind, snapshot in self._snapshots.items()
+                }
+            }
+
+class CollectorScheduler:
+    """Runs each collector on its own interval, concurrently on a shared worker pool.
+
+    A collector is never run twice at once; if a run overlaps its next due time
+    the run is simply late. Kinds are independent, so a slow or failing kind
+    doesn't delay the others. With admission control, each scheduled run takes a
+    scheduled permit and is retried once the budget allows.
+    """
+
+    def __init__(self, k8s_service: KubernetesService, cache: ResourceCache,
+                 collectors: List[ResourceCollector], max_workers: int = 4,
+                 executor: Optional[Executor] = None,
+                 admission: Optional[AdmissionController] = None):
+        self.k8s_service = k8s_service
+        self.admission = admission
+        self.cache = cache
+        self.max_workers = max_workers
+        # A pool passed in is shared (e.g. across clusters) and left running on stop()
+        self._shared_executor = executor
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._collectors: Dict[str, ResourceCollector] = {}
+        self._next_due: Dict[str, float] = {}
+        self._in_flight: Set[str] = set()
+        # Forced refreshes admitted by the caller, used by the kind's next run
+        self._permits: Dict[str, FetchPermit] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._executor: Optional[Executor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        for collector in collectors:
+            self.register(collector)
+
+    def register(self, collector: ResourceCollector) -> None:
+        """Add (or replace) a collector; it runs on the next scheduler pass"""
+        with self._lock:
+            self._collectors[collector.kind] = collector
+            self._next_due[collector.kind] = 0
+            self._stats.setdefault(collector.kind, {"runs": 0, "failures": 0, "throttled": 0, "lastError": None})
+        self._wake.set()
+
+    def kinds(self) -> List[str]:
+        with self._lock:
+            return sorted(self._collectors)
+
+    def refresh(self, kind: str, permit: Optional[FetchPermit] = None) -> bool:
+        """Make a kind due now; returns False for unknown kinds.
+
+        A permit (e.g. a forced admission) is used by the run instead of a scheduled one.
+        """
+        with self._lock:
+            known = kind in self._collectors
+            if known:
+                self._next_due[kind] = 0
+                if permit and self._running and kind not in self._permits:
+                    self._permits[kind] = permit
+                    permit = None
+        # Unknown kind, stopped scheduler, or a refresh already waiting covers this one
+        if permit:
+            permit.release()
+        if not known:
+            return False
+        self._wake.set()
+        return True
+
+    def refresh_all(self) -> None:
+        """Make every kind due now"""
+        with self._lock:
+            for kind in self._next_due:
+                self._next_due[kind] = 0
+        self._wake.set()
+
+    def is_running(self) -> bool:
+        return self._running
+
+    def start(self) -> None:
+        if self._running:
+            return
+        self._running = True
+        self._executor = self._shared_executor or ThreadPoolExecutor(max_workers=self.max_workers,
+                                                                     thread_name_prefix="collector")
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        logger.info("CollectorScheduler started", extra={"kinds": self.kinds()})
+
+    def stop(self) -> None:
+        if not self._running:
+            return
+        self._running = False
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        with self._lock:
+            permits, self._permits = list(self._permits.values()), {}
+        for permit in permits:
+            permit.release()
+        if self._executor and self._executor is not self._shared_executor:
+            self._executor.shutdown(wait=False)
+        logger.info("CollectorScheduler stopped")
+
+    def _run(self) -> None:
+        while self._running:
+            now = time.monotonic()
+            with self._lock:
+                for kind, due in self._next_due.items():
+                    if due <= now and kind not in self._in_flight:
+                        collector = self._collectors[kind]
+                        self._in_flight.add(kind)
+                        self._next_due[kind] = now + collector.interval_seconds
+                        self._executor.submit(self._collect, collector, self._permits.pop(kind, None))
+                next_due = min(self._next_due.values(), default=now + 60)
+
+            # Sleep until the earliest collector is due, or until refresh()/register() wakes us
+            self._wake.wait(timeout=max(next_due - now, 0.05))
+            self._wake.clear()
+
+    def _admit(self, collector: ResourceCollector) -> Optional[FetchPermit]:
+        """Take a scheduled permit, or push the run back until the budget allows it"""
+        try:
+            return self.admission.acquire(AdmissionController.SCHEDULED)
+        except FetchBudgetExceeded as e:
+            logger.warning(f"Delaying {collector.kind} collection: {e}", extra={"kind": collector.kind})
+            with self._lock:
+                self._stats[collector.kind]["throttled"] += 1
+                self._next_due[collector.kind] = time.monotonic() + e.retry_after
+                self._in_flight.discard(collector.kind)
+            self._wake.set()
+            return None
+
+    def _collect(self, collector: ResourceCollector, permit: Optional[FetchPermit] = None) -> None:
+        if permit is None and self.admission:
+            permit = self._admit(collector)
+            if permit is None:
+                return
+        started = time.time()
+        try:
+            # The admission slot only covers the API call
+            try:
+                result = collector.fetch(self.k8s_service)
+            finally:
+                if permit:
+                    permit.release()
+            items = [collector.extract(obj) for obj in result.items]
+            duration = time.time() - started
+            self.cache.put(collector.kind, items, duration)
+            with self._lock:
+                stats = self._stats[collector.kind]
+                stats["runs"] += 1
+                stats["lastDuration"] = duration
+                stats["lastError"] = None
+        except Exception as e:
+            logger.error(f"Error collecting {collector.kind}: {e}", extra={"kind": collector.kind})
+            with self._lock:
+                stats = self._stats[collector.kind]
+                stats["failures"] += 1
+                stats["lastError"] = str(e)
+        finally:
+            with self._lock:
+                self._in_flight.discard(collector.kind)
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "running": self._running,
+                "workers": self.max_workers,
+                "collectors": {
+                    kind: dict(self._stats[kind],
+                               intervalSeconds=collector.interval_seconds,
+                               inFlight=kind in self._in_flight,
+                               nextRunIn=max(self._next_due[kind] - now, 0))
+                    for kind, collector in self._collectors.items()
+                }
+            }
+
+# Built-in collectors
+
+def _timestamp(metadata) -> Optional[str]:
+    return metadata.creation_timestamp.isoformat() if metadata.creation_timestamp else None
+
+def _controller_name(metadata) -> Optional[str]:
+    for owner in (metadata.owner_references or []):
+        if owner.controller:
+            return owner.name
+    return None
+
+def extract_service(service) -> Dict[str, Any]:
+    return {
+        "name": service.metadata.name,
+        "namespace": service.metadata.namespace,
+        "type": service.spec.type,
+        "cluster_ip": service.spec.cluster_ip,
+        "ports": [f"{port.port}/{port.protocol}" for port in (service.spec.ports or [])],
+        "selector": service.spec.selector or {},
+        "creation_timestamp": _timestamp(service.metadata)
+    }
+
+def extract_node(node) -> Dict[str, Any]:
+    from kubernetes.utils import parse_quantity
+
+    conditions = {condition.type: condition.status for condition in (node.status.conditions or [])}
+    capacity = node.status.capacity or {}
+    labels = node.metadata.labels or {}
+    return {
+        "name": node.metadata.name,
+        "namespace": None,
+        "ready": conditions.get("Ready") == "True",
+        "unschedulable": bool(node.spec.unschedulable),
+        "roles": sorted(label.split("/", 1)[1] for label in labels if label.startswith("node-role.kubernetes.io/")),
+        "kubelet_version": node.status.node_info.kubelet_version if node.status.node_info else None,
+        "cpu_capacity_millis": int(parse_quantity(capacity["cpu"]) * 1000) if "cpu" in capacity else None,
+        "memory_capacity_bytes": int(parse_quantity(capacity["memory"])) if "memory" in capacity else None,
+        "creation_timestamp": _timestamp(node.metadata)
+    }
+
+def extract_replica_set(replica_set) -> Dict[str, Any]:
+    return {
+        "name": replica_set.metadata.name,
+        "namespace": replica_set.metadata.namespace,
+        "replicas": replica_set.spec.replicas,
+        "ready_replicas": replica_set.status.ready_replicas,
+        "owner": _controller_name(replica_set.metadata),
+        "creation_timestamp": _timestamp(replica_set.metadata)
+    }
+
+def extract_stateful_set(stateful_set) -> Dict[str, Any]:
+    return {
+        "name": stateful_set.metadata.name,
+        "namespace": stateful_set.metadata.namespace,
+        "replicas": stateful_set.spec.replicas,
+        "ready_replicas": stateful_set.status.ready_replicas,
+        "service_name": stateful_set.spec.service_name,
+        "creation_timestamp": _timestamp(stateful_set.metadata)
+    }
+
+def _interval(kind: str, default: float) -> float:
+    """Per-kind interval, overridable with COLLECT_<KIND>_SECONDS"""
+    return float(os.getenv(f"COLLECT_{kind.upper()}_SECONDS", str(default)))
+
+def default_collectors() -> List[ResourceCollector]:
+    """Collectors for kinds beyond pods and deployments (which the interrogator owns)"""
+    return [
+        ResourceCollector("services", lambda k8s: k8s.core_v1.list_service_for_all_namespaces(
+                              _request_timeout=k8s.request_timeout),
+                          extract_service, _interval("services", 60)),
+        ResourceCollector("nodes", lambda k8s: k8s.core_v1.list_node(_request_timeout=k8s.request_timeout),
+                          extract_node, _interval("nodes", 300)),
+        ResourceCollector("replicasets", lambda k8s: k8s.apps_v1.list_replica_set_for_all_namespaces(
+                              _request_timeout=k8s.request_timeout),
+                          extract_replica_set, _interval("replicasets", 60)),
+        ResourceCollector("statefulsets", lambda k8s: k8s.apps_v1.list_stateful_set_for_all_namespaces(
+                              _request_timeout=k8s.request_timeout),
+                          extract_stateful_set, _interval("statefulsets", 120))
+    ]
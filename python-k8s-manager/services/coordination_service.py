@@ -0,0 +1,337 @@
+import fcntl
+import logging
+import math
+import os
+import re
+import socket
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class LeaseBackend:
+    """Where replicas record which one of them holds a named lease.
+
+    try_acquire() both takes a free (or expired) lease and renews one already
+    held by identity; it returns False while another identity holds it.
+    """
+
+    kind = "none"
+
+    def try_acquire(self, name: str, identity: str, ttl_seconds: float) -> bool:
+        raise NotImplementedError
+
+    def release(self, name: str, identity: str) -> None:
+        raise NotImplementedError
+
+    def holder(self, name: str) -> Optional[str]:
+        """Current holder as last seen by this backend (None when free or unknown)"""
+        raise NotImplementedError
+
+class InProcessLeaseBackend(LeaseBackend):
+    """Leases in a dict, shared by the electors of one process (tests and benchmarks)"""
+
+    kind = "memory"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._leases: Dict[str, Tuple[str, float]] = {}
+
+    def try_acquire(self, name: str, identity: str, ttl_seconds: float) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            holder, expires = self._leases.get(name, (None, 0.0))
+            if holder not in (None, identity) and expires > now:
+                return False
+            self._leases[name] = (identity, now + ttl_seconds)
+            return True
+
+    def release(self, name: str, identity: str) -> None:
+        with self._lock:
+            if self._leases.get(name, (None,))[0] == identity:
+                del self._leases[name]
+
+    def holder(self, name: str) -> Optional[str]:
+        with self._lock:
+            holder, expires = self._leases.get(name, (None, 0.0))
+            return holder if expires > time.monotonic() else None
+
+class FileLeaseBackend(LeaseBackend):
+    """Leases as flock()ed files in a shared directory (replicas on one host or volume).
+
+    The lock belongs to the open file, so a crashed holder releases it with
+    its process and the TTL is not needed. flock() over NFS is unreliable;
+    use the kubernetes backend for replicas on different nodes.
+    """
+
+    kind = "file"
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._held: Dict[Tuple[str, str], int] = {}
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, re.sub(r'[^A-Za-z0-9_.-]', '_', name) + ".lock")
+
+    def try_acquire(self, name: str, identity: str, ttl_seconds: float) -> bool:
+        with self._lock:
+            if (name, identity) in self._held:
+                return True
+            fd = os.open(self._path(name), os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                return False
+            # Only read by holder(), for status
+            os.ftruncate(fd, 0)
+            os.pwrite(fd, identity.encode(), 0)
+            self._held[(name, identity)] = fd
+            return True
+
+    def release(self, name: str, identity: str) -> None:
+        with self._lock:
+            fd = self._held.pop((name, identity), None)
+        if fd is not None:
+            os.ftruncate(fd, 0)
+            os.close(fd)
+
+    def holder(self, name: str) -> Optional[str]:
+        try:
+            with open(self._path(name)) as f:
+                return f.read() or None
+        except FileNotFoundError:
+            return None
+
+class KubernetesLeaseBackend(LeaseBackend):
+    """coordination.k8s.io Leases in the namespace the replicas run in.
+
+    Updates carry the lease's resourceVersion, so when two replicas race for
+    an expired lease the API server lets exactly one of them win. Expiry is
+    judged like client-go does: by how long this replica has seen the lease
+    record unchanged, not by comparing renewTime with the local clock.
+    """
+
+    kind = "kubernetes"
+
+    def __init__(self, namespace: str, api_client: Optional[Any] = None):
+        from kubernetes import client, config
+        if api_client is None:
+            try:
+                configuration = client.Configuration()
+                config.load_incluster_config(client_configuration=configuration)
+                api_client = client.ApiClient(configuration)
+            except config.ConfigException:
+                api_client = config.new_client_from_config()
+        self.namespace = namespace
+        self.api = client.CoordinationV1Api(api_client)
+        self._client = client
+        self._lock = threading.Lock()
+        # name -> (holder, resourceVersion, monotonic time that record was first seen)
+        self._observed: Dict[str, Tuple[Optional[str], str, float]] = {}
+
+    def try_acquire(self, name: str, identity: str, ttl_seconds: float) -> bool:
+        from kubernetes.client.rest import ApiException
+        client = self._client
+        now = datetime.now(timezone.utc)
+        duration = max(int(math.ceil(ttl_seconds)), 1)
+        try:
+            lease = self.api.read_namespaced_lease(name, self.namespace)
+        except ApiException as e:
+            if e.status != 404:
+                raise
+            lease = client.V1Lease(
+                metadata=client.V1ObjectMeta(name=name, namespace=self.namespace),
+                spec=client.V1LeaseSpec(holder_identity=identity, lease_duration_seconds=duration,
+                                        acquire_time=now, renew_time=now, lease_transitions=0)
+            )
+            try:
+                self.api.create_namespaced_lease(self.namespace, lease)
+            except ApiException as e:
+                if e.status == 409:
+                    return False
+                raise
+            return True
+
+        spec = lease.spec
+        holder = spec.holder_identity or None
+        record = (holder, lease.metadata.resource_version)
+        with self._lock:
+            observed = self._observed.get(name)
+            if observed is None or observed[:2] != record:
+                observed = record + (time.monotonic(),)
+                self._observed[name] = observed
+        if holder not in (None, identity):
+            held_for = spec.lease_duration_seconds or duration
+            if time.monotonic() - observed[2] < held_for:
+                return False
+            logger.info("Taking over expired lease", extra={"lease": name, "previousHolder": holder})
+
+        if holder != identity:
+            spec.acquire_time = now
+            spec.lease_transitions = (spec.lease_transitions or 0) + (1 if holder else 0)
+        spec.holder_identity = identity
+        spec.renew_time = now
+        spec.lease_duration_seconds = duration
+        try:
+            self.api.replace_namespaced_lease(name, self.namespace, lease)
+        except ApiException as e:
+            if e.status == 409:
+                # Someone else updated it first
+                return False
+            raise
+        return True
+
+    def release(self, name: str, identity: str) -> None:
+        from kubernetes.client.rest import ApiException
+        try:
+            lease = self.api.read_namespaced_lease(name, self.namespace)
+            if lease.spec.holder_identity != identity:
+                return
+            # An empty holder lets the next replica take over without waiting out the TTL
+            lease.spec.holder_identity = None
+            lease.spec.renew_time = None
+            self.api.replace_namespaced_lease(name, self.namespace, lease)
+        except ApiException as e:
+            logger.warning(f"Failed to release lease: {e.reason}", extra={"lease": name})
+
+    def holder(self, name: str) -> Optional[str]:
+        with self._lock:
+            observed = self._observed.get(name)
+        return observed[0] if observed else None
+
+class LeaderElector:
+    """Keeps trying to take or renew one lease and tracks whether this replica holds it.
+
+    Renewals run every ttl/3 on a daemon thread. If the backend can't be
+    reached the leader steps down before its lease could have expired, so two
+    replicas never both believe they lead for longer than one renew interval.
+    """
+
+    def __init__(self, backend: LeaseBackend, name: str, identity: str, ttl_seconds: float = 15,
+                 on_started_leading: Optional[Callable[[], None]] = None,
+                 on_stopped_leading: Optional[Callable[[], None]] = None):
+        self.backend = backend
+        self.name = name
+        self.identity = identity
+        self.ttl_seconds = ttl_seconds
+        self.renew_seconds = ttl_seconds / 3
+        self.on_started_leading = on_started_leading
+        self.on_stopped_leading = on_stopped_leading
+        self._leader = False
+        self._renewed_at = 0.0
+        self._leader_since: Optional[float] = None
+        self._transitions = 0
+        self._errors = 0
+        self._last_error: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"elector-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop renewing and hand the lease back so another replica takes over right away"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self._leader:
+            self._set_leader(False)
+            try:
+                self.backend.release(self.name, self.identity)
+            except Exception as e:
+                logger.warning(f"Failed to release lease: {e}", extra={"lease": self.name})
+
+    def is_leader(self) -> bool:
+        return self._leader
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.renew()
+            self._stop.wait(self.renew_seconds)
+
+    def renew(self) -> bool:
+        """One acquire/renew attempt (the background thread calls this every renew interval)"""
+        try:
+            acquired = self.backend.try_acquire(self.name, self.identity, self.ttl_seconds)
+            if acquired:
+                self._renewed_at = time.monotonic()
+        except Exception as e:
+            self._errors += 1
+            self._last_error = str(e)
+            logger.warning(f"Lease renewal failed: {e}", extra={"lease": self.name})
+            # Keep leading only while the last successful renewal is safely within the TTL
+            acquired = self._leader and time.monotonic() - self._renewed_at < self.ttl_seconds - self.renew_seconds
+        self._set_leader(acquired)
+        return acquired
+
+    def _set_leader(self, leader: bool) -> None:
+        if leader == self._leader:
+            return
+        self._leader = leader
+        self._transitions += 1
+        self._leader_since = time.time() if leader else None
+        logger.info("Started leading" if leader else "Stopped leading",
+                    extra={"lease": self.name, "identity": self.identity})
+        callback = self.on_started_leading if leader else self.on_stopped_leading
+        if callback:
+            try:
+                callback()
+            except Exception:
+                logger.exception("Leadership callback error", extra={"lease": self.name})
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend.kind,
+            "lease": self.name,
+            "identity": self.identity,
+            "leader": self._leader,
+            "holder": self.identity if self._leader else self.backend.holder(self.name),
+            "leaderSince": self._leader_since,
+            "ttlSeconds": self.ttl_seconds,
+            "transitions": self._transitions,
+            "errors": self._errors,
+            "lastError": self._last_error
+        }
+
+def replica_identity() -> str:
+    """POD_NAME when set (downward API), otherwise host name and process id"""
+    return os.getenv("POD_NAME") or f"{socket.gethostname()}-{os.getpid()}"
+
+def _pod_namespace() -> str:
+    namespace = os.getenv("POD_NAMESPACE")
+    if namespace:
+        return namespace
+    try:
+        with open("/var/run/secrets/kubernetes.io/serviceaccount/namespace") as f:
+            return f.read().strip() or "default"
+    except OSError:
+        return "default"
+
+def lease_backend_from_env() -> Optional[LeaseBackend]:
+    """Backend named by LEADER_ELECTION.
+
+    Unset or 'off' keeps every replica collecting on its own (returns None).
+    Otherwise 'memory', 'file:<directory>' or 'kubernetes[:<namespace>]'
+    (Lease objects in POD_NAMESPACE or the service account's namespace).
+    """
+    raw = os.getenv("LEADER_ELECTION", "off").strip()
+    kind, _, argument = raw.partition(":")
+    if kind in ("", "off", "none"):
+        return None
+    if kind == "memory":
+        return InProcessLeaseBackend()
+    if kind == "file":
+        return FileLeaseBackend(argument or "/tmp/python-k8s-manager-leases")
+    if kind == "kubernetes":
+        return KubernetesLeaseBackend(argument or _pod_namespace())
+    raise ValueError(f"LEADER_ELECTION must be off, memory, file:<directory> or kubernetes[:<namespace>], got {raw!r}")
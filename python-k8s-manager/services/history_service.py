@@ -0,0 +1,351 @@
+import math
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from models.cluster_data import ClusterData, ClusterDataDiff
+from services.cache_service import ClusterDataCache
+
+AGGREGATES = ('avg', 'min', 'max', 'rate')
+
+class HistoryQueryError(ValueError):
+    """Raised for bad history query parameters"""
+
+class RingBuffer:
+    """Fixed-size table of timestamped rows (one float32 column per series).
+
+    Each field ('avg', 'min', 'max') is a (capacity, width) array allocated up
+    front; appends overwrite the oldest row once the buffer is full.
+    """
+
+    def __init__(self, capacity: int, width: int, fields: Tuple[str, ...]):
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.fields = {name: np.full((capacity, width), np.nan, dtype=np.float32) for name in fields}
+        self._head = 0
+        self._size = 0
+
+    def append(self, timestamp: float, rows: Dict[str, np.ndarray]) -> None:
+        self.timestamps[self._head] = timestamp
+        for name, array in self.fields.items():
+            array[self._head] = rows[name]
+        self._head = (self._head + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def _ordered(self) -> np.ndarray:
+        """Row indices oldest first"""
+        if self._size < self.capacity:
+            return np.arange(self._size)
+        return (np.arange(self.capacity) + self._head) % self.capacity
+
+    def oldest(self) -> Optional[float]:
+        if not self._size:
+            return None
+        return float(self.timestamps[0 if self._size < self.capacity else self._head])
+
+    def interval(self, recent: int = 32) -> Optional[float]:
+        """Median spacing of the latest samples (None with fewer than two)"""
+        if self._size < 2:
+            return None
+        order = self._ordered()[-recent:]
+        return float(np.median(np.diff(self.timestamps[order])))
+
+    def window(self, start: float, end: float, field: str,
+               columns: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """Copy out (timestamps, values[rows, columns]) with start <= timestamp < end"""
+        order = self._ordered()
+        timestamps = self.timestamps[order]
+        lo, hi = np.searchsorted(timestamps, [start, end])
+        rows = order[lo:hi]
+        return timestamps[lo:hi], self.fields[field][np.ix_(rows, columns)]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "samples": self._size,
+            "capacity": self.capacity,
+            "oldest": self.oldest(),
+            "bytes": self.timestamps.nbytes + sum(a.nbytes for a in self.fields.values())
+        }
+
+class _Bucket:
+    """Running min/max/mean of the rows falling into one downsampling interval"""
+
+    def __init__(self, width: int):
+        self.start: Optional[float] = None
+        self.sum = np.zeros(width, dtype=np.float64)
+        self.count = np.zeros(width, dtype=np.int32)
+        self.min = np.full(width, np.nan, dtype=np.float32)
+        self.max = np.full(width, np.nan, dtype=np.float32)
+
+    def add(self, avg: np.ndarray, low: np.ndarray, high: np.ndarray) -> None:
+        present = ~np.isnan(avg)
+        self.sum += np.where(present, avg, 0)
+        self.count += present
+        np.fmin(self.min, low, out=self.min)
+        np.fmax(self.max, high, out=self.max)
+
+    def rows(self) -> Dict[str, np.ndarray]:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            avg = np.where(self.count > 0, self.sum / self.count, np.nan)
+        return {'avg': avg, 'min': self.min.copy(), 'max': self.max.copy()}
+
+    def reset(self, start: float) -> None:
+        self.start = start
+        self.sum.fill(0)
+        self.count.fill(0)
+        self.min.fill(np.nan)
+        self.max.fill(np.nan)
+
+class _Tier:
+    """One resolution of history: a ring buffer plus the bucket being filled for it"""
+
+    def __init__(self, name: str, resolution: float, capacity: int, width: int, downsampled: bool):
+        self.name = name
+        self.resolution = resolution
+        self.downsampled = downsampled
+        self.buffer = RingBuffer(capacity, width, ('avg', 'min', 'max') if downsampled else ('avg',))
+        self.bucket = _Bucket(width) if downsampled else None
+
+    def field(self, aggregate: str) -> str:
+        """Which stored field answers an aggregate (raw samples only have values)"""
+        if self.downsampled and aggregate in ('min', 'max'):
+            return aggregate
+        return 'avg'
+
+class MetricsHistory:
+    """In-memory history of cluster summary metrics at raw, 1m and 10m resolution.
+
+    Every snapshot appends one raw row. Rows are folded into 1-minute buckets,
+    and finished 1-minute buckets into 10-minute buckets, so the coarser tiers
+    keep longer ranges in the same fixed memory. Series are columns assigned on
+    first sight, up to max_series.
+    """
+
+    def __init__(self, max_series: int = 128, raw_capacity: int = 720,
+                 minute_capacity: int = 1440, ten_minute_capacity: int = 1008):
+        self.max_series = max_series
+        self._lock = threading.Lock()
+        self._columns: Dict[str, int] = {}
+        self._dropped_series = 0
+        self.tiers = [
+            _Tier('raw', 0, raw_capacity, max_series, downsampled=False),
+            _Tier('1m', 60, minute_capacity, max_series, downsampled=True),
+            _Tier('10m', 600, ten_minute_capacity, max_series, downsampled=True)
+        ]
+
+    def _row(self, values: Dict[str, float]) -> np.ndarray:
+        """Map named values onto the column layout; known count series missing now are 0"""
+        row = np.full(self.max_series, np.nan, dtype=np.float32)
+        for name, column in self._columns.items():
+            if not name.startswith('readiness'):
+                row[column] = 0
+        for name, value in values.items():
+            column = self._columns.get(name)
+            if column is None:
+                if len(self._columns) >= self.max_series:
+                    self._dropped_series += 1
+                    continue
+                column = self._columns[name] = len(self._columns)
+            row[column] = np.nan if value is None else value
+        return row
+
+    def record(self, timestamp: float, values: Dict[str, float]) -> None:
+        """Append one sample and roll finished buckets down to coarser tiers"""
+        with self._lock:
+            row = self._row(values)
+            raw = self.tiers[0]
+            raw.buffer.append(timestamp, {'avg': row})
+
+            # Each tier's finished bucket is the sample fed to the next tier
+            sample_time, avg, low, high = timestamp, row, row, row
+            for tier in self.tiers[1:]:
+                bucket_start = sample_time - sample_time % tier.resolution
+                bucket = tier.bucket
+                if bucket.start is not None and bucket_start != bucket.start:
+                    finished_start, finished = bucket.start, bucket.rows()
+                    tier.buffer.append(finished_start, finished)
+                    bucket.reset(bucket_start)
+                    bucket.add(avg, low, high)
+                    sample_time, avg, low, high = (finished_start, finished['avg'],
+                                                   finished['min'], finished['max'])
+                    continue
+                if bucket.start is None:
+                    bucket.reset(bucket_start)
+                bucket.add(avg, low, high)
+                break
+
+    def series(self) -> List[str]:
+        with self._lock:
+            return sorted(self._columns)
+
+    def _pick_tier(self, start: float) -> _Tier:
+        """Finest tier that still holds samples from the start of the range.
+
+        When none reaches back that far (e.g. in the first hour of uptime) the
+        tier with the earliest coverage wins, which is raw until it wraps. A
+        bucket is stamped with its start but may hold samples only from its
+        end, so buckets count from their end, and ties go to the finer tier.
+        """
+        for tier in self.tiers:
+            oldest = tier.buffer.oldest()
+            if oldest is not None and oldest <= start:
+                return tier
+        covered = [(tier.buffer.oldest() + (tier.resolution or 0), position)
+                   for position, tier in enumerate(self.tiers) if tier.buffer.oldest() is not None]
+        if covered:
+            return self.tiers[min(covered)[1]]
+        return self.tiers[0]
+
+    def query(self, names: List[str], start: float, end: float, step: Optional[float],
+              aggregate: str, max_points: int = 1000) -> Dict[str, Any]:
+        """Aggregate each series over consecutive windows of step seconds"""
+        if aggregate not in AGGREGATES:
+            raise HistoryQueryError(f"agg must be one of: {', '.join(AGGREGATES)}")
+        if not (math.isfinite(start) and math.isfinite(end)):
+            raise HistoryQueryError("start and end must be finite")
+        if step is not None and not (math.isfinite(step) and step > 0):
+            raise HistoryQueryError("step must be a positive number of seconds")
+        if end <= start:
+            raise HistoryQueryError("end must be after start")
+
+        with self._lock:
+            unknown = [name for name in names if name not in self._columns]
+            if unknown:
+                raise HistoryQueryError(f"unknown series: {', '.join(unknown)}")
+            tier = self._pick_tier(start)
+            # Raw samples arrive once per snapshot, so their spacing is the collection interval
+            resolution = tier.resolution or tier.buffer.interval() or 0
+            columns = [self._columns[name] for name in names]
+            timestamps, values = tier.buffer.window(start, end, tier.field(aggregate), columns)
+
+        span = end - start
+        step = step or max(resolution, span / max_points)
+        if span / step > max_points:
+            raise HistoryQueryError(f"step too small: at most {max_points} points per query")
+
+        edges = start + step * np.arange(int(np.ceil(span / step)))
+        result = _window_aggregate(timestamps, values, edges, aggregate)
+        return {
+            "resolution": tier.name,
+            "agg": aggregate,
+            "step": step,
+            "timestamps": edges.tolist(),
+            "series": {
+                name: [None if np.isnan(v) else round(float(v), 4) for v in result[:, i]]
+                for i, name in enumerate(names)
+            }
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "series": len(self._columns),
+                "maxSeries": self.max_series,
+                "droppedSeries": self._dropped_series,
+                "tiers": {tier.name: tier.buffer.get_stats() for tier in self.tiers}
+            }
+
+def _window_aggregate(timestamps: np.ndarray, values: np.ndarray, edges: np.ndarray,
+                      aggregate: str) -> np.ndarray:
+    """Reduce rows into the windows starting at edges (timestamps sorted ascending)"""
+    result = np.full((len(edges), values.shape[1]), np.nan, dtype=np.float64)
+    if not len(timestamps):
+        return result
+
+    starts = np.searchsorted(timestamps, edges)
+    stops = np.append(starts[1:], len(timestamps))
+    filled = starts < stops
+    if not filled.any():
+        return result
+    offsets = starts[filled]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if aggregate == 'min':
+            result[filled] = np.fmin.reduceat(values, offsets, axis=0)
+        elif aggregate == 'max':
+            result[filled] = np.fmax.reduceat(values, offsets, axis=0)
+        elif aggregate == 'avg':
+            present = ~np.isnan(values)
+            sums = np.add.reduceat(np.where(present, values, 0), offsets, axis=0)
+            counts = np.add.reduceat(present, offsets, axis=0)
+            result[filled] = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+        else:
+            # Per-second change between the first and last sample in each window
+            first, last = offsets, stops[filled] - 1
+            elapsed = (timestamps[last] - timestamps[first])[:, None]
+            delta = values[last] - values[first]
+            result[filled] = np.where(elapsed > 0, delta / np.where(elapsed > 0, elapsed, 1), np.nan)
+    return result
+
+def summary_values(summary: Dict[str, Any]) -> Dict[str, float]:
+    """Flatten a cluster summary into named series values"""
+    readiness = summary["readiness"]
+    values = {
+        "pods": summary["podCount"],
+        "deployments": summary["deploymentCount"],
+        "replicas": readiness["replicas"],
+        "readyReplicas": readiness["readyReplicas"],
+        "degradedDeployments": readiness["degradedDeployments"],
+        "readiness": readiness["ratio"]
+    }
+    for phase, count in summary["podsByPhase"].items():
+        values[f"pods.phase.{phase}"] = count
+    for namespace, totals in summary["namespaces"].items():
+        values[f"pods.ns.{namespace}"] = totals["pods"]
+        values[f"readiness.ns.{namespace}"] = totals["readiness"] if totals["replicas"] else None
+    return values
+
+_RELATIVE_TIME = re.compile(r'^-(\d+(?:\.\d+)?)([smhd])$')
+_UNIT_SECONDS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+def parse_time(value: Optional[str], default: float, now: float) -> float:
+    """Parse epoch seconds or a relative offset like -30m / -6h"""
+    if not value:
+        return default
+    match = _RELATIVE_TIME.match(value)
+    if match:
+        return now - float(match.group(1)) * _UNIT_SECONDS[match.group(2)]
+    try:
+        parsed = float(value)
+    except ValueError:
+        parsed = math.nan
+    # float() also accepts inf and nan, which can't bound a range
+    if not math.isfinite(parsed):
+        raise HistoryQueryError(f"bad time value: {value} (use epoch seconds or e.g. -6h)")
+    return parsed
+
+class HistoryService:
+    """Records the cluster summary into MetricsHistory after every cache update"""
+
+    def __init__(self, cache: ClusterDataCache, history: Optional[MetricsHistory] = None):
+        self.cache = cache
+        self.history = history or MetricsHistory()
+
+    def start(self) -> None:
+        self.cache.add_listener(self._on_cache_update)
+
+    def stop(self) -> None:
+        self.cache.remove_listener(self._on_cache_update)
+
+    def _on_cache_update(self, diff: ClusterDataDiff, cluster_data: ClusterData) -> None:
+        summary = self.cache.get_summary()
+        if summary:
+            self.history.record(time.time(), summary_values(summary))
+
+    def query(self, names: List[str], start: Optional[str], end: Optional[str],
+              step: Optional[str], aggregate: str) -> Dict[str, Any]:
+        now = time.time()
+        try:
+            step_seconds = float(step) if step else None
+        except ValueError:
+            raise HistoryQueryError("step must be a number of seconds")
+        if step_seconds is not None and not (math.isfinite(step_seconds) and step_seconds > 0):
+            raise HistoryQueryError("step must be a positive, finite number of seconds")
+        return self.history.query(names, parse_time(start, now - 3600, now),
+                                  parse_time(end, now, now), step_seconds, aggregate)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return self.history.get_stats()
@@ -1,90 +1,137 @@
+import logging
 import threading
 import time
 from services.kubernetes_service import KubernetesService
 from services.cache_service import ClusterDataCache
 from services.nats_service import NatsService
+from services.admission_service import AdmissionController, FetchBudgetExceeded, FetchPermit
+from services.coordination_service import LeaderElector
 from typing import Optional
 
+logger = logging.getLogger(__name__)
+
 class ClusterInterrogator:
     """Background service for periodic cluster data collection"""
     
     def __init__(self, k8s_service: KubernetesService, cache: ClusterDataCache, 
-                 nats_service: Optional[NatsService] = None, interval_seconds: int = 30):
+                 nats_service: Optional[NatsService] = None, interval_seconds: int = 30,
+                 admission: Optional[AdmissionController] = None, cluster_name: Optional[str] = None,
+                 elector: Optional[LeaderElector] = None):
         self.k8s_service = k8s_service
         self.cache = cache
         self.nats_service = nats_service
         self.interval_seconds = interval_seconds
+        self.admission = admission
+        self.cluster_name = cluster_name
+        # With leader election only the replica holding the lease collects
+        self.elector = elector
         self._running = False
         self._thread: Optional[threading.Thread] = None
     
     def start(self) -> None:
         """Start background data collection"""
         if self._running:
-            print("ClusterInterrogator already running")
+            logger.warning("ClusterInterrogator already running", extra={"cluster": self.cluster_name})
             return
         
         self._running = True
         self._thread = threading.Thread(target=self._run, daemon=True)
         self._thread.start()
         
-        print(f"ClusterInterrogator started with {self.interval_seconds}s interval")
+        logger.info("ClusterInterrogator started", extra={"cluster": self.cluster_name,
+                                                         "intervalSeconds": self.interval_seconds})
     
     def stop(self) -> None:
         """Stop background data collection"""
         if not self._running:
             return
         
-        print("Stopping ClusterInterrogator...")
+        logger.info("Stopping ClusterInterrogator", extra={"cluster": self.cluster_name})
         self._running = False
         
         if self._thread:
             self._thread.join(timeout=10)
         
-        print("ClusterInterrogator stopped")
+        logger.info("ClusterInterrogator stopped", extra={"cluster": self.cluster_name})
     
     def force_update(self) -> None:
-        """Force immediate data collection"""
-        threading.Thread(target=self._collect_data, daemon=True).start()
-        print("Forced cluster data update triggered")
+        """Force immediate data collection (raises FetchBudgetExceeded when over budget)"""
+        if not self.is_collecting():
+            logger.info("Not the collecting replica, refresh left to the leader", extra={"cluster": self.cluster_name})
+            return
+        permit = self._admit(AdmissionController.FORCED)
+        threading.Thread(target=self._collect_data, args=(permit,), daemon=True).start()
+        logger.info("Forced cluster data update triggered", extra={"cluster": self.cluster_name})
+    
+    def _admit(self, kind: str) -> Optional[FetchPermit]:
+        """Get admission for a fetch when admission control is configured"""
+        return self.admission.acquire(kind) if self.admission else None
+    
+    def collect_now(self) -> None:
+        """Run one scheduled collection in the background (e.g. right after taking the lease)"""
+        threading.Thread(target=self._scheduled_collect, daemon=True).start()
+    
+    def is_collecting(self) -> bool:
+        """Whether this replica collects (always, unless another replica holds the lease)"""
+        return self.elector is None or self.elector.is_leader()
+    
+    def _scheduled_collect(self) -> None:
+        """Run one scheduled collection unless the scheduled budget is exhausted"""
+        if not self.is_collecting():
+            return
+        try:
+            permit = self._admit(AdmissionController.SCHEDULED)
+        except FetchBudgetExceeded as e:
+            logger.warning(f"Skipping scheduled collection: {e}", extra={"cluster": self.cluster_name})
+            return
+        self._collect_data(permit)
     
     def _run(self) -> None:
         """Main background loop"""
         # Initial collection
-        self._collect_data()
+        self._scheduled_collect()
         
         # Periodic collection
         while self._running:
             time.sleep(self.interval_seconds)
             if self._running:  # Check again after sleep
-                self._collect_data()
+                self._scheduled_collect()
     
-    def _collect_data(self) -> None:
+    def _collect_data(self, permit: Optional[FetchPermit] = None) -> None:
         """Collect cluster data and update cache"""
         try:
             start_time = time.time()
-            print("Collecting cluster data...")
+            logger.debug("Collecting cluster data", extra={"cluster": self.cluster_name})
             
-            # Fetch data from Kubernetes
-            cluster_data = self.k8s_service.fetch_cluster_data()
+            # Fetch data from Kubernetes; the admission slot only covers the API calls
+            try:
+                cluster_data = self.k8s_service.fetch_cluster_data()
+            finally:
+                if permit:
+                    permit.release()
             
             # Update cache
             self.cache.update_data(cluster_data)
             
-            # Publish metrics to NATS
+            # Publish the cluster summary to NATS (still carries podCount/deploymentCount)
             if self.nats_service:
-                metrics = {
+                metrics = dict(self.cache.get_summary() or {
                     "podCount": cluster_data.pod_count,
-                    "deploymentCount": cluster_data.deployment_count,
+                    "deploymentCount": cluster_data.deployment_count
+                })
+                metrics.update({
                     "timestamp": int(time.time() * 1000),
-                    "source": "python-k8s-manager"
-                }
+                    "source": "python-k8s-manager",
+                    "cluster": self.cluster_name
+                })
                 self.nats_service.publish_sync("k8s.metrics", metrics)
             
             duration = time.time() - start_time
-            print(f"Cluster data collection completed in {duration:.2f}s")
+            logger.info("Cluster data collection completed",
+                        extra={"cluster": self.cluster_name, "seconds": round(duration, 3)})
             
         except Exception as e:
-            print(f"Error collecting cluster data: {e}")
+            logger.error(f"Error collecting cluster data: {e}", extra={"cluster": self.cluster_name})
     
     def is_running(self) -> bool:
         """Check if interrogator is running"""
@@ -95,6 +142,7 @@ class ClusterInterrogator:
         cache_stats = self.cache.get_stats()
         cache_stats.update({
             "interrogatorRunning": self._running,
+            "collecting": self.is_collecting(),
             "intervalSeconds": self.interval_seconds
         })
         return cache_stats
@@ -1,34 +1,64 @@
-from kubernetes import client, config
-from kubernetes.client.rest import ApiException
-from typing import List, Optional
+import logging
+from typing import Any, List, Optional
 import time
-from models.cluster_data import ClusterData, PodInfo, DeploymentInfo
+from models.cluster_data import (ClusterData, DeploymentInfo, PodDetails, PodInfo, container_info,
+                                 node_name, owner_reference)
+from services.usage_service import PodUsage, pod_usage_from_metrics
+
+logger = logging.getLogger(__name__)
+
+def _api_exception():
+    """Kubernetes ApiException class, imported on first use"""
+    from kubernetes.client.rest import ApiException
+    return ApiException
 
 class KubernetesService:
     """Service for interacting with Kubernetes API"""
     
-    def __init__(self):
-        try:
-            # Load in-cluster config
-            config.load_incluster_config()
-            print("Loaded in-cluster Kubernetes config")
-        except:
+    def __init__(self, context: Optional[str] = None, request_timeout: Optional[float] = None,
+                 usage_source: Optional[Any] = None):
+        # The kubernetes client is heavy to import; defer it until the service is built
+        from kubernetes import client, config
+        
+        api_client = None
+        if context:
+            # A named kubeconfig context gets its own ApiClient so several clusters can coexist
             try:
-                # Fallback to local config for development
-                config.load_kube_config()
-                print("Loaded local Kubernetes config")
+                api_client = config.new_client_from_config(context=context)
+                logger.info("Loaded Kubernetes config", extra={"context": context})
             except Exception as e:
-                print(f"Failed to load Kubernetes config: {e}")
+                logger.error(f"Failed to load Kubernetes config: {e}", extra={"context": context})
                 raise
+        else:
+            try:
+                # Load in-cluster config
+                config.load_incluster_config()
+                logger.info("Loaded in-cluster Kubernetes config")
+            except:
+                try:
+                    # Fallback to local config for development
+                    config.load_kube_config()
+                    logger.info("Loaded local Kubernetes config")
+                except Exception as e:
+                    logger.error(f"Failed to load Kubernetes config: {e}")
+                    raise
+        
+        self.context = context
+        # Bounds every list call so one slow API server can't hold a worker indefinitely
+        self.request_timeout = request_timeout
+        self.core_v1 = client.CoreV1Api(api_client)
+        self.apps_v1 = client.AppsV1Api(api_client)
+        self.custom_objects = client.CustomObjectsApi(api_client)
         
-        self.core_v1 = client.CoreV1Api()
-        self.apps_v1 = client.AppsV1Api()
+        # Pod CPU/memory usage (services/usage_service.py); None skips it
+        self.usage_source = usage_source
+        self._usage_error: Optional[str] = None
     
     def fetch_cluster_data(self) -> ClusterData:
         """Fetch cluster data from Kubernetes API"""
         try:
             start_time = time.time()
-            print("Fetching cluster data from Kubernetes API...")
+            logger.debug("Fetching cluster data from Kubernetes API", extra={"context": self.context})
             
             # Fetch pods
             pods = self._fetch_pods()
@@ -36,28 +66,33 @@ class KubernetesService:
             # Fetch deployments
             deployments = self._fetch_deployments()
             
+            # Fetch pod usage (optional: clusters without metrics-server still get pods)
+            pod_usage = self._fetch_usage()
+            
             duration = time.time() - start_time
-            print(f"Cluster data fetch completed in {duration:.2f}s - {len(pods)} pods, {len(deployments)} deployments")
+            logger.info("Cluster data fetch completed", extra={"context": self.context, "seconds": round(duration, 3),
+                                                               "pods": len(pods), "deployments": len(deployments)})
             
             return ClusterData(
                 pods=pods,
                 deployments=deployments,
                 pod_count=len(pods),
                 deployment_count=len(deployments),
-                fetch_timestamp=time.time()
+                fetch_timestamp=time.time(),
+                pod_usage=pod_usage
             )
             
-        except ApiException as e:
-            print(f"Kubernetes API error: {e}")
+        except _api_exception() as e:
+            logger.error(f"Kubernetes API error: {e}", extra={"context": self.context})
             raise
         except Exception as e:
-            print(f"Error fetching cluster data: {e}")
+            logger.error(f"Error fetching cluster data: {e}", extra={"context": self.context})
             raise
     
     def _fetch_pods(self) -> List[PodInfo]:
         """Fetch all pods from all namespaces"""
         try:
-            pod_list = self.core_v1.list_pod_for_all_namespaces()
+            pod_list = self.core_v1.list_pod_for_all_namespaces(_request_timeout=self.request_timeout)
             pods = []
             
             for pod in pod_list.items:
@@ -65,20 +100,67 @@ class KubernetesService:
                     name=pod.metadata.name,
                     namespace=pod.metadata.namespace,
                     status=pod.status.phase or "Unknown",
-                    creation_timestamp=pod.metadata.creation_timestamp.isoformat() if pod.metadata.creation_timestamp else None
+                    creation_timestamp=pod.metadata.creation_timestamp.isoformat() if pod.metadata.creation_timestamp else None,
+                    details=self._pod_details(pod)
                 )
                 pods.append(pod_info)
             
             return pods
             
-        except ApiException as e:
-            print(f"Error fetching pods: {e}")
+        except _api_exception() as e:
+            logger.error(f"Error fetching pods: {e}", extra={"context": self.context})
             raise
     
+    @staticmethod
+    def _pod_details(pod) -> PodDetails:
+        """Extract node, container, owner and resource request info from a V1Pod"""
+        from kubernetes.utils import parse_quantity
+        
+        containers = tuple(
+            container_info(status.name, bool(status.ready), status.restart_count or 0)
+            for status in (pod.status.container_statuses or [])
+        )
+        owners = tuple(
+            owner_reference(owner.kind, owner.name, bool(owner.controller))
+            for owner in (pod.metadata.owner_references or [])
+        )
+        
+        cpu_millis = 0
+        memory_bytes = 0
+        for container in (pod.spec.containers or []):
+            requests = (container.resources.requests if container.resources else None) or {}
+            if 'cpu' in requests:
+                cpu_millis += int(parse_quantity(requests['cpu']) * 1000)
+            if 'memory' in requests:
+                memory_bytes += int(parse_quantity(requests['memory']))
+        
+        return PodDetails(
+            node_name=node_name(pod.spec.node_name),
+            containers=containers,
+            owners=owners,
+            cpu_request_millis=cpu_millis,
+            memory_request_bytes=memory_bytes
+        )
+    
+    def _fetch_usage(self) -> Optional[PodUsage]:
+        """Fetch per-pod usage from the usage source; None when there is none or it fails"""
+        if self.usage_source is None:
+            return None
+        try:
+            usage = pod_usage_from_metrics(self.usage_source.list_pod_metrics(self))
+        except Exception as e:
+            # Logged once per distinct error, not every cycle
+            if str(e) != self._usage_error:
+                logger.warning(f"Pod usage unavailable: {e}", extra={"context": self.context})
+            self._usage_error = str(e)
+            return None
+        self._usage_error = None
+        return usage
+    
     def _fetch_deployments(self) -> List[DeploymentInfo]:
         """Fetch all deployments from all namespaces"""
         try:
-            deployment_list = self.apps_v1.list_deployment_for_all_namespaces()
+            deployment_list = self.apps_v1.list_deployment_for_all_namespaces(_request_timeout=self.request_timeout)
             deployments = []
             
             for deployment in deployment_list.items:
@@ -93,6 +175,6 @@ class KubernetesService:
             
             return deployments
             
-        except ApiException as e:
-            print(f"Error fetching deployments: {e}")
+        except _api_exception() as e:
+            logger.error(f"Error fetching deployments: {e}", extra={"context": self.context})
             raise
@@ -0,0 +1,158 @@
+import json
+import logging
+import os
+import queue
+import random
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict
+
+# Pass as extra= on per-request/per-message events so they go through sampling
+SAMPLED = {"sampled": True}
+
+# Loggers whose INFO/DEBUG records are per-request events (werkzeug writes one access line per request)
+SAMPLED_LOGGERS = ("werkzeug",)
+
+# LogRecord attributes that aren't structured fields
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "sampled"}
+
+def _fields(record: logging.LogRecord) -> Dict[str, Any]:
+    """The extra= fields attached to a record"""
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRS}
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, thread and any extra= fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName
+        }
+        entry.update(_fields(record))
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+class TextFormatter(logging.Formatter):
+    """Human-readable line with extra= fields appended as key=value"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = _fields(record)
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return line
+
+class SamplingFilter(logging.Filter):
+    """Keeps a fraction of per-request events; warnings and errors always pass"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+        self.sampled_out = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.rate >= 1:
+            return True
+        if not getattr(record, "sampled", False) and not record.name.startswith(SAMPLED_LOGGERS):
+            return True
+        if random.random() < self.rate:
+            return True
+        self.sampled_out += 1
+        return False
+
+class _NonBlockingQueueHandler(QueueHandler):
+    """Enqueue without ever waiting: when the writer is behind, records are dropped and counted"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only freeze what may change after the call returns (args, the live exception);
+        # the formatting itself happens on the writer thread
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # The queue may be full at shutdown; wait for the writer to make room instead of failing
+        self.queue.put(self._sentinel)
+
+class AsyncLogging:
+    """Root logging through a bounded queue drained by one writer thread.
+
+    Callers only append to the queue, so a slow or blocked stdout (log
+    collector backpressure) never stalls a request, the cache or the
+    collectors; it costs dropped records instead, which get_stats() counts.
+    """
+
+    def __init__(self, level: str = "INFO", log_format: str = "json", sample_rate: float = 1.0,
+                 queue_size: int = 10000, stream=None):
+        self.level = level.upper()
+        self.log_format = log_format
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.handler = _NonBlockingQueueHandler(self.queue)
+        self.sampler = SamplingFilter(sample_rate)
+        self.handler.addFilter(self.sampler)
+
+        output = logging.StreamHandler(stream or sys.stdout)
+        output.setFormatter(JsonFormatter() if log_format == "json" else TextFormatter())
+        self.listener = _Listener(self.queue, output)
+        self._started = False
+
+    def start(self) -> "AsyncLogging":
+        """Route the root logger through the queue and start the writer thread"""
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(self.handler)
+        root.setLevel(self.level)
+        # The kubernetes client logs every request at DEBUG through urllib3
+        logging.getLogger("urllib3").setLevel(max(root.level, logging.INFO))
+        self.listener.start()
+        self._started = True
+        return self
+
+    def stop(self) -> None:
+        """Flush what is queued and stop the writer thread"""
+        if self._started:
+            self._started = False
+            logging.getLogger().removeHandler(self.handler)
+            self.listener.stop()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "level": self.level,
+            "format": self.log_format,
+            "queued": self.queue.qsize(),
+            "queueSize": self.queue.maxsize,
+            "dropped": self.handler.dropped,
+            "sampleRate": self.sampler.rate,
+            "sampledOut": self.sampler.sampled_out
+        }
+
+def configure_logging() -> AsyncLogging:
+    """Start async logging from LOG_LEVEL, LOG_FORMAT (json|text), LOG_SAMPLE_RATE and LOG_QUEUE_SIZE"""
+    return AsyncLogging(
+        level=os.getenv("LOG_LEVEL", "INFO"),
+        log_format=os.getenv("LOG_FORMAT", "json").lower(),
+        sample_rate=float(os.getenv("LOG_SAMPLE_RATE", "0.1")),
+        queue_size=int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    ).start()
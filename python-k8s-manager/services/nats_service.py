@@ -1,36 +1,92 @@
 import asyncio
-import nats
 import json
+import logging
 import threading
 import time
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, TYPE_CHECKING
 from concurrent.futures import ThreadPoolExecutor
+from services.app_registry import AppRegistry
+from services.log_service import SAMPLED
+
+if TYPE_CHECKING:
+    import nats
+
+logger = logging.getLogger(__name__)
 
 class NatsService:
     """Service for NATS messaging"""
     
-    def __init__(self, nats_url: str = "nats://nats-service:4222"):
+    def __init__(self, nats_url: str = "nats://nats-service:4222", app_registry: Optional[AppRegistry] = None):
         self.nats_url = nats_url
-        self.nc: Optional[nats.NATS] = None
+        self.app_registry = app_registry
+        self.nc: Optional["nats.NATS"] = None
         self.loop: Optional[asyncio.AbstractEventLoop] = None
         self.executor = ThreadPoolExecutor(max_workers=2)
         self._running = False
+        self._connected = threading.Event()
+        self._on_connect = []
+        # (subject, callback) pairs added through subscribe(), set up again on every connect
+        self._subscriptions = []
+        self._subscriptions_lock = threading.Lock()
+        self._subscribed = False
     
-    def start(self) -> bool:
-        """Start NATS service in background thread"""
+    def start(self, wait_seconds: float = 0) -> bool:
+        """Start NATS service in background thread.
+        
+        Returns immediately by default; pass wait_seconds to block until connected.
+        """
         try:
             # Start event loop in separate thread
             self._running = True
             self.executor.submit(self._run_async_loop)
             
-            # Wait a moment for connection
-            time.sleep(2)
-            return self.nc is not None
+            if wait_seconds > 0:
+                return self.wait_connected(wait_seconds)
+            return True
             
         except Exception as e:
-            print(f"Failed to start NATS service: {e}")
+            logger.error(f"Failed to start NATS service: {e}")
             return False
     
+    def wait_connected(self, timeout: float) -> bool:
+        """Block until connected to NATS or the timeout expires"""
+        return self._connected.wait(timeout)
+    
+    def is_connected(self) -> bool:
+        """Check if the NATS connection is established"""
+        return self._connected.is_set()
+    
+    def on_connect(self, callback) -> None:
+        """Run callback (in a worker thread) once connected; immediately if already connected"""
+        if self._connected.is_set():
+            self.executor.submit(callback)
+        else:
+            self._on_connect.append(callback)
+    
+    def subscribe(self, subject: str, callback) -> None:
+        """Deliver the raw payload of every message on subject to callback(bytes).
+        
+        The callback runs on the NATS event loop thread, so it must only hand
+        the payload off (e.g. to a queue). Works before or after connecting.
+        """
+        with self._subscriptions_lock:
+            self._subscriptions.append((subject, callback))
+            subscribe_now = self._subscribed
+        if subscribe_now:
+            asyncio.run_coroutine_threadsafe(self._subscribe_raw(subject, callback), self.loop)
+    
+    async def _subscribe_raw(self, subject: str, callback):
+        async def handler(msg):
+            try:
+                callback(msg.data)
+            except Exception as e:
+                logger.error(f"Error handling message: {e}", extra={"subject": subject})
+        await self.nc.subscribe(subject, cb=handler)
+    
+    def max_payload(self) -> int:
+        """Largest message the server accepts (1MB, the server default, until connected)"""
+        return self.nc.max_payload if self.nc and self.nc.is_connected else 1024 * 1024
+    
     def _run_async_loop(self):
         """Run asyncio event loop in thread"""
         self.loop = asyncio.new_event_loop()
@@ -39,26 +95,35 @@ class NatsService:
         try:
             self.loop.run_until_complete(self._connect_and_run())
         except Exception as e:
-            print(f"NATS async loop error: {e}")
+            logger.error(f"NATS async loop error: {e}")
         finally:
             self.loop.close()
     
     async def _connect_and_run(self):
         """Connect to NATS and keep connection alive"""
         try:
+            import nats
+            
             self.nc = await nats.connect(servers=[self.nats_url])
-            print(f"Connected to NATS at {self.nats_url}")
+            logger.info("Connected to NATS", extra={"url": self.nats_url})
             
             # Set up subscriptions
             await self._setup_subscriptions()
             
+            self._connected.set()
+            for callback in self._on_connect:
+                self.executor.submit(callback)
+            
             # Keep connection alive
             while self._running:
                 await asyncio.sleep(1)
                 
         except Exception as e:
-            print(f"NATS connection error: {e}")
+            logger.error(f"NATS connection error: {e}", extra={"url": self.nats_url})
         finally:
+            self._connected.clear()
+            with self._subscriptions_lock:
+                self._subscribed = False
             if self.nc:
                 await self.nc.close()
     
@@ -71,16 +136,26 @@ class NatsService:
             # Subscribe to events
             await self.nc.subscribe("k8s.events", cb=self._handle_event)
             
-            print("NATS subscriptions established")
+            # App heartbeats feed the liveness registry
+            if self.app_registry:
+                await self.nc.subscribe("app.status", cb=self._handle_app_status)
+            
+            with self._subscriptions_lock:
+                subscriptions = list(self._subscriptions)
+                self._subscribed = True
+            for subject, callback in subscriptions:
+                await self._subscribe_raw(subject, callback)
+            
+            logger.info("NATS subscriptions established")
             
         except Exception as e:
-            print(f"Error setting up NATS subscriptions: {e}")
+            logger.error(f"Error setting up NATS subscriptions: {e}")
     
     async def _handle_command(self, msg):
         """Handle command messages"""
         try:
             command = msg.data.decode()
-            print(f"Received command: {command}")
+            logger.info("Received command", extra=dict(SAMPLED, command=command))
             
             response = {"source": "python-k8s-manager", "command": command, "status": "acknowledged"}
             
@@ -88,43 +163,51 @@ class NatsService:
                 await self.nc.publish(msg.reply, json.dumps(response).encode())
                 
         except Exception as e:
-            print(f"Error handling command: {e}")
+            logger.error(f"Error handling command: {e}")
     
     async def _handle_event(self, msg):
         """Handle event messages"""
         try:
             data = msg.data.decode()
-            print(f"Received event: {data}")
+            logger.debug("Received event", extra=dict(SAMPLED, event=data))
         except Exception as e:
-            print(f"Error handling event: {e}")
+            logger.error(f"Error handling event: {e}")
+    
+    async def _handle_app_status(self, msg):
+        """Record an app heartbeat (kept cheap: every app instance sends one per interval)"""
+        try:
+            status = json.loads(msg.data)
+            if isinstance(status, dict):
+                self.app_registry.heartbeat(status)
+        except Exception as e:
+            logger.warning(f"Error handling app status: {e}")
     
     def publish_sync(self, subject: str, data: Dict[str, Any]) -> bool:
         """Publish message synchronously (thread-safe)"""
+        return self.publish_bytes_sync(subject, json.dumps(data).encode())
+    
+    def publish_bytes_sync(self, subject: str, payload: bytes) -> bool:
+        """Publish an already encoded payload synchronously (thread-safe)"""
         if not self.nc or not self.loop:
-            print("NATS not connected")
+            logger.info("NATS not connected, dropping publish", extra=dict(SAMPLED, subject=subject))
             return False
         
         try:
             # Schedule coroutine in the event loop
             future = asyncio.run_coroutine_threadsafe(
-                self._publish_async(subject, data), 
+                self.nc.publish(subject, payload), 
                 self.loop
             )
             future.result(timeout=5)  # Wait max 5 seconds
             return True
             
         except Exception as e:
-            print(f"Error publishing to NATS: {e}")
+            logger.error(f"Error publishing to NATS: {e}", extra={"subject": subject})
             return False
     
-    async def _publish_async(self, subject: str, data: Dict[str, Any]):
-        """Async publish helper"""
-        message = json.dumps(data).encode()
-        await self.nc.publish(subject, message)
-    
     def stop(self):
         """Stop NATS service"""
-        print("Stopping NATS service...")
+        logger.info("Stopping NATS service")
         self._running = False
         if self.executor:
             self.executor.shutdown(wait=True)
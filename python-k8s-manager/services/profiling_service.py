@@ -0,0 +1,223 @@
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+class ProfilerBusy(RuntimeError):
+    """A profile is already running, or the memory tracer isn't in the state the call needs"""
+
+# Leaf frames of threads that are parked waiting rather than doing work
+IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("socket.py", "accept"),
+    ("socket.py", "readinto"),
+    ("socketserver.py", "serve_forever"),
+    ("thread.py", "_worker")
+}
+
+def _frame_label(code) -> str:
+    path = code.co_filename.replace(os.sep, '/').rsplit('/', 2)
+    return f"{code.co_qualname} ({'/'.join(path[-2:])}:{code.co_firstlineno})"
+
+class SamplingProfiler:
+    """Statistical profiler for the live process.
+
+    Samples every thread's Python stack at a fixed interval from
+    sys._current_frames(), so nothing is instrumented and threads run at full
+    speed between samples. Stacks are counted in the collapsed format
+    ("thread;outer;...;leaf count") that flamegraph.pl and speedscope read.
+    One profile runs at a time.
+    """
+
+    def __init__(self, max_seconds: float = 60):
+        self.max_seconds = max_seconds
+        self._lock = threading.Lock()
+        self._profiles = 0
+
+    def profile(self, seconds: float, interval: float = 0.01, include_idle: bool = False) -> Dict[str, Any]:
+        """Sample for seconds (blocking the caller) and return counted stacks"""
+        if not 0 < seconds <= self.max_seconds:
+            raise ValueError(f"seconds must be between 0 and {self.max_seconds}")
+        if not 0.001 <= interval <= 1:
+            raise ValueError("interval must be between 1ms and 1s")
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy("a profile is already running")
+        try:
+            return self._sample(seconds, interval, include_idle)
+        finally:
+            self._lock.release()
+
+    def _sample(self, seconds: float, interval: float, include_idle: bool) -> Dict[str, Any]:
+        own = threading.get_ident()
+        stacks: Counter = Counter()
+        names: Dict[int, str] = {}
+        # Per profile, so code objects of since-reloaded or generated functions aren't kept alive
+        labels: Dict[Any, str] = {}
+        rounds = 0
+        idle = 0
+        started = time.perf_counter()
+        deadline = started + seconds
+        next_sample = started
+
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            if now < next_sample:
+                time.sleep(next_sample - now)
+            next_sample += interval
+            rounds += 1
+
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                leaf = frame.f_code
+                if not include_idle and (os.path.basename(leaf.co_filename), leaf.co_name) in IDLE_LEAVES:
+                    idle += 1
+                    continue
+                if ident not in names:
+                    names.update((thread.ident, thread.name) for thread in threading.enumerate())
+                frames: List[str] = []
+                while frame is not None:
+                    code = frame.f_code
+                    label = labels.get(code)
+                    if label is None:
+                        label = labels[code] = _frame_label(code)
+                    frames.append(label)
+                    frame = frame.f_back
+                frames.append(names.get(ident, f"thread-{ident}"))
+                stacks[';'.join(reversed(frames))] += 1
+
+        self._profiles += 1
+        return {
+            "seconds": round(time.perf_counter() - started, 3),
+            "intervalMs": interval * 1000,
+            "rounds": rounds,
+            "samples": sum(stacks.values()),
+            "idleSamples": idle,
+            "stacks": stacks
+        }
+
+    @staticmethod
+    def collapsed(result: Dict[str, Any]) -> str:
+        """Collapsed stack lines, heaviest first"""
+        return ''.join(f"{stack} {count}\n" for stack, count in result["stacks"].most_common())
+
+    @staticmethod
+    def top_functions(result: Dict[str, Any], limit: int = 30) -> Dict[str, List[Dict[str, Any]]]:
+        """Functions by self samples (leaf) and total samples (anywhere on the stack)"""
+        own: Counter = Counter()
+        total: Counter = Counter()
+        for stack, count in result["stacks"].items():
+            frames = stack.split(';')[1:]
+            if not frames:
+                continue
+            own[frames[-1]] += count
+            for frame in set(frames):
+                total[frame] += count
+        samples = result["samples"] or 1
+        rows = lambda counter: [{"function": name, "samples": count, "ratio": round(count / samples, 4)}
+                                for name, count in counter.most_common(limit)]
+        return {"self": rows(own), "total": rows(total)}
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"running": self._lock.locked(), "profiles": self._profiles, "maxSeconds": self.max_seconds}
+
+class MemoryTracer:
+    """tracemalloc baseline and diff for memory growth investigations.
+
+    Tracing costs memory and CPU on every allocation, so it only runs between
+    start() and stop(). snapshot() records a baseline; diff() compares the
+    current heap against it, grouped by line, file or full traceback.
+    """
+
+    KEYS = ('lineno', 'filename', 'traceback')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._baseline_time: Optional[float] = None
+        self._started_here = False
+
+    @staticmethod
+    def _take() -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+            tracemalloc.Filter(False, "<unknown>")
+        ))
+
+    def start(self, frames: int = 25) -> Dict[str, Any]:
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(frames)
+                self._started_here = True
+                self._baseline = None
+            return self._status()
+
+    def stop(self) -> Dict[str, Any]:
+        with self._lock:
+            if tracemalloc.is_tracing() and self._started_here:
+                tracemalloc.stop()
+                self._started_here = False
+            self._baseline = None
+            self._baseline_time = None
+            return self._status()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Record the baseline later diffs compare against"""
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                raise ProfilerBusy("tracemalloc is not tracing; start it first")
+            self._baseline = self._take()
+            self._baseline_time = time.time()
+            return self._status()
+
+    def diff(self, key: str = 'lineno', limit: int = 30, rebase: bool = False) -> Dict[str, Any]:
+        """Top allocation growth since the baseline (rebase=True makes the current heap the new baseline)"""
+        if key not in self.KEYS:
+            raise ValueError(f"key must be one of: {', '.join(self.KEYS)}")
+        with self._lock:
+            if not tracemalloc.is_tracing() or self._baseline is None:
+                raise ProfilerBusy("no baseline; start tracing and take a snapshot first")
+            current = self._take()
+            stats = current.compare_to(self._baseline, key)
+            result = {
+                "key": key,
+                "sinceSeconds": round(time.time() - self._baseline_time, 3),
+                "sizeDiff": sum(stat.size_diff for stat in stats),
+                "countDiff": sum(stat.count_diff for stat in stats),
+                "top": [{
+                    "location": stat.traceback.format() if key == 'traceback' else str(stat.traceback),
+                    "sizeDiff": stat.size_diff,
+                    "size": stat.size,
+                    "countDiff": stat.count_diff,
+                    "count": stat.count
+                } for stat in stats[:limit]]
+            }
+            if rebase:
+                self._baseline = current
+                self._baseline_time = time.time()
+            result.update(self._status())
+            return result
+
+    def _status(self) -> Dict[str, Any]:
+        tracing = tracemalloc.is_tracing()
+        current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+        return {
+            "tracing": tracing,
+            "frames": tracemalloc.get_traceback_limit() if tracing else None,
+            "tracedBytes": current,
+            "tracedPeakBytes": peak,
+            "baselineTime": self._baseline_time
+        }
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._lock:
+            return self._status()
@@ -0,0 +1,393 @@
+import itertools
+import json
+import logging
+import os
+import queue
+import re
+import struct
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+from models.cluster_data import (ClusterData, ClusterDataDiff, DeploymentInfo, PodDetails, PodInfo,
+                                 container_info, node_name, owner_reference)
+from services.cache_service import ClusterDataCache
+from services.collector_service import ResourceCache, ResourceSnapshot
+from services.coordination_service import LeaderElector
+from services.nats_service import NatsService
+
+logger = logging.getLogger(__name__)
+
+SUBJECT_PREFIX = "k8s.replication"
+
+# Publisher token (new per leadership term), message sequence, chunk index, chunk count
+CHUNK_HEADER = struct.Struct("!8sIHH")
+
+# Reassembly slots for messages still missing chunks
+MAX_PARTIAL_MESSAGES = 4
+
+SYNC_RETRY_SECONDS = 5
+
+def replication_subject(cluster_name: str) -> str:
+    """NATS subject carrying one cluster's snapshots and diffs (sync requests go to <subject>.sync)"""
+    return f"{SUBJECT_PREFIX}.{re.sub(r'[^A-Za-z0-9_-]', '_', cluster_name)}"
+
+# Wire format: positional rows instead of dicts so snapshots stay small before compression
+
+def encode_pod(pod: PodInfo) -> list:
+    row = [pod.name, pod.namespace, pod.status, pod.creation_timestamp]
+    details = pod.details
+    if details is not None:
+        row += [details.node_name, details.containers, details.owners,
+                details.cpu_request_millis, details.memory_request_bytes]
+    return row
+
+def decode_pod(row: list) -> PodInfo:
+    details = None
+    if len(row) > 4:
+        details = PodDetails(
+            node_name=node_name(row[4]),
+            containers=tuple(container_info(*container) for container in row[5]),
+            owners=tuple(owner_reference(*owner) for owner in row[6]),
+            cpu_request_millis=row[7],
+            memory_request_bytes=row[8]
+        )
+    return PodInfo(row[0], row[1], row[2], row[3], details)
+
+def encode_deployment(deployment: DeploymentInfo) -> list:
+    return [deployment.name, deployment.namespace, deployment.replicas,
+            deployment.ready_replicas, deployment.creation_timestamp]
+
+def decode_deployment(row: list) -> DeploymentInfo:
+    return DeploymentInfo(*row)
+
+def _encode_usage(usage: Optional[Dict[Tuple[str, str], Tuple[float, float]]]) -> Optional[list]:
+    if usage is None:
+        return None
+    return [[namespace, name, cpu, memory] for (namespace, name), (cpu, memory) in usage.items()]
+
+def _decode_usage(rows: Optional[list]) -> Optional[Dict[Tuple[str, str], Tuple[float, float]]]:
+    if rows is None:
+        return None
+    return {(namespace, name): (cpu, memory) for namespace, name, cpu, memory in rows}
+
+class ClusterReplicator:
+    """Shares one cluster's snapshots between manager replicas over NATS.
+
+    The replica holding the cluster's lease is the only one collecting; it
+    publishes every cache update, as a full snapshot at the start of its term
+    (and when a follower asks for one) and as a diff otherwise. Followers
+    rebuild each snapshot from the diff and feed it to their own cache, so
+    topology, search, usage and history update exactly as they would from a
+    local collection. A follower that misses a diff asks for a snapshot.
+    Resource collector results (services, nodes, ...) go out whole, one
+    message per collected kind, and are resent with every sync snapshot.
+
+    Messages are zlib-compressed JSON, split into chunks that fit the server's
+    max payload. Encoding, publishing and applying happen on one worker
+    thread, never on the collection thread or the NATS loop.
+    """
+
+    def __init__(self, cluster_name: str, cache: ClusterDataCache, nats_service: NatsService,
+                 elector: LeaderElector, resources: Optional[ResourceCache] = None, queue_size: int = 16):
+        self.cluster_name = cluster_name
+        self.cache = cache
+        self.resources = resources
+        self.nats_service = nats_service
+        self.elector = elector
+        self.subject = replication_subject(cluster_name)
+        self.sync_subject = self.subject + ".sync"
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+        # Leader side
+        self._token = os.urandom(8)
+        self._sequence = itertools.count()
+        self._published_token: Optional[bytes] = None
+        self._published_version: Optional[int] = None
+        self._sync_pending = False
+        # Latest (snapshot, cache version), local or replicated; what a sync request gets
+        self._last: Optional[Tuple[ClusterData, int]] = None
+
+        # Follower side (the token and leader version the local state was built from)
+        self._leader_token: Optional[bytes] = None
+        self._leader_version: Optional[int] = None
+        self._pods: Dict[Tuple[str, str], PodInfo] = {}
+        self._deployments: Dict[Tuple[str, str], DeploymentInfo] = {}
+        self._partial: Dict[Tuple[bytes, int], List[Optional[bytes]]] = {}
+        self._need_sync = True
+        self._sync_requested_at = 0.0
+
+        self._stats = dict.fromkeys(("snapshotsPublished", "diffsPublished", "bytesPublished", "chunksPublished",
+                                     "snapshotsApplied", "diffsApplied", "resourcesPublished", "resourcesApplied",
+                                     "gaps", "syncRequests", "dropped"), 0)
+        self._last_applied: Optional[float] = None
+
+    def start(self) -> None:
+        if self._running:
+            return
+        self._running = True
+        self.cache.add_listener(self._on_cache_update)
+        if self.resources:
+            self.resources.add_listener(self._on_resources_update)
+        self.nats_service.subscribe(self.subject, self._on_message)
+        self.nats_service.subscribe(self.sync_subject, self._on_sync_request)
+        self._thread = threading.Thread(target=self._run, name=f"replicator-{self.cluster_name}", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._running = False
+        self.cache.remove_listener(self._on_cache_update)
+        if self.resources:
+            self.resources.remove_listener(self._on_resources_update)
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def start_term(self) -> None:
+        """Called on taking the lease: the next publication is a full snapshot under a new token"""
+        self._token = os.urandom(8)
+        self._published_token = None
+
+    def end_term(self) -> None:
+        """Called on losing the lease: follow the new leader, starting from its snapshot"""
+        self._leader_token = None
+        self._need_sync = True
+
+    # Producers: cache listener (collection thread) and NATS callbacks (loop thread)
+
+    def _offer(self, item: tuple) -> None:
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self._stats["dropped"] += 1
+            # Whatever was lost, a snapshot covers it
+            if self.elector.is_leader():
+                self._published_token = None
+            else:
+                self._need_sync = True
+
+    def _on_cache_update(self, diff: ClusterDataDiff, cluster_data: ClusterData) -> None:
+        self._last = (cluster_data, diff.version)
+        # Replicated updates (applied on the worker thread) are not published again
+        if self.elector.is_leader() and threading.current_thread() is not self._thread:
+            self._offer(("publish", diff, cluster_data))
+
+    def _on_resources_update(self, snapshot: ResourceSnapshot) -> None:
+        if self.elector.is_leader() and threading.current_thread() is not self._thread:
+            self._offer(("resources", [snapshot]))
+
+    def _on_sync_request(self, payload: bytes) -> None:
+        if self.elector.is_leader() and not self._sync_pending:
+            self._sync_pending = True
+            self._offer(("sync",))
+
+    def _on_message(self, payload: bytes) -> None:
+        token, sequence, index, count = CHUNK_HEADER.unpack_from(payload)
+        if token == self._token:
+            # Our own publication
+            return
+        body = payload[CHUNK_HEADER.size:]
+        if count == 1:
+            self._offer(("apply", token, body))
+            return
+        parts = self._partial.setdefault((token, sequence), [None] * count)
+        parts[index] = body
+        if all(part is not None for part in parts):
+            del self._partial[(token, sequence)]
+            self._offer(("apply", token, b''.join(parts)))
+        elif len(self._partial) > MAX_PARTIAL_MESSAGES:
+            # Chunks of the oldest message were lost
+            del self._partial[next(iter(self._partial))]
+            self._need_sync = True
+
+    # Worker thread
+
+    def _run(self) -> None:
+        while self._running:
+            try:
+                item = self._queue.get(timeout=1)
+            except queue.Empty:
+                item = None
+            try:
+                if item is None:
+                    pass
+                elif item[0] == "publish":
+                    self._publish(item[1], item[2])
+                elif item[0] == "resources":
+                    self._publish_resources(item[1])
+                elif item[0] == "sync":
+                    self._sync_pending = False
+                    if self._last:
+                        self._publish(None, self._last[0], self._last[1])
+                    if self.resources:
+                        self._publish_resources(self.resources.snapshots())
+                elif item[0] == "apply":
+                    self._apply(item[1], item[2])
+                self._request_sync_if_needed()
+            except Exception:
+                logger.exception("Replication error", extra={"cluster": self.cluster_name})
+
+    def _publish(self, diff: Optional[ClusterDataDiff], cluster_data: ClusterData,
+                 version: Optional[int] = None) -> None:
+        """Publish a diff, or a snapshot when there is no diff or no snapshot went out this term"""
+        if not self.elector.is_leader():
+            return
+        token = self._token
+        if diff is not None and self._published_token == token and diff.version <= self._published_version:
+            # Already covered by a snapshot sent for a sync request
+            return
+        if diff is not None and self._published_token == token and diff.base_version == self._published_version:
+            message = {
+                "type": "diff",
+                "version": diff.version,
+                "baseVersion": diff.base_version,
+                "pods": {
+                    "upserted": [encode_pod(pod) for pod in diff.added_pods] +
+                                [encode_pod(new) for _, new in diff.modified_pods],
+                    "removed": [[pod.namespace, pod.name] for pod in diff.removed_pods]
+                },
+                "deployments": {
+                    "upserted": [encode_deployment(dep) for dep in diff.added_deployments] +
+                                [encode_deployment(new) for _, new in diff.modified_deployments],
+                    "removed": [[dep.namespace, dep.name] for dep in diff.removed_deployments]
+                }
+            }
+        else:
+            message = {
+                "type": "snapshot",
+                "version": diff.version if diff is not None else version,
+                "pods": [encode_pod(pod) for pod in cluster_data.pods],
+                "deployments": [encode_deployment(dep) for dep in cluster_data.deployments]
+            }
+        message.update({
+            "cluster": self.cluster_name,
+            "leader": self.elector.identity,
+            "podCount": cluster_data.pod_count,
+            "deploymentCount": cluster_data.deployment_count,
+            "fetchTimestamp": cluster_data.fetch_timestamp,
+            # Usage changes on every collection, so it always goes whole
+            "usage": _encode_usage(cluster_data.pod_usage)
+        })
+
+        if not self._send(token, message):
+            # Followers see a gap and ask for a snapshot
+            self._published_token = None
+            return
+
+        if message["type"] == "snapshot":
+            self._stats["snapshotsPublished"] += 1
+            # Answers any sync request still queued, including one dropped on a full queue
+            self._sync_pending = False
+        else:
+            self._stats["diffsPublished"] += 1
+        self._published_token = token
+        self._published_version = message["version"]
+
+    def _publish_resources(self, snapshots: List[ResourceSnapshot]) -> None:
+        if not self.elector.is_leader() or not snapshots:
+            return
+        message = {
+            "type": "resources",
+            "cluster": self.cluster_name,
+            "leader": self.elector.identity,
+            "kinds": [[snapshot.kind, snapshot.items, snapshot.fetch_timestamp, snapshot.duration_seconds]
+                      for snapshot in snapshots]
+        }
+        # A lost message is repaired by the kind's next collection
+        if self._send(self._token, message):
+            self._stats["resourcesPublished"] += len(snapshots)
+
+    def _send(self, token: bytes, message: Dict[str, Any]) -> bool:
+        """Compress and publish one message, in as many chunks as the server's max payload needs"""
+        body = zlib.compress(json.dumps(message, separators=(',', ':')).encode(), 1)
+        chunk_size = self.nats_service.max_payload() - CHUNK_HEADER.size
+        count = max((len(body) + chunk_size - 1) // chunk_size, 1)
+        sequence = next(self._sequence) & 0xFFFFFFFF
+        for index in range(count):
+            chunk = CHUNK_HEADER.pack(token, sequence, index, count) + body[index * chunk_size:(index + 1) * chunk_size]
+            if not self.nats_service.publish_bytes_sync(self.subject, chunk):
+                return False
+            self._stats["chunksPublished"] += 1
+            self._stats["bytesPublished"] += len(chunk)
+        return True
+
+    def _apply(self, token: bytes, body: bytes) -> None:
+        if self.elector.is_leader():
+            # A previous leader still publishing; this replica's own collection wins
+            return
+        message = json.loads(zlib.decompress(body))
+        if message["type"] == "resources":
+            # Whole kinds, independent of the snapshot/diff sequence
+            if self.resources:
+                for kind, items, fetch_timestamp, duration_seconds in message["kinds"]:
+                    self.resources.put(kind, items, duration_seconds, fetch_timestamp)
+                    self._stats["resourcesApplied"] += 1
+            return
+        if message["type"] == "snapshot":
+            self._pods = {(pod.namespace, pod.name): pod for pod in map(decode_pod, message["pods"])}
+            self._deployments = {(dep.namespace, dep.name): dep
+                                 for dep in map(decode_deployment, message["deployments"])}
+            self._stats["snapshotsApplied"] += 1
+        elif token != self._leader_token or message["baseVersion"] != self._leader_version:
+            # Missed a message or a new leader started; wait for a snapshot
+            self._stats["gaps"] += 1
+            self._need_sync = True
+            return
+        else:
+            for namespace, name in message["pods"]["removed"]:
+                self._pods.pop((namespace, name), None)
+            for pod in map(decode_pod, message["pods"]["upserted"]):
+                self._pods[(pod.namespace, pod.name)] = pod
+            for namespace, name in message["deployments"]["removed"]:
+                self._deployments.pop((namespace, name), None)
+            for dep in map(decode_deployment, message["deployments"]["upserted"]):
+                self._deployments[(dep.namespace, dep.name)] = dep
+            self._stats["diffsApplied"] += 1
+
+        self._leader_token = token
+        self._leader_version = message["version"]
+        self._need_sync = False
+        self._last_applied = time.time()
+        self.cache.update_data(ClusterData(
+            pods=list(self._pods.values()),
+            deployments=list(self._deployments.values()),
+            pod_count=message["podCount"],
+            deployment_count=message["deploymentCount"],
+            fetch_timestamp=message["fetchTimestamp"],
+            pod_usage=_decode_usage(message["usage"])
+        ))
+
+    def _request_sync_if_needed(self) -> None:
+        if not self._need_sync or self.elector.is_leader() or not self.nats_service.is_connected():
+            return
+        now = time.monotonic()
+        if now - self._sync_requested_at < SYNC_RETRY_SECONDS:
+            return
+        self._sync_requested_at = now
+        self._stats["syncRequests"] += 1
+        self.nats_service.publish_bytes_sync(self.sync_subject, self.elector.identity.encode())
+
+    def request_sync(self) -> bool:
+        """Ask the leader for a full snapshot now; False when leading or not connected"""
+        if self.elector.is_leader() or not self.nats_service.is_connected():
+            return False
+        self._sync_requested_at = time.monotonic()
+        self._stats["syncRequests"] += 1
+        self.nats_service.publish_bytes_sync(self.sync_subject, self.elector.identity.encode())
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        leader = self.elector.is_leader()
+        stats = dict(self._stats)
+        stats.update({
+            "role": "leader" if leader else "follower",
+            "subject": self.subject,
+            "inSync": leader or not self._need_sync,
+            "leaderVersion": None if leader else self._leader_version,
+            "lastApplied": self._last_applied * 1000 if self._last_applied else None,
+            "queued": self._queue.qsize(),
+            "election": self.elector.get_stats()
+        })
+        return stats
@@ -0,0 +1,278 @@
+import heapq
+import threading
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from models.cluster_data import ClusterData, ClusterDataDiff
+from services.cache_service import ClusterDataCache
+
+KIND_POD = 'pod'
+KIND_DEPLOYMENT = 'deployment'
+KINDS = (KIND_POD, KIND_DEPLOYMENT)
+
+# Upper bound on names examined per query so very common terms stay fast. Every
+# name looked at counts, whether or not it passes the kind/namespace filter.
+MAX_SCAN = 1000
+
+# Substring scans stop once this many times the limit have matched
+CANDIDATE_FACTOR = 4
+
+# Diffs touching more than this many names rebuild the index instead of patching it
+REBUILD_THRESHOLD = 2000
+
+# (kind, namespace, name, lowercase name)
+Entry = Tuple[str, str, str, str]
+
+# (lowercase name, entry id): the order of the name list and of every posting
+Item = Tuple[str, int]
+
+def trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def _patch_sorted(items: List[Item], removed: Set[Item], added: List[Item]) -> List[Item]:
+    """A new sorted list: items with removed dropped and added merged in (items is left as is).
+
+    Bisects every change against the old list, then copies the runs between
+    them, so the cost is per change plus one memory copy, not per item.
+    """
+    changes = [(bisect_left(items, item), 0, item) for item in added]
+    for item in removed:
+        position = bisect_left(items, item)
+        if position < len(items) and items[position] == item:
+            changes.append((position, 1, item))
+    changes.sort()
+    patched: List[Item] = []
+    previous = 0
+    for position, removal, item in changes:
+        patched += items[previous:position]
+        if removal:
+            previous = position + 1
+        else:
+            patched.append(item)
+            previous = position
+    patched += items[previous:]
+    return patched
+
+class _Index:
+    """Sorted name list for prefix lookups plus name-ordered trigram postings.
+
+    Postings are kept in the same (name, id) order as the name list, so a
+    substring scan cut short by MAX_SCAN always examines the same names.
+    """
+
+    def __init__(self):
+        self.entries: Dict[int, Entry] = {}
+        self.ids: Dict[Tuple[str, str, str], int] = {}
+        self.postings: Dict[str, List[Item]] = {}
+        self.names: List[Item] = []
+        self._next_id = 0
+
+    @classmethod
+    def build(cls, items: Iterable[Tuple[str, str, str]]) -> '_Index':
+        index = cls()
+        for kind, namespace, name in items:
+            item = index._register(kind, namespace, name)
+            if item is not None:
+                index.names.append(item)
+        index.names.sort()
+        # Filled in name order, so every posting comes out sorted
+        for item in index.names:
+            for gram in trigrams(item[0]):
+                index.postings.setdefault(gram, []).append(item)
+        return index
+
+    def _register(self, kind: str, namespace: str, name: str) -> Optional[Item]:
+        key = (kind, namespace, name)
+        if key in self.ids:
+            return None
+        entry_id = self._next_id
+        self._next_id += 1
+        lowered = name.lower()
+        self.entries[entry_id] = (kind, namespace, name, lowered)
+        self.ids[key] = entry_id
+        return lowered, entry_id
+
+    def prepare(self, removed: Iterable[Tuple[str, str, str]],
+                added: Iterable[Tuple[str, str, str]]) -> Tuple[List[int], List[Item], Dict[str, List[Item]]]:
+        """Work out a patch without changing what queries see; apply() swaps it in.
+
+        Removes, then adds (kind, namespace, name) keys. New entries are
+        registered right away (queries only reach them through the new lists);
+        the name list and touched postings are built as new sorted lists.
+        """
+        removed_ids: List[int] = []
+        dropped: Dict[str, Set[Item]] = {}
+        inserted: Dict[str, List[Item]] = {}
+        dropped_names: Set[Item] = set()
+        inserted_names: List[Item] = []
+        for key in removed:
+            entry_id = self.ids.pop(key, None)
+            if entry_id is None:
+                continue
+            removed_ids.append(entry_id)
+            item = (self.entries[entry_id][3], entry_id)
+            dropped_names.add(item)
+            for gram in trigrams(item[0]):
+                dropped.setdefault(gram, set()).add(item)
+        for kind, namespace, name in added:
+            item = self._register(kind, namespace, name)
+            if item is None:
+                continue
+            inserted_names.append(item)
+            for gram in trigrams(item[0]):
+                inserted.setdefault(gram, []).append(item)
+
+        names = _patch_sorted(self.names, dropped_names, inserted_names)
+        postings = {gram: _patch_sorted(self.postings.get(gram, []), dropped.get(gram, set()), inserted.get(gram, []))
+                    for gram in dropped.keys() | inserted.keys()}
+        return removed_ids, names, postings
+
+    def apply(self, patch: Tuple[List[int], List[Item], Dict[str, List[Item]]]) -> List[List[Item]]:
+        """Swap in a prepared patch; returns the replaced lists so the caller frees them off-lock"""
+        removed_ids, names, postings = patch
+        replaced = [self.names]
+        self.names = names
+        for gram, posting in postings.items():
+            replaced.append(self.postings.pop(gram, []))
+            if posting:
+                self.postings[gram] = posting
+        for entry_id in removed_ids:
+            del self.entries[entry_id]
+        return replaced
+
+def _snapshot_items(cluster_data: ClusterData) -> Iterable[Tuple[str, str, str]]:
+    for pod in cluster_data.pods:
+        yield KIND_POD, pod.namespace, pod.name
+    for deployment in cluster_data.deployments:
+        yield KIND_DEPLOYMENT, deployment.namespace, deployment.name
+
+class SearchService:
+    """Name search over pods and deployments, kept in step with the cache.
+
+    Prefix matches come from a sorted name list (bisect), substring matches
+    from trigram postings, so a query touches only candidate names instead of
+    scanning every pod.
+    """
+
+    def __init__(self, cache: ClusterDataCache):
+        self.cache = cache
+        self._lock = threading.Lock()
+        self._index = _Index()
+        self._version = 0
+        self._rebuilds = 0
+        self._patches = 0
+        self._queries = 0
+
+    def start(self) -> None:
+        self.cache.add_listener(self._on_cache_update)
+
+    def stop(self) -> None:
+        self.cache.remove_listener(self._on_cache_update)
+
+    def _on_cache_update(self, diff: ClusterDataDiff, cluster_data: ClusterData) -> None:
+        changes = (len(diff.added_pods) + len(diff.removed_pods) +
+                   len(diff.added_deployments) + len(diff.removed_deployments))
+
+        if self._version == 0 or changes > REBUILD_THRESHOLD:
+            # Build off-lock and swap, so queries keep using the old index meanwhile
+            index = _Index.build(_snapshot_items(cluster_data))
+            with self._lock:
+                self._index = index
+                self._version = diff.version
+                self._rebuilds += 1
+            return
+
+        # Only names matter here, so modified objects need no work
+        removed = [(KIND_POD, pod.namespace, pod.name) for pod in diff.removed_pods]
+        removed += [(KIND_DEPLOYMENT, dep.namespace, dep.name) for dep in diff.removed_deployments]
+        added = [(KIND_POD, pod.namespace, pod.name) for pod in diff.added_pods]
+        added += [(KIND_DEPLOYMENT, dep.namespace, dep.name) for dep in diff.added_deployments]
+        # Only this thread writes the index, so the patch is built off-lock and swapped in
+        patch = self._index.prepare(removed, added)
+        with self._lock:
+            replaced = self._index.apply(patch)
+            self._version = diff.version
+            self._patches += 1
+        # Dropping the old lists can take a while for common trigrams; queries needn't wait for it
+        del replaced
+
+    def get_version(self) -> int:
+        with self._lock:
+            return self._version
+
+    def search(self, query: str, limit: int = 20, kind: Optional[str] = None,
+               namespace: Optional[str] = None) -> Dict[str, Any]:
+        """Ranked matches: exact, then prefix (alphabetical), then substring (earliest, shortest)"""
+        needle = query.strip().lower()
+
+        def wanted(entry: Entry) -> bool:
+            return (kind is None or entry[0] == kind) and (namespace is None or entry[1] == namespace)
+
+        with self._lock:
+            self._queries += 1
+            index = self._index
+            version = self._version
+            matches: List[Tuple[Entry, str]] = []
+            truncated = False
+
+            # Prefix matches are contiguous in the sorted name list; exact ones sort first.
+            # Every name examined counts against MAX_SCAN, filtered out or not.
+            entries = index.entries
+            position = bisect_left(index.names, (needle,))
+            window = index.names[position:position + MAX_SCAN]
+            for lowered, entry_id in window:
+                if not lowered.startswith(needle):
+                    break
+                entry = entries[entry_id]
+                if wanted(entry):
+                    matches.append((entry, 'exact' if lowered == needle else 'prefix'))
+                    if len(matches) >= limit:
+                        break
+            else:
+                end = position + MAX_SCAN
+                truncated = end < len(index.names) and index.names[end][0].startswith(needle)
+
+            if len(matches) < limit and len(needle) >= 3:
+                postings = [index.postings.get(gram) for gram in trigrams(needle)]
+                if all(postings):
+                    # Any posting of the needle holds every match; the shortest is cheapest to walk.
+                    # find() below rejects names that have the trigrams but not the needle.
+                    smallest = min(postings, key=len)
+                    wanted_candidates = (limit - len(matches)) * CANDIDATE_FACTOR
+                    candidates = []
+                    for lowered, entry_id in smallest[:MAX_SCAN]:
+                        where = lowered.find(needle)
+                        # where == 0 is a prefix match, already collected above
+                        if where > 0:
+                            entry = entries[entry_id]
+                            if wanted(entry):
+                                candidates.append((where, len(lowered), lowered, entry))
+                                if len(candidates) >= wanted_candidates:
+                                    # Ranking below only covers what was examined
+                                    truncated = True
+                                    break
+                    else:
+                        truncated = truncated or len(smallest) > MAX_SCAN
+                    for _, _, _, entry in heapq.nsmallest(limit - len(matches), candidates):
+                        matches.append((entry, 'substring'))
+
+        return {
+            "query": query,
+            "version": version,
+            "count": len(matches),
+            "truncated": truncated,
+            "results": [
+                {"kind": entry[0], "namespace": entry[1], "name": entry[2], "match": match}
+                for entry, match in matches
+            ]
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "version": self._version,
+                "entries": len(self._index.entries),
+                "trigrams": len(self._index.postings),
+                "rebuilds": self._rebuilds,
+                "patches": self._patches,
+                "queries": self._queries
+            }
@@ -0,0 +1,155 @@
+import json
+import logging
+import queue
+import threading
+import time
+from typing import Optional, Dict, Any, Iterator, List
+from models.cluster_data import ClusterData, ClusterDataDiff
+from services.cache_service import ClusterDataCache
+
+logger = logging.getLogger(__name__)
+
+def format_sse(event: str, data: Dict[str, Any], event_id: Optional[int] = None) -> str:
+    """Format a Server-Sent Events frame"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+HEARTBEAT_FRAME = ": heartbeat\n\n"
+
+class StreamSubscriber:
+    """One connected streaming client with a bounded send queue"""
+
+    def __init__(self, max_queue_size: int):
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        self.evicted = False
+        self.connected_at = time.time()
+
+    def offer(self, frame: str) -> bool:
+        """Queue a frame without blocking; returns False if the client is too slow"""
+        if self.evicted:
+            return False
+        try:
+            self._queue.put_nowait(frame)
+            return True
+        except queue.Full:
+            self.evicted = True
+            return False
+
+    def frames(self, initial_frame: str, heartbeat_seconds: float) -> Iterator[str]:
+        """Yield frames for the client, emitting heartbeats while idle"""
+        yield "retry: 3000\n\n"
+        yield initial_frame
+
+        while not self.evicted:
+            try:
+                yield self._queue.get(timeout=heartbeat_seconds)
+            except queue.Empty:
+                yield HEARTBEAT_FRAME
+
+        # Client fell behind; tell it to resync on reconnect
+        yield format_sse("evicted", {"reason": "client too slow"})
+
+class ClusterUpdateBroadcaster:
+    """Fans cache updates out to many streaming clients from a single cache listener"""
+
+    def __init__(self, cache: ClusterDataCache, max_queue_size: int = 32,
+                 heartbeat_seconds: float = 15):
+        self.cache = cache
+        self.max_queue_size = max_queue_size
+        self.heartbeat_seconds = heartbeat_seconds
+        self._lock = threading.Lock()
+        self._subscribers: List[StreamSubscriber] = []
+        self._events_published = 0
+        self._clients_evicted = 0
+        self._started = False
+
+    def start(self) -> None:
+        """Start listening to cache updates"""
+        if self._started:
+            return
+        self.cache.add_listener(self._on_cache_update)
+        self._started = True
+
+    def stop(self) -> None:
+        """Stop listening and disconnect all clients"""
+        self.cache.remove_listener(self._on_cache_update)
+        self._started = False
+        with self._lock:
+            for subscriber in self._subscribers:
+                subscriber.evicted = True
+            self._subscribers.clear()
+
+    def subscribe(self) -> StreamSubscriber:
+        """Register a new streaming client"""
+        subscriber = StreamSubscriber(self.max_queue_size)
+        with self._lock:
+            self._subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: StreamSubscriber) -> None:
+        """Remove a streaming client"""
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def snapshot_frame(self) -> str:
+        """Build the snapshot-version frame sent to newly connected clients"""
+        version = self.cache.get_version()
+        data = self.cache.get_data()
+        payload = {"version": version}
+        if data:
+            payload.update({
+                "podCount": data.pod_count,
+                "deploymentCount": data.deployment_count,
+                "fetchTimestamp": data.fetch_timestamp
+            })
+        return format_sse("snapshot", payload, event_id=version)
+
+    def stream(self, subscriber: StreamSubscriber) -> Iterator[str]:
+        """Generate the event stream for a subscriber, unsubscribing on disconnect"""
+        try:
+            yield from subscriber.frames(self.snapshot_frame(), self.heartbeat_seconds)
+        finally:
+            self.unsubscribe(subscriber)
+
+    def _on_cache_update(self, diff: ClusterDataDiff, cluster_data: ClusterData) -> None:
+        """Encode the diff once and offer it to every client"""
+        if diff.is_empty() and diff.base_version > 0:
+            frame = format_sse("snapshot", {
+                "version": diff.version,
+                "podCount": diff.pod_count,
+                "deploymentCount": diff.deployment_count,
+                "fetchTimestamp": diff.fetch_timestamp
+            }, event_id=diff.version)
+        else:
+            frame = format_sse("diff", diff.to_dict(), event_id=diff.version)
+
+        with self._lock:
+            subscribers = list(self._subscribers)
+
+        evicted = [subscriber for subscriber in subscribers if not subscriber.offer(frame)]
+
+        with self._lock:
+            self._events_published += 1
+            for subscriber in evicted:
+                if subscriber in self._subscribers:
+                    self._subscribers.remove(subscriber)
+                    self._clients_evicted += 1
+
+        if evicted:
+            logger.warning("Evicted slow stream clients", extra={"clients": len(evicted)})
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get streaming statistics"""
+        with self._lock:
+            return {
+                "clients": len(self._subscribers),
+                "eventsPublished": self._events_published,
+                "clientsEvicted": self._clients_evicted,
+                "heartbeatSeconds": self.heartbeat_seconds,
+                "maxQueueSize": self.max_queue_size
+            }
@@ -0,0 +1,225 @@
+import json
+import threading
+from collections import Counter
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+from models.cluster_data import ClusterData, ClusterDataDiff, PodInfo, DeploymentInfo
+from services.cache_service import ClusterDataCache
+
+_encode = json.JSONEncoder(separators=(',', ':')).encode
+
+def owning_deployment(pod_name: str, deployment_names) -> Optional[str]:
+    """Match a pod to its deployment by ReplicaSet naming (<deployment>-<rs hash>-<pod hash>)"""
+    parts = pod_name.rsplit('-', 2)
+    if len(parts) == 3 and parts[0] in deployment_names:
+        return parts[0]
+    return None
+
+class _Group:
+    """Pods under one topology node, with a precomputed phase breakdown"""
+
+    __slots__ = ('pods', 'phases')
+
+    def __init__(self):
+        self.pods: List[PodInfo] = []
+        self.phases: Counter = Counter()
+
+    def add(self, pod: PodInfo) -> None:
+        self.pods.append(pod)
+        self.phases[pod.status] += 1
+
+class _NamespaceGroup(_Group):
+    __slots__ = ('deployments', 'deployment_pods', 'unowned')
+
+    def __init__(self):
+        super().__init__()
+        self.deployments: Dict[str, DeploymentInfo] = {}
+        self.deployment_pods: Dict[str, _Group] = {}
+        self.unowned = _Group()
+
+class ClusterTopology:
+    """Namespace -> deployment -> pod grouping of one snapshot"""
+
+    def __init__(self, cluster_data: ClusterData, version: int):
+        self.version = version
+        self.total_pods = cluster_data.pod_count
+        self.total_deployments = cluster_data.deployment_count
+        self.phases: Counter = Counter()
+        self.namespaces: Dict[str, _NamespaceGroup] = {}
+
+        for deployment in cluster_data.deployments:
+            group = self._namespace(deployment.namespace)
+            group.deployments[deployment.name] = deployment
+            group.deployment_pods[deployment.name] = _Group()
+
+        for pod in cluster_data.pods:
+            group = self._namespace(pod.namespace)
+            group.add(pod)
+            self.phases[pod.status] += 1
+            owner = owning_deployment(pod.name, group.deployments)
+            if owner:
+                group.deployment_pods[owner].add(pod)
+            else:
+                group.unowned.add(pod)
+
+    def _namespace(self, name: str) -> _NamespaceGroup:
+        group = self.namespaces.get(name)
+        if group is None:
+            group = self.namespaces[name] = _NamespaceGroup()
+        return group
+
+    def render(self, expand: FrozenSet[str], max_group: int, max_pods: int) -> Dict[str, Any]:
+        """Render the tree at the requested level of detail.
+
+        Groups with more than max_group members are returned collapsed (count and
+        phase breakdown only) unless their id is in expand. Expanded pod lists are
+        capped at max_pods, with the remainder folded into one aggregate node.
+        """
+        children = [self._render_namespace(name, group, expand, max_group, max_pods)
+                    for name, group in sorted(self.namespaces.items())]
+        return {
+            "version": self.version,
+            "totalPods": self.total_pods,
+            "totalDeployments": self.total_deployments,
+            "root": {
+                "id": "cluster",
+                "type": "cluster",
+                "name": "Cluster",
+                "count": self.total_pods,
+                "phases": dict(self.phases),
+                "children": children
+            }
+        }
+
+    def _render_namespace(self, name: str, group: _NamespaceGroup, expand: FrozenSet[str],
+                          max_group: int, max_pods: int) -> Dict[str, Any]:
+        node_id = f"ns:{name}"
+        node = {
+            "id": node_id,
+            "type": "namespace",
+            "name": name,
+            "count": len(group.pods),
+            "deploymentCount": len(group.deployments),
+            "phases": dict(group.phases)
+        }
+        if len(group.pods) > max_group and node_id not in expand:
+            node["collapsed"] = True
+            return node
+
+        children = []
+        for deployment_name, deployment in sorted(group.deployments.items()):
+            children.append(self._render_deployment(
+                name, deployment, group.deployment_pods[deployment_name], expand, max_group, max_pods))
+        children.extend(self._render_pods(f"unowned:{name}", group.unowned, max_pods))
+        node["children"] = children
+        return node
+
+    def _render_deployment(self, namespace: str, deployment: DeploymentInfo, pods: _Group,
+                           expand: FrozenSet[str], max_group: int, max_pods: int) -> Dict[str, Any]:
+        node_id = f"deploy:{namespace}/{deployment.name}"
+        node = {
+            "id": node_id,
+            "type": "deployment",
+            "name": deployment.name,
+            "namespace": namespace,
+            "replicas": deployment.replicas,
+            "readyReplicas": deployment.ready_replicas,
+            "count": len(pods.pods),
+            "phases": dict(pods.phases)
+        }
+        if len(pods.pods) > max_group and node_id not in expand:
+            node["collapsed"] = True
+            return node
+        node["children"] = self._render_pods(f"rest:{namespace}/{deployment.name}", pods, max_pods)
+        return node
+
+    @staticmethod
+    def _render_pods(rest_id: str, group: _Group, max_pods: int) -> List[Dict[str, Any]]:
+        shown = group.pods[:max_pods]
+        nodes = [{
+            "id": f"pod:{pod.namespace}/{pod.name}",
+            "type": "pod",
+            "name": pod.name,
+            "namespace": pod.namespace,
+            "status": pod.status,
+            "creationTimestamp": pod.creation_timestamp
+        } for pod in shown]
+
+        remaining = group.pods[max_pods:]
+        if remaining:
+            nodes.append({
+                "id": rest_id,
+                "type": "aggregate",
+                "name": f"+{len(remaining)} more",
+                "count": len(remaining),
+                "phases": dict(Counter(pod.status for pod in remaining))
+            })
+        return nodes
+
+class TopologyService:
+    """Keeps the topology of the latest snapshot, rebuilt once per version.
+
+    Grouping happens in the cache update listener, so requests only pay for
+    rendering the level of detail they ask for. Encoded renders are reused for
+    the same view until the next snapshot.
+    """
+
+    def __init__(self, cache: ClusterDataCache, max_rendered: int = 16):
+        self.cache = cache
+        self.max_rendered = max_rendered
+        self._lock = threading.Lock()
+        self._topology: Optional[ClusterTopology] = None
+        self._rendered: Dict[Tuple, bytes] = {}
+        self._builds = 0
+        self._render_hits = 0
+        self._render_misses = 0
+
+    def start(self) -> None:
+        """Rebuild the topology whenever the cache is updated"""
+        self.cache.add_listener(self._on_cache_update)
+
+    def stop(self) -> None:
+        self.cache.remove_listener(self._on_cache_update)
+
+    def _on_cache_update(self, diff: ClusterDataDiff, cluster_data: ClusterData) -> None:
+        topology = ClusterTopology(cluster_data, diff.version)
+        with self._lock:
+            self._topology = topology
+            self._rendered = {}
+            self._builds += 1
+
+    def get_version(self) -> Optional[int]:
+        with self._lock:
+            return self._topology.version if self._topology else None
+
+    def get_topology(self, expand: FrozenSet[str], max_group: int,
+                     max_pods: int) -> Optional[Tuple[int, bytes]]:
+        """Return (version, encoded JSON) for the requested view, or None before the first snapshot"""
+        key = (expand, max_group, max_pods)
+        with self._lock:
+            topology = self._topology
+            body = self._rendered.get(key)
+            if body is not None:
+                self._render_hits += 1
+        if topology is None:
+            return None
+        if body is not None:
+            return topology.version, body
+
+        body = _encode(topology.render(expand, max_group, max_pods)).encode()
+        with self._lock:
+            self._render_misses += 1
+            # Only keep it if no newer snapshot arrived meanwhile
+            if self._topology is topology and len(self._rendered) < self.max_rendered:
+                self._rendered[key] = body
+        return topology.version, body
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "version": self._topology.version if self._topology else None,
+                "namespaces": len(self._topology.namespaces) if self._topology else 0,
+                "builds": self._builds,
+                "cachedViews": len(self._rendered),
+                "renderHits": self._render_hits,
+                "renderMisses": self._render_misses
+            }
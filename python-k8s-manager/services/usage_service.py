@@ -0,0 +1,340 @@
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from models.cluster_data import ClusterData, ClusterDataDiff, PodInfo
+from services.cache_service import ClusterDataCache
+
+_encode = json.JSONEncoder(separators=(',', ':')).encode
+
+GROUPINGS = ('namespace', 'deployment', 'node')
+METRICS = ('cpu', 'memory')
+PERCENTILES = (50, 90, 99)
+
+# CPU in millicores, memory in bytes
+UNITS = {"cpu": "millicores", "memory": "bytes"}
+
+# (namespace, pod name) -> (CPU millicores, memory bytes)
+PodUsage = Dict[Tuple[str, str], Tuple[float, float]]
+
+class UsageQueryError(ValueError):
+    """Raised for bad usage query parameters"""
+
+# Kubernetes quantity suffixes; metrics-server reports CPU in n/u and memory in Ki
+_SUFFIXES = {
+    "n": 1e-9, "u": 1e-6, "m": 1e-3, "": 1.0,
+    "k": 1e3, "M": 1e6, "G": 1e9, "T": 1e12, "P": 1e15, "E": 1e18,
+    "Ki": 2.0 ** 10, "Mi": 2.0 ** 20, "Gi": 2.0 ** 30, "Ti": 2.0 ** 40, "Pi": 2.0 ** 50, "Ei": 2.0 ** 60
+}
+_QUANTITY = re.compile(r"^([+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)([a-zA-Z]*)$")
+
+def parse_quantity(value: str) -> float:
+    """A Kubernetes quantity as a float (kubernetes.utils.parse_quantity without the Decimal cost)"""
+    match = _QUANTITY.match(value)
+    if match is None or match.group(2) not in _SUFFIXES:
+        raise ValueError(f"invalid quantity: {value!r}")
+    return float(match.group(1)) * _SUFFIXES[match.group(2)]
+
+def pod_usage_from_metrics(items: List[Dict[str, Any]]) -> PodUsage:
+    """Sum container usage per pod from PodMetrics items"""
+    usage: PodUsage = {}
+    for item in items:
+        cpu = 0.0
+        memory = 0.0
+        for container in item.get("containers") or ():
+            values = container.get("usage") or {}
+            if "cpu" in values:
+                cpu += parse_quantity(values["cpu"])
+            if "memory" in values:
+                memory += parse_quantity(values["memory"])
+        metadata = item["metadata"]
+        usage[(metadata["namespace"], metadata["name"])] = (cpu * 1000, memory)
+    return usage
+
+class MetricsApiUsageSource:
+    """Pod usage from the metrics.k8s.io API (metrics-server)"""
+
+    def list_pod_metrics(self, k8s_service) -> List[Dict[str, Any]]:
+        return k8s_service.custom_objects.list_cluster_custom_object(
+            "metrics.k8s.io", "v1beta1", "pods", _request_timeout=k8s_service.request_timeout
+        )["items"]
+
+class FixtureUsageSource:
+    """Pod usage from a PodMetricsList JSON file, re-read whenever it changes.
+
+    The file has the metrics API's shape, so one can be recorded from a real
+    cluster with: kubectl get --raw /apis/metrics.k8s.io/v1beta1/pods
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._mtime: Optional[int] = None
+        self._items: List[Dict[str, Any]] = []
+
+    def list_pod_metrics(self, k8s_service=None) -> List[Dict[str, Any]]:
+        mtime = os.stat(self.path).st_mtime_ns
+        if mtime != self._mtime:
+            with open(self.path) as f:
+                self._items = json.load(f)["items"]
+            self._mtime = mtime
+        return self._items
+
+def usage_source_from_env():
+    """Usage source named by POD_USAGE_SOURCE: metrics (default), none, or fixture:<path>"""
+    raw = os.getenv("POD_USAGE_SOURCE", "metrics").strip()
+    if raw == "metrics":
+        return MetricsApiUsageSource()
+    if raw in ("", "none"):
+        return None
+    if raw.startswith("fixture:"):
+        return FixtureUsageSource(raw[len("fixture:"):])
+    raise ValueError(f"POD_USAGE_SOURCE must be metrics, none or fixture:<path>, got {raw!r}")
+
+def _deployment(pod: PodInfo) -> Optional[str]:
+    """namespace/deployment for pods owned by a Deployment's ReplicaSet (<deployment>-<hash>)"""
+    owner = pod.details.controller if pod.details else None
+    if owner is None or owner.kind != 'ReplicaSet':
+        return None
+    return f"{pod.namespace}/{owner.name.rsplit('-', 1)[0]}"
+
+def _deployments(pods: List[PodInfo]) -> List[Optional[str]]:
+    """_deployment() for every pod; pods of one ReplicaSet share their owner tuple contents, so memoize on it"""
+    labels: List[Optional[str]] = []
+    memo: Dict[Tuple, Optional[str]] = {}
+    for pod in pods:
+        if pod.details is None:
+            labels.append(None)
+            continue
+        key = (pod.namespace, pod.details.owners)
+        if key not in memo:
+            memo[key] = _deployment(pod)
+        labels.append(memo[key])
+    return labels
+
+def _factorize(labels: List[Optional[str]]) -> Tuple[np.ndarray, List[str]]:
+    """Integer code per label (-1 for None) and the distinct labels in code order"""
+    index: Dict[str, int] = {}
+    codes = np.fromiter((-1 if label is None else index.setdefault(label, len(index)) for label in labels),
+                        dtype=np.int64, count=len(labels))
+    return codes, list(index)
+
+def group_percentiles(codes: np.ndarray, values: np.ndarray, groups: int,
+                      percentiles: Tuple[int, ...] = PERCENTILES) -> np.ndarray:
+    """(len(percentiles), groups) array of per-group percentiles (linear interpolation, NaN for empty groups).
+
+    values must be ascending (codes aligned with them): a stable sort by group
+    code then leaves every group's values in order, so one values sort serves
+    every grouping and each grouping only pays for an integer radix sort.
+    """
+    small = codes.astype(np.int16 if groups < 2 ** 15 else np.int32)
+    ordered = values[np.argsort(small, kind='stable')]
+    counts = np.bincount(codes, minlength=groups)
+    starts = np.cumsum(counts) - counts
+    present = counts > 0
+    result = np.full((len(percentiles), groups), np.nan)
+    for row, percentile in enumerate(percentiles):
+        position = starts[present] + (counts[present] - 1) * (percentile / 100)
+        low = np.floor(position).astype(np.int64)
+        high = np.ceil(position).astype(np.int64)
+        fraction = position - low
+        result[row, present] = ordered[low] * (1 - fraction) + ordered[high] * fraction
+    return result
+
+def _number(value) -> Optional[float]:
+    value = float(value)
+    return None if np.isnan(value) else round(value, 1)
+
+class _Rollup:
+    """Per-group usage sums, request sums and usage percentiles for one grouping"""
+
+    def __init__(self, codes: np.ndarray, names: List[str], usage: Dict[str, np.ndarray],
+                 requests: Dict[str, np.ndarray], measured: np.ndarray, ascending: Dict[str, np.ndarray]):
+        groups = len(names)
+        grouped = codes >= 0
+        sampled = grouped & measured
+        self.names = names
+        self.pods = np.bincount(codes[grouped], minlength=groups)
+        self.measured = np.bincount(codes[sampled], minlength=groups)
+        self.usage = {metric: np.bincount(codes[sampled], weights=usage[metric][sampled], minlength=groups)
+                      for metric in METRICS}
+        self.requests = {metric: np.bincount(codes[grouped], weights=requests[metric][grouped], minlength=groups)
+                         for metric in METRICS}
+        self.percentiles = {}
+        for metric in METRICS:
+            rows = ascending[metric][codes[ascending[metric]] >= 0]
+            self.percentiles[metric] = group_percentiles(codes[rows], usage[metric][rows], groups)
+
+    def render(self, sort: str, limit: int) -> List[Dict[str, Any]]:
+        top = np.argsort(-self.usage[sort], kind='stable')[:limit]
+        return [self._group(int(i)) for i in top]
+
+    def _group(self, i: int) -> Dict[str, Any]:
+        group = {"name": self.names[i], "pods": int(self.pods[i]), "podsWithUsage": int(self.measured[i])}
+        for metric in METRICS:
+            usage = self.usage[metric][i]
+            requests = self.requests[metric][i]
+            group[metric] = {
+                "usage": _number(usage),
+                "requests": _number(requests),
+                "utilization": round(float(usage / requests), 4) if requests > 0 else None,
+                **{f"p{p}": _number(value) for p, value in zip(PERCENTILES, self.percentiles[metric][:, i])}
+            }
+        return group
+
+class ClusterUsage:
+    """Pod usage of one snapshot as arrays aligned with its pod list, plus precomputed rollups"""
+
+    def __init__(self, cluster_data: ClusterData, version: int):
+        started = time.perf_counter()
+        pods = cluster_data.pods
+        self.version = version
+        self.pods = pods
+        self.available = cluster_data.pod_usage is not None
+        self.timestamp = cluster_data.fetch_timestamp
+
+        # Row i of every array is pods[i]; pods missing from the metrics are NaN
+        missing = (np.nan, np.nan)
+        sample = cluster_data.pod_usage or {}
+        usage = np.array([sample.get((pod.namespace, pod.name), missing) for pod in pods],
+                         dtype=np.float64).reshape(len(pods), 2)
+        requests = np.array([(pod.details.cpu_request_millis, pod.details.memory_request_bytes)
+                             if pod.details else (0, 0) for pod in pods], dtype=np.float64).reshape(len(pods), 2)
+        self.usage = {"cpu": usage[:, 0], "memory": usage[:, 1]}
+        self.requests = {"cpu": requests[:, 0], "memory": requests[:, 1]}
+        self.measured = ~np.isnan(self.usage["cpu"])
+
+        # Measured rows by ascending usage, shared by every grouping's percentiles
+        measured_rows = np.flatnonzero(self.measured)
+        ascending = {metric: measured_rows[np.argsort(self.usage[metric][measured_rows])] for metric in METRICS}
+
+        labels = {
+            "namespace": [pod.namespace for pod in pods],
+            "deployment": _deployments(pods),
+            "node": [pod.node_name for pod in pods]
+        }
+        self.rollups = {grouping: _Rollup(*_factorize(labels[grouping]), self.usage, self.requests,
+                                          self.measured, ascending)
+                        for grouping in GROUPINGS}
+
+        measured_count = int(self.measured.sum())
+        self.totals = {"pods": len(pods), "podsWithUsage": measured_count}
+        for metric in METRICS:
+            values = self.usage[metric][self.measured]
+            self.totals[metric] = {
+                "usage": _number(values.sum()),
+                "requests": _number(self.requests[metric].sum()),
+                **{f"p{p}": _number(value) for p, value in
+                   zip(PERCENTILES, np.percentile(values, PERCENTILES) if measured_count else [np.nan] * len(PERCENTILES))}
+            }
+        self.build_seconds = time.perf_counter() - started
+
+    def _top_pods(self, sort: str, limit: int) -> List[Dict[str, Any]]:
+        values = np.where(self.measured, self.usage[sort], -np.inf)
+        if limit < len(values):
+            candidates = np.argpartition(-values, limit)[:limit]
+        else:
+            candidates = np.arange(len(values))
+        top = candidates[np.argsort(-values[candidates], kind='stable')]
+        return [{
+            "namespace": self.pods[i].namespace,
+            "name": self.pods[i].name,
+            "node": self.pods[i].node_name,
+            **{metric: {"usage": _number(self.usage[metric][i]), "requests": _number(self.requests[metric][i])}
+               for metric in METRICS}
+        } for i in top if self.measured[i]]
+
+    def render(self, by: str, sort: str, limit: int) -> Dict[str, Any]:
+        result = {
+            "version": self.version,
+            "available": self.available,
+            "timestamp": self.timestamp,
+            "units": UNITS,
+            "totals": self.totals,
+            "by": by,
+            "sort": sort
+        }
+        if by == 'pod':
+            result["pods"] = self._top_pods(sort, limit)
+        else:
+            rollup = self.rollups[by]
+            result["groupCount"] = len(rollup.names)
+            result["groups"] = rollup.render(sort, limit)
+        return result
+
+class UsageService:
+    """Keeps the usage arrays and rollups of the latest snapshot, rebuilt once per version.
+
+    Like TopologyService, the work happens in the cache update listener;
+    requests only pick and encode the top groups, and encoded views are reused
+    until the next snapshot.
+    """
+
+    def __init__(self, cache: ClusterDataCache, max_rendered: int = 16):
+        self.cache = cache
+        self.max_rendered = max_rendered
+        self._lock = threading.Lock()
+        self._usage: Optional[ClusterUsage] = None
+        self._rendered: Dict[Tuple, bytes] = {}
+        self._builds = 0
+        self._render_hits = 0
+        self._render_misses = 0
+
+    def start(self) -> None:
+        self.cache.add_listener(self._on_cache_update)
+
+    def stop(self) -> None:
+        self.cache.remove_listener(self._on_cache_update)
+
+    def _on_cache_update(self, diff: ClusterDataDiff, cluster_data: ClusterData) -> None:
+        usage = ClusterUsage(cluster_data, diff.version)
+        with self._lock:
+            self._usage = usage
+            self._rendered = {}
+            self._builds += 1
+
+    def get_version(self) -> Optional[int]:
+        with self._lock:
+            return self._usage.version if self._usage else None
+
+    def get_usage(self, by: str, sort: str, limit: int) -> Optional[Tuple[int, bytes]]:
+        """Return (version, encoded JSON) for the requested view, or None before the first snapshot"""
+        if by not in GROUPINGS and by != 'pod':
+            raise UsageQueryError(f"by must be one of: {', '.join(GROUPINGS + ('pod',))}")
+        if sort not in METRICS:
+            raise UsageQueryError(f"sort must be one of: {', '.join(METRICS)}")
+        key = (by, sort, limit)
+        with self._lock:
+            usage = self._usage
+            body = self._rendered.get(key)
+            if body is not None:
+                self._render_hits += 1
+        if usage is None:
+            return None
+        if body is not None:
+            return usage.version, body
+
+        body = _encode(usage.render(by, sort, limit)).encode()
+        with self._lock:
+            self._render_misses += 1
+            if self._usage is usage and len(self._rendered) < self.max_rendered:
+                self._rendered[key] = body
+        return usage.version, body
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            usage = self._usage
+            return {
+                "version": usage.version if usage else None,
+                "available": usage.available if usage else False,
+                "podsWithUsage": usage.totals["podsWithUsage"] if usage else 0,
+                "buildMs": round(usage.build_seconds * 1000, 2) if usage else None,
+                "builds": self._builds,
+                "cachedViews": len(self._rendered),
+                "renderHits": self._render_hits,
+                "renderMisses": self._render_misses
+            }
@@ -25,13 +25,12 @@ cd ..
 
 # Build Python applications
 echo "🐍 Building Python applications..."
-cd python-apps/app1
-docker build -t python-k8s-app1:latest .
-cd ../app2
-docker build -t python-k8s-app2:latest .
-cd ../app3
-docker build -t python-k8s-app3:latest .
-cd ../..
+# Built from python-apps/ so each image gets the shared common/ runtime
+cd python-apps
+docker build -t python-k8s-app1:latest -f app1/Dockerfile .
+docker build -t python-k8s-app2:latest -f app2/Dockerfile .
+docker build -t python-k8s-app3:latest -f app3/Dockerfile .
+cd ..
 
 # Deploy applications
 echo "🚀 Deploying applications to Kubernetes..."